@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Address Normalizer for LatePlate Finder analytics scripts
+Parses free-text addresses into city/region/country once, with an LRU cache and a persistent Mongo dictionary
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from pymongo import UpdateOne
+
+POSTAL_CODE = re.compile(r'\b\d[\d\s-]{2,}\d\b')
+WHITESPACE = re.compile(r'\s+')
+
+
+class AddressNormalizer:
+    def __init__(self, cache_collection=None, maxsize=100000):
+        """Normalize addresses, remembering results in memory and optionally in a Mongo collection"""
+        self.cache_collection = cache_collection
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse(address):
+        """Split a 'locality, city, state PIN, country' address into structured parts"""
+        address = address or ''
+        parts = [WHITESPACE.sub(' ', part).strip() for part in address.split(',')]
+        parts = [part for part in parts if part]
+        cleaned = [POSTAL_CODE.sub('', part).strip() or part for part in parts]
+
+        if 'india' in address.lower():
+            country = 'India'
+        elif len(cleaned) > 1:
+            country = cleaned[-1]
+        else:
+            country = 'Unknown'
+
+        if len(cleaned) > 2:
+            city, region = cleaned[-3], cleaned[-2]
+        elif len(cleaned) == 2:
+            city, region = cleaned[-2], None
+        else:
+            city, region = 'Unknown', None
+
+        return {
+            'key': ', '.join(part.lower() for part in cleaned),
+            'city': city,
+            'region': region,
+            'country': country
+        }
+
+    def normalize(self, address):
+        """Normalize one address (single persistent lookup on a cache miss)"""
+        return self.normalize_many([address])[0]
+
+    def normalize_many(self, addresses):
+        """Normalize a list of addresses, parsing each distinct address at most once"""
+        addresses = [address or '' for address in addresses]
+        results = {}
+        missing = []
+
+        with self._lock:
+            for address in set(addresses):
+                if address in self._cache:
+                    self._cache.move_to_end(address)
+                    results[address] = self._cache[address]
+                else:
+                    missing.append(address)
+
+        if missing and self.cache_collection is not None:
+            for start in range(0, len(missing), 1000):
+                chunk = missing[start:start + 1000]
+                for doc in self.cache_collection.find({'_id': {'$in': chunk}}):
+                    results[doc['_id']] = {field: doc.get(field) for field in ('key', 'city', 'region', 'country')}
+
+        parsed = {address: self.parse(address) for address in missing if address not in results}
+        results.update(parsed)
+        self._save(parsed)
+
+        with self._lock:
+            for address in missing:
+                self._cache[address] = results[address]
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+        return [results[address] for address in addresses]
+
+    def _save(self, parsed):
+        if self.cache_collection is None or not parsed:
+            return
+
+        operations = [
+            UpdateOne({'_id': address}, {'$setOnInsert': normalized}, upsert=True)
+            for address, normalized in parsed.items()
+        ]
+        for start in range(0, len(operations), 1000):
+            self.cache_collection.bulk_write(operations[start:start + 1000], ordered=False)
@@ -4,66 +4,96 @@ Advanced ML Analytics Script for LatePlate Finder
 Implements deep learning and advanced analytics for recipe and restaurant data
 """
 
+import argparse
+import os
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
-from sklearn.cluster import KMeans, DBSCAN
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import classification_report, mean_squared_error, silhouette_score
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import PCA
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Dropout, Embedding, LSTM, Conv1D, MaxPooling1D, Flatten
-from tensorflow.keras.preprocessing.text import Tokenizer
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 import pymongo
 import json
+import threading
 import warnings
+from module_scheduler import ModuleScheduler
+from ingredient_index import recipe_ingredients
+from model_registry import ModelRegistry, record_hashes
 warnings.filterwarnings('ignore')
 
+# TensorFlow and scikit-learn are imported inside the analyses that use them, so
+# running a single analysis only pays for the libraries it actually needs
+
+EARTH_RADIUS_METERS = 6371008.8
+
 class LatePlateMLAnalytics:
-    def __init__(self, mongo_uri="mongodb://localhost:27017", db_name="lateplate"):
+    ANALYSES = [
+        'recipe_recommendation_deep_learning',
+        'restaurant_clustering_analysis',
+        'sentiment_analysis_deep_learning',
+        'sentiment_analysis_streaming',
+        'demand_forecasting',
+        'partitioned_demand_forecasting',
+        'user_behavior_analysis'
+    ]
+    
+    # DataFrames each analysis reads: attribute -> (collection, label)
+    DATASETS = {
+        'recipes_df': ('recipes', 'recipes'),
+        'restaurants_df': ('restaurants', 'restaurants'),
+        'feedback_df': ('feedback', 'feedback entries')
+    }
+    ANALYSIS_INPUTS = {
+        'recipe_recommendation_deep_learning': ['recipes_df'],
+        'restaurant_clustering_analysis': ['restaurants_df'],
+        'sentiment_analysis_deep_learning': ['feedback_df'],
+        'sentiment_analysis_streaming': [],
+        'demand_forecasting': [],
+        'partitioned_demand_forecasting': [],
+        'user_behavior_analysis': []
+    }
+    
+    def __init__(self, mongo_uri="mongodb://localhost:27017", db_name="lateplate", max_workers=None,
+                 model_dir='ml_models', feature_store_dir='feature_store'):
         """Initialize the ML analytics system"""
-        self.client = pymongo.MongoClient(mongo_uri)
-        self.db = self.client[db_name]
-        self.scaler = StandardScaler()
-        self.label_encoder = LabelEncoder()
+        self.mongo_uri = mongo_uri
+        self.db_name = db_name
+        self.client = None
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._rollup_lock = threading.Lock()
+        self._user_feature_store = None
+        self.feature_store_dir = feature_store_dir
+        self.max_workers = max_workers
+        self.registry = ModelRegistry(model_dir)
         
         print("🚀 LatePlate ML Analytics System Initialized")
         print("=" * 50)
     
-    def load_data(self):
-        """Load data from MongoDB collections"""
+    @property
+    def db(self):
+        """MongoDB database, connected on first use"""
+        with self._db_lock:
+            if self._db is None:
+                self.client = pymongo.MongoClient(self.mongo_uri)
+                self._db = self.client[self.db_name]
+        return self._db
+    
+    def load_data(self, analyses=None):
+        """Load the MongoDB collections the given analyses read (all of them by default)"""
         print("📊 Loading data from MongoDB...")
         
-        # Load recipes
-        recipes_cursor = self.db.recipes.find({})
-        self.recipes_df = pd.DataFrame(list(recipes_cursor))
-        
-        # Load restaurants
-        restaurants_cursor = self.db.restaurants.find({})
-        self.restaurants_df = pd.DataFrame(list(restaurants_cursor))
+        analyses = analyses or self.ANALYSES
+        datasets = [name for name in self.DATASETS if any(name in self.ANALYSIS_INPUTS[a] for a in analyses)]
         
-        # Load user activities
-        activities_cursor = self.db.userActivities.find({})
-        self.activities_df = pd.DataFrame(list(activities_cursor))
-        
-        # Load user feedback
-        feedback_cursor = self.db.feedback.find({})
-        self.feedback_df = pd.DataFrame(list(feedback_cursor))
-        
-        print(f"✅ Loaded {len(self.recipes_df)} recipes")
-        print(f"✅ Loaded {len(self.restaurants_df)} restaurants")
-        print(f"✅ Loaded {len(self.activities_df)} user activities")
-        print(f"✅ Loaded {len(self.feedback_df)} feedback entries")
+        for name in datasets:
+            collection, label = self.DATASETS[name]
+            setattr(self, name, pd.DataFrame(list(self.db[collection].find({}))))
+            print(f"✅ Loaded {len(getattr(self, name))} {label}")
         print()
     
     def recipe_recommendation_deep_learning(self):
         """Advanced recipe recommendation using deep learning"""
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Dense, Dropout, Embedding, LSTM, Conv1D, MaxPooling1D
+        import text_pipeline
+        
         print("🧠 Building Deep Learning Recipe Recommendation Model...")
         
         if self.recipes_df.empty:
@@ -73,56 +103,43 @@ class LatePlateMLAnalytics:
         # Prepare text data for deep learning
         recipe_texts = []
         for _, recipe in self.recipes_df.iterrows():
-            text = f"{recipe.get('name', '')} {' '.join(recipe.get('ingredients', []))} {recipe.get('cuisine', '')} {' '.join(recipe.get('tags', []))}"
+            ingredients = ' '.join(sorted(recipe_ingredients(recipe)))
+            text = f"{recipe.get('name', '')} {ingredients} {recipe.get('cuisine', '')} {' '.join(recipe.get('tags', []))}"
             recipe_texts.append(text.lower())
         
-        # Tokenization and sequence preparation
-        tokenizer = Tokenizer(num_words=5000, oov_token="<OOV>")
-        tokenizer.fit_on_texts(recipe_texts)
-        sequences = tokenizer.texts_to_sequences(recipe_texts)
-        padded_sequences = pad_sequences(sequences, maxlen=100, padding='post')
-        
         # Create target variable (recipe rating)
         ratings = self.recipes_df['rating'].fillna(3.0).values
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            padded_sequences, ratings, test_size=0.2, random_state=42
-        )
-        
         # Build deep learning model
-        model = Sequential([
-            Embedding(5000, 128, input_length=100),
-            Conv1D(64, 5, activation='relu'),
-            MaxPooling1D(pool_size=4),
-            LSTM(64, dropout=0.5, recurrent_dropout=0.5),
-            Dense(32, activation='relu'),
-            Dropout(0.5),
-            Dense(1, activation='linear')
-        ])
-        
-        model.compile(
-            optimizer='adam',
-            loss='mse',
-            metrics=['mae']
-        )
-        
-        # Train model
-        print("🔄 Training deep learning model...")
-        history = model.fit(
-            X_train, y_train,
-            batch_size=32,
-            epochs=20,
-            validation_data=(X_test, y_test),
-            verbose=0
+        def build_model():
+            model = Sequential([
+                Embedding(5000, 128),
+                Conv1D(64, 5, activation='relu'),
+                MaxPooling1D(pool_size=4),
+                LSTM(64, dropout=0.5, recurrent_dropout=0.5),
+                Dense(32, activation='relu'),
+                Dropout(0.5),
+                Dense(1, activation='linear')
+            ])
+            
+            model.compile(
+                optimizer='adam',
+                loss='mse',
+                metrics=['mae']
+            )
+            return model
+        
+        # Train, fine-tune or reuse the registered model depending on what changed
+        model, sequences, training = self._train_text_model(
+            'recipe_recommendation', recipe_texts, ratings, build_model,
+            record_ids=self._record_ids(self.recipes_df), num_words=5000, maxlen=100,
+            epochs=20, batch_size=32, min_length=8
         )
-        
-        # Evaluate model
-        test_loss, test_mae = model.evaluate(X_test, y_test, verbose=0)
+        test_loss, test_mae = training['test_loss'], training['test_metric']
         print(f"✅ Deep Learning Model - Test MAE: {test_mae:.4f}")
         
         # Generate predictions for all recipes
-        predictions = model.predict(padded_sequences, verbose=0)
+        predictions = text_pipeline.predict(model, sequences)
         
         # Create recommendation results
         recommendations = []
@@ -148,7 +165,8 @@ class LatePlateMLAnalytics:
             },
             'top_recommendations': recommendations[:20],
             'model_architecture': 'CNN-LSTM Hybrid',
-            'training_samples': len(X_train)
+            'training_samples': training['training_samples'],
+            'training_action': training['action']
         })
         
         print(f"🎯 Generated {len(recommendations)} recipe recommendations")
@@ -156,6 +174,9 @@ class LatePlateMLAnalytics:
     
     def restaurant_clustering_analysis(self):
         """Advanced restaurant clustering with multiple algorithms"""
+        from sklearn.preprocessing import StandardScaler
+        from cluster_selection import select_cluster_count
+        
         print("🗺️  Performing Advanced Restaurant Clustering Analysis...")
         
         if self.restaurants_df.empty:
@@ -180,41 +201,33 @@ class LatePlateMLAnalytics:
         ])
         
         # Standardize features
-        features_scaled = self.scaler.fit_transform(features_df)
+        features_scaled = StandardScaler().fit_transform(features_df)
         
         # K-Means Clustering
         print("🔄 Performing K-Means clustering...")
-        kmeans_results = {}
-        silhouette_scores = []
-        
-        for k in range(2, 11):
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            cluster_labels = kmeans.fit_predict(features_scaled)
-            silhouette_avg = silhouette_score(features_scaled, cluster_labels)
-            silhouette_scores.append(silhouette_avg)
-            
-            if k == 5:  # Optimal k
-                kmeans_results = {
-                    'n_clusters': k,
-                    'silhouette_score': silhouette_avg,
-                    'cluster_centers': kmeans.cluster_centers_.tolist(),
-                    'labels': cluster_labels.tolist()
-                }
-        
-        # DBSCAN Clustering
-        print("🔄 Performing DBSCAN clustering...")
-        dbscan = DBSCAN(eps=0.5, min_samples=5)
-        dbscan_labels = dbscan.fit_predict(features_scaled)
+        selection = select_cluster_count(features_scaled, range(2, 11), max_workers=self.max_workers)
+        if not selection['models']:
+            print("❌ Not enough restaurants for clustering")
+            return
         
-        n_clusters_dbscan = len(set(dbscan_labels)) - (1 if -1 in dbscan_labels else 0)
-        n_noise = list(dbscan_labels).count(-1)
+        optimal_k = selection['best_k']
+        silhouette_scores = [float(selection['scores'][k]) for k in sorted(selection['scores'])]
         
-        dbscan_results = {
-            'n_clusters': n_clusters_dbscan,
-            'n_noise_points': n_noise,
-            'labels': dbscan_labels.tolist()
+        kmeans = selection['models'][optimal_k]
+        cluster_labels = kmeans.predict(features_scaled)
+        kmeans_results = {
+            'n_clusters': optimal_k,
+            'silhouette_score': selection['scores'].get(optimal_k, 0.0),
+            'cluster_centers': kmeans.cluster_centers_.tolist(),
+            'labels': cluster_labels.tolist()
         }
         
+        # DBSCAN Clustering on geographic distance only
+        print("🔄 Performing DBSCAN clustering...")
+        dbscan_results = self.geospatial_clustering(features_df)
+        n_clusters_dbscan = dbscan_results['n_clusters']
+        n_noise = dbscan_results['n_noise_points']
+        
         # Analyze clusters
         cluster_analysis = self.analyze_restaurant_clusters(features_df, kmeans_results['labels'])
         
@@ -224,13 +237,77 @@ class LatePlateMLAnalytics:
             'dbscan_results': dbscan_results,
             'cluster_analysis': cluster_analysis,
             'silhouette_scores': silhouette_scores,
-            'optimal_k': 5
+            'optimal_k': optimal_k
         })
         
         print(f"✅ K-Means found {kmeans_results['n_clusters']} clusters")
         print(f"✅ DBSCAN found {n_clusters_dbscan} clusters with {n_noise} noise points")
         print()
     
+    def geospatial_clustering(self, features_df, eps_meters=500, min_samples=5):
+        """DBSCAN over haversine distance with a BallTree index; returns per-cluster summaries"""
+        from sklearn.cluster import DBSCAN
+        
+        coords = features_df[['latitude', 'longitude']].astype(float)
+        located = coords[(coords['latitude'] != 0) | (coords['longitude'] != 0)].dropna()
+        
+        if len(located) < min_samples:
+            return {'n_clusters': 0, 'n_noise_points': int(len(located)), 'eps_meters': eps_meters, 'clusters': []}
+        
+        radians = np.radians(located.values)
+        dbscan = DBSCAN(
+            eps=eps_meters / EARTH_RADIUS_METERS,
+            min_samples=min_samples,
+            metric='haversine',
+            algorithm='ball_tree',
+            n_jobs=-1
+        )
+        labels = dbscan.fit_predict(radians)
+        
+        clustered = labels >= 0
+        n_clusters = int(labels.max() + 1) if clustered.any() else 0
+        
+        # Centroids from mean unit vectors, so clusters spanning the antimeridian stay correct
+        lat, lng = radians[clustered, 0], radians[clustered, 1]
+        xyz = np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+        cluster_labels = labels[clustered]
+        counts = np.bincount(cluster_labels, minlength=n_clusters)
+        sums = np.column_stack([np.bincount(cluster_labels, weights=xyz[:, i], minlength=n_clusters) for i in range(3)])
+        centers = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+        center_lat = np.arcsin(np.clip(centers[:, 2], -1, 1))
+        center_lng = np.arctan2(centers[:, 1], centers[:, 0])
+        
+        # Radius is the farthest member from its centroid
+        member_distances = EARTH_RADIUS_METERS * np.arccos(
+            np.clip((xyz * centers[cluster_labels]).sum(axis=1), -1, 1)
+        )
+        radius = np.zeros(n_clusters)
+        np.maximum.at(radius, cluster_labels, member_distances)
+        
+        ratings = features_df.loc[located.index, 'rating'].astype(float).values[clustered]
+        rating_sums = np.bincount(cluster_labels, weights=np.nan_to_num(ratings), minlength=n_clusters)
+        
+        clusters = [
+            {
+                'cluster_id': int(i),
+                'size': int(counts[i]),
+                'center_lat': float(np.degrees(center_lat[i])),
+                'center_lng': float(np.degrees(center_lng[i])),
+                'radius_meters': float(radius[i]),
+                'avg_rating': float(rating_sums[i] / counts[i])
+            }
+            for i in range(n_clusters)
+        ]
+        clusters.sort(key=lambda c: c['size'], reverse=True)
+        
+        return {
+            'n_clusters': n_clusters,
+            'n_noise_points': int((~clustered).sum()),
+            'n_unlocated': int(len(features_df) - len(located)),
+            'eps_meters': eps_meters,
+            'clusters': clusters
+        }
+    
     def analyze_restaurant_clusters(self, features_df, labels):
         """Analyze restaurant clusters and generate insights"""
         cluster_analysis = {}
@@ -256,6 +333,10 @@ class LatePlateMLAnalytics:
     
     def sentiment_analysis_deep_learning(self):
         """Deep learning sentiment analysis on user feedback"""
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Dense, Dropout, Embedding, LSTM
+        import text_pipeline
+        
         print("💭 Performing Deep Learning Sentiment Analysis...")
         
         if self.feedback_df.empty:
@@ -270,50 +351,37 @@ class LatePlateMLAnalytics:
         ratings = self.feedback_df['rating'].fillna(3).values
         sentiments = ['negative' if r < 3 else 'neutral' if r == 3 else 'positive' for r in ratings]
         
-        # Encode labels
-        sentiment_encoded = self.label_encoder.fit_transform(sentiments)
-        
-        # Tokenization
-        tokenizer = Tokenizer(num_words=3000, oov_token="<OOV>")
-        tokenizer.fit_on_texts(feedback_texts)
-        sequences = tokenizer.texts_to_sequences(feedback_texts)
-        padded_sequences = pad_sequences(sequences, maxlen=50, padding='post')
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            padded_sequences, sentiment_encoded, test_size=0.2, random_state=42
-        )
+        # Encode labels with a fixed mapping so saved models stay valid across runs
+        label_ids = {'negative': 0, 'neutral': 1, 'positive': 2}
+        sentiment_encoded = np.array([label_ids[s] for s in sentiments])
         
         # Build sentiment analysis model
-        model = Sequential([
-            Embedding(3000, 64, input_length=50),
-            LSTM(32, dropout=0.3, recurrent_dropout=0.3),
-            Dense(16, activation='relu'),
-            Dropout(0.5),
-            Dense(3, activation='softmax')  # 3 classes: negative, neutral, positive
-        ])
-        
-        model.compile(
-            optimizer='adam',
-            loss='sparse_categorical_crossentropy',
-            metrics=['accuracy']
-        )
-        
-        # Train model
-        print("🔄 Training sentiment analysis model...")
-        history = model.fit(
-            X_train, y_train,
-            batch_size=16,
-            epochs=15,
-            validation_data=(X_test, y_test),
-            verbose=0
+        def build_model():
+            model = Sequential([
+                Embedding(3000, 64, mask_zero=True),
+                LSTM(32, dropout=0.3, recurrent_dropout=0.3),
+                Dense(16, activation='relu'),
+                Dropout(0.5),
+                Dense(3, activation='softmax')  # 3 classes: negative, neutral, positive
+            ])
+            
+            model.compile(
+                optimizer='adam',
+                loss='sparse_categorical_crossentropy',
+                metrics=['accuracy']
+            )
+            return model
+        
+        # Train, fine-tune or reuse the registered model depending on what changed
+        model, sequences, training = self._train_text_model(
+            'sentiment_analysis', feedback_texts, sentiment_encoded, build_model,
+            record_ids=self._record_ids(self.feedback_df), num_words=3000, maxlen=50,
+            epochs=15, batch_size=16
         )
-        
-        # Evaluate model
-        test_loss, test_accuracy = model.evaluate(X_test, y_test, verbose=0)
+        test_loss, test_accuracy = training['test_loss'], training['test_metric']
         
         # Generate predictions
-        predictions = model.predict(padded_sequences, verbose=0)
+        predictions = text_pipeline.predict(model, sequences)
         predicted_sentiments = np.argmax(predictions, axis=1)
         
         # Analyze sentiment distribution
@@ -331,28 +399,93 @@ class LatePlateMLAnalytics:
             },
             'sentiment_distribution': sentiment_distribution,
             'total_feedback_analyzed': len(feedback_texts),
-            'model_architecture': 'LSTM-based Sentiment Classifier'
+            'model_architecture': 'LSTM-based Sentiment Classifier',
+            'training_action': training['action']
         })
         
         print(f"✅ Sentiment Analysis - Test Accuracy: {test_accuracy:.4f}")
         print(f"📊 Sentiment Distribution: {sentiment_distribution}")
         print()
     
+    def sentiment_analysis_streaming(self, batch_size=5000):
+        """Linear sentiment classifier trained incrementally on feedback streamed from MongoDB"""
+        from streaming_sentiment import StreamingSentimentModel, SENTIMENT_LABELS, rating_sentiment
+        from log_watermark import LogWatermark
+        
+        print("💭 Performing Streaming Sentiment Analysis...")
+        
+        checkpoint = os.path.join(self.registry.root, 'sentiment_streaming.joblib')
+        model = StreamingSentimentModel.load(checkpoint)
+        
+        def batches(documents):
+            batch = []
+            for doc in documents:
+                batch.append(doc)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        
+        def feedback(query):
+            return self.db.feedback.find(query, {'message': 1, 'rating': 1}).sort('_id', 1).batch_size(batch_size)
+        
+        # Only feedback the checkpoint's watermark hasn't seen is trained on, including late commits
+        watermark = LogWatermark.from_document(model.watermark)
+        new_records = 0
+        for batch in batches(watermark.new_documents(feedback(watermark.query()))):
+            model.partial_fit(
+                [doc.get('message') or '' for doc in batch],
+                [rating_sentiment(doc.get('rating')) for doc in batch],
+                watermark=watermark.to_document()
+            )
+            new_records += len(batch)
+        
+        if not model.is_fitted:
+            print("❌ No feedback data available")
+            return
+        
+        if new_records:
+            model.save(checkpoint)
+        
+        # Score all feedback in the same bounded-memory batches
+        counts = np.zeros(len(SENTIMENT_LABELS), dtype=np.int64)
+        for batch in batches(feedback({})):
+            predicted = model.predict([doc.get('message') or '' for doc in batch])
+            counts += np.bincount(predicted, minlength=len(SENTIMENT_LABELS))
+        sentiment_distribution = {label: int(count) for label, count in zip(SENTIMENT_LABELS, counts)}
+        
+        accuracy = model.progressive_accuracy
+        self.save_ml_results('sentiment_analysis_streaming', {
+            'model_performance': {
+                'progressive_accuracy': float(accuracy) if accuracy is not None else None
+            },
+            'sentiment_distribution': sentiment_distribution,
+            'total_feedback_analyzed': int(counts.sum()),
+            'records_trained': model.records_trained,
+            'new_records_trained': new_records,
+            'model_architecture': 'HashingVectorizer + SGD (partial_fit)'
+        })
+        
+        print(f"✅ Streaming Sentiment - trained on {new_records} new records ({model.records_trained} total)")
+        print(f"📊 Sentiment Distribution: {sentiment_distribution}")
+        print()
+    
     def demand_forecasting(self):
         """Time series forecasting for restaurant demand"""
+        from sklearn.model_selection import train_test_split
+        from sklearn.ensemble import GradientBoostingRegressor
+        from sklearn.metrics import mean_squared_error
+        
         print("📈 Performing Demand Forecasting Analysis...")
         
-        if self.activities_df.empty:
+        # Hourly counts come from the incrementally maintained rollup, not raw activities
+        rollup = self.activity_rollup()
+        if rollup.empty:
             print("❌ No activity data available")
             return
         
-        # Prepare time series data
-        self.activities_df['timestamp'] = pd.to_datetime(self.activities_df['timestamp'])
-        
-        # Group by hour and count activities
-        hourly_demand = self.activities_df.groupby(
-            self.activities_df['timestamp'].dt.floor('H')
-        ).size().reset_index(name='demand')
+        hourly_demand = rollup.groupby('hour')['count'].sum().rename_axis('timestamp').reset_index(name='demand')
         
         # Create features for demand prediction
         hourly_demand['hour'] = hourly_demand['timestamp'].dt.hour
@@ -409,30 +542,115 @@ class LatePlateMLAnalytics:
         print(f"🔝 Peak demand hours: {[int(i) for i in np.argsort(future_predictions)[-5:]]}")
         print()
     
-    def user_behavior_analysis(self):
-        """Advanced user behavior analysis using machine learning"""
-        print("👥 Performing User Behavior Analysis...")
+    def partitioned_demand_forecasting(self, min_total_demand=24, chunk_size=32):
+        """One hour-of-week demand model per city, trained in parallel and saved as a forecast table"""
+        from pymongo import UpdateOne
+        from demand_partitions import train_partitions
+        
+        print("🏙️  Performing Partitioned Demand Forecasting...")
         
-        if self.activities_df.empty:
+        rollup = self.activity_rollup()
+        if rollup.empty:
             print("❌ No activity data available")
             return
         
-        # Aggregate user behavior features
-        user_features = self.activities_df.groupby('userId').agg({
-            'timestamp': 'count',  # Total activities
-            'type': lambda x: x.mode().iloc[0] if not x.empty else 'unknown',  # Most common activity
-        }).rename(columns={'timestamp': 'total_activities'})
+        # Collapse activity types, then split the hourly series by city
+        city_hours = rollup.groupby(['city', 'hour'], sort=False)['count'].sum().reset_index()
+        city_hours['epoch_hour'] = city_hours['hour'].dt.tz_convert(None).values.astype('datetime64[h]').astype(np.int64)
+        totals = city_hours.groupby('city')['count'].sum()
+        
+        partitions = [
+            (city, group['epoch_hour'].values, group['count'].values)
+            for city, group in city_hours.groupby('city', sort=False)
+            if totals[city] >= min_total_demand
+        ]
+        if not partitions:
+            print("❌ Not enough activity per city for partitioned forecasting")
+            return
+        
+        results = train_partitions(partitions, max_workers=self.max_workers, chunk_size=chunk_size)
+        
+        # Compact forecast table: one document per city holding its 168 hour-of-week slots
+        updated_at = pd.Timestamp.now().to_pydatetime()
+        operations = [
+            UpdateOne(
+                {'_id': city},
+                {'$set': {
+                    'partition_by': 'city',
+                    'forecast': np.round(forecast, 4).tolist(),
+                    **stats,
+                    'updated_at': updated_at
+                }},
+                upsert=True
+            )
+            for city, forecast, stats in results
+        ]
+        for start in range(0, len(operations), 1000):
+            self.db.demand_forecasts.bulk_write(operations[start:start + 1000], ordered=False)
+        
+        rmses = [stats['rmse'] for _, _, stats in results if stats['rmse'] is not None]
+        peak_slots = {
+            city: [int(slot) for slot in np.argsort(forecast)[-3:][::-1]]
+            for city, forecast, _ in sorted(results, key=lambda r: r[2]['total_demand'], reverse=True)[:20]
+        }
         
-        # Add time-based features
-        self.activities_df['hour'] = pd.to_datetime(self.activities_df['timestamp']).dt.hour
-        user_time_features = self.activities_df.groupby('userId').agg({
-            'hour': ['mean', 'std']
+        self.save_ml_results('partitioned_demand_forecasting', {
+            'partitions_trained': len(results),
+            'partitions_skipped': int((totals < min_total_demand).sum()),
+            'model_performance': {'median_rmse': float(np.median(rmses)) if rmses else None},
+            'peak_hour_of_week_slots': peak_slots,
+            'model_type': 'Per-city mean demand per hour-of-week slot (168 slots)'
         })
-        user_time_features.columns = ['avg_activity_hour', 'activity_hour_std']
         
-        # Combine features
-        user_features = user_features.join(user_time_features)
-        user_features = user_features.fillna(0)
+        print(f"✅ Partitioned Demand Forecasting - {len(results)} city models saved to demand_forecasts")
+        print()
+    
+    def user_feature_store(self):
+        """Shared per-user feature store (opened once, refreshed by each reader)"""
+        from user_feature_store import UserFeatureStore
+        
+        db = self.db
+        with self._db_lock:
+            if self._user_feature_store is None:
+                self._user_feature_store = UserFeatureStore(db, self.feature_store_dir)
+        return self._user_feature_store
+    
+    def activity_rollup(self):
+        """Bring the userActivities hour x type x city rollup up to date and return it"""
+        from hourly_rollup import HourlyRollup
+        
+        rollup = HourlyRollup(self.db, 'userActivities')
+        
+        # Concurrent analyses must not fold the same new activities in twice
+        with self._rollup_lock:
+            new_activities = rollup.refresh()
+        if new_activities:
+            print(f"🧮 Rolled up {new_activities} new activities")
+        return rollup.table()
+    
+    def user_behavior_analysis(self):
+        """Advanced user behavior analysis using machine learning"""
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.cluster import KMeans
+        
+        print("👥 Performing User Behavior Analysis...")
+        
+        # Per-user aggregates come from the shared, incrementally updated feature store
+        store = self.user_feature_store()
+        store.refresh()
+        user_features = store.frame()
+        user_features = user_features[user_features['activity_count'] > 0]
+        
+        if user_features.empty:
+            print("❌ No activity data available")
+            return
+        
+        user_features = pd.DataFrame({
+            'total_activities': user_features['activity_count'],
+            'type': user_features['top_activity_type'],  # Most common activity
+            'avg_activity_hour': user_features['avg_activity_hour'],
+            'activity_hour_std': user_features['activity_hour_std']
+        }).fillna(0)
         
         # Encode categorical features
         activity_types = user_features['type'].unique()
@@ -441,7 +659,7 @@ class LatePlateMLAnalytics:
         
         # Prepare features for clustering
         clustering_features = user_features[['total_activities', 'avg_activity_hour', 'activity_hour_std']].values
-        clustering_features_scaled = self.scaler.fit_transform(clustering_features)
+        clustering_features_scaled = StandardScaler().fit_transform(clustering_features)
         
         # Perform user segmentation
         kmeans = KMeans(n_clusters=4, random_state=42)
@@ -498,6 +716,79 @@ class LatePlateMLAnalytics:
         
         return characteristics
     
+    @staticmethod
+    def _record_ids(df):
+        return df['_id'].astype(str).tolist() if '_id' in df else [str(i) for i in df.index]
+    
+    def _train_text_model(self, name, texts, targets, build_model, record_ids, num_words, maxlen,
+                          epochs, batch_size, min_length=1, fine_tune_epochs=3):
+        """Bring a registered tokenizer + Keras text model up to date with the current records
+        
+        Unchanged records reuse the saved model for inference only; appended records
+        fine-tune it (new records plus an equal-sized replay sample of old ones);
+        anything else retrains from scratch. Batches come from a length-bucketed
+        tf.data pipeline. Returns (model, sequences, training).
+        """
+        from sklearn.model_selection import train_test_split
+        from tensorflow.keras.preprocessing.text import Tokenizer
+        import text_pipeline
+        
+        hashes = record_hashes(zip(record_ids, texts, targets.tolist()))
+        config = {'num_words': num_words, 'maxlen': maxlen, 'input': 'length_bucketed'}
+        saved = self.registry.load(name)
+        action, new_rows = self.registry.plan(saved, hashes, config)
+        
+        if action == 'train':
+            tokenizer = Tokenizer(num_words=num_words, oov_token="<OOV>")
+            tokenizer.fit_on_texts(texts)
+        else:
+            # Keep the saved vocabulary so token ids still match the embedding
+            tokenizer = saved['tokenizer']
+        sequences = text_pipeline.tokenize(tokenizer, texts, maxlen, min_length=min_length)
+        
+        def batches(rows, shuffle=True):
+            return text_pipeline.training_dataset(
+                sequences, targets, rows, batch_size, maxlen, min_length=min_length, shuffle=shuffle
+            )
+        
+        if action == 'skip':
+            print(f"⏭️  {name}: training data unchanged, reusing saved model")
+            return saved['model'], sequences, {**saved['metadata'], 'action': action}
+        
+        if action == 'fine_tune':
+            model = saved['model']
+            old_rows = np.setdiff1d(np.arange(len(texts)), new_rows)
+            replay = np.random.default_rng(42).choice(old_rows, size=min(len(old_rows), len(new_rows)), replace=False)
+            rows = np.concatenate([new_rows, replay])
+            
+            # The new records are unseen, so they double as the evaluation set
+            test_loss, test_metric = model.evaluate(batches(new_rows, shuffle=False), verbose=0)
+            print(f"🔄 Fine-tuning {name} model on {len(new_rows)} new records...")
+            model.fit(batches(rows), epochs=fine_tune_epochs, verbose=0)
+            training_samples = len(rows)
+        else:
+            train_rows, test_rows = train_test_split(
+                np.arange(len(texts)), test_size=0.2, random_state=42
+            )
+            model = build_model()
+            print(f"🔄 Training {name} model...")
+            model.fit(
+                batches(train_rows),
+                epochs=epochs,
+                validation_data=batches(test_rows, shuffle=False),
+                verbose=0
+            )
+            test_loss, test_metric = model.evaluate(batches(test_rows, shuffle=False), verbose=0)
+            training_samples = len(train_rows)
+        
+        training = {
+            'test_loss': float(test_loss),
+            'test_metric': float(test_metric),
+            'training_samples': training_samples
+        }
+        self.registry.save(name, model, tokenizer, hashes, {**training, 'config': config})
+        return model, sequences, {**training, 'action': action}
+    
     def save_ml_results(self, analysis_type, results):
         """Save ML analysis results to MongoDB"""
         result_doc = {
@@ -542,28 +833,42 @@ class LatePlateMLAnalytics:
         print(f"🔍 Analysis types: {list(report['analyses_summary'].keys())}")
         print()
     
-    def run_all_analyses(self):
-        """Run all ML analyses"""
+    def run_all_analyses(self, analyses=None):
+        """Run the given ML analyses (all of them by default)"""
         print("🚀 Starting Comprehensive ML Analysis Pipeline...")
         print("=" * 60)
         
+        analyses = analyses or self.ANALYSES
+        
         # Load data
-        self.load_data()
+        self.load_data(analyses)
         
-        # Run all analyses
-        self.recipe_recommendation_deep_learning()
-        self.restaurant_clustering_analysis()
-        self.sentiment_analysis_deep_learning()
-        self.demand_forecasting()
-        self.user_behavior_analysis()
+        # Analyses only read the loaded DataFrames, so they run concurrently (in threads, since
+        # they are bound methods; TensorFlow, scikit-learn and MongoDB release the GIL while busy)
+        scheduler = ModuleScheduler(max_workers=self.max_workers)
+        for analysis in analyses:
+            scheduler.add(analysis, getattr(self, analysis))
         
-        # Generate comprehensive report
-        self.generate_comprehensive_report()
+        # Generate comprehensive report once every analysis has saved its results
+        scheduler.add('comprehensive_report', self.generate_comprehensive_report, depends_on=analyses)
+        scheduler.run()
         
         print("🎉 All ML analyses completed successfully!")
         print("=" * 60)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run LatePlate Finder ML analyses")
+    parser.add_argument('analyses', nargs='*', metavar='analysis',
+                        help=f"analyses to run (default: all): {', '.join(LatePlateMLAnalytics.ANALYSES)}")
+    parser.add_argument('--mongo-uri', default="mongodb://localhost:27017")
+    parser.add_argument('--db-name', default="lateplate")
+    parser.add_argument('--max-workers', type=int, default=None)
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.analyses if name not in LatePlateMLAnalytics.ANALYSES]
+    if unknown:
+        parser.error(f"unknown analyses: {', '.join(unknown)}")
+    
     # Initialize and run ML analytics
-    ml_analytics = LatePlateMLAnalytics()
-    ml_analytics.run_all_analyses()
+    ml_analytics = LatePlateMLAnalytics(args.mongo_uri, args.db_name, max_workers=args.max_workers)
+    ml_analytics.run_all_analyses(args.analyses)
@@ -1,30 +1,512 @@
+import argparse
 import pymongo
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import silhouette_score
-from textblob import TextBlob
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
+from datetime import datetime
 import json
-from collections import defaultdict, Counter
+import re
+import heapq
+import hashlib
+import math
+import calendar
+from collections import defaultdict, Counter, OrderedDict
+import threading
 import warnings
+from module_scheduler import ModuleScheduler
+from address_normalizer import AddressNormalizer
+from association_mining import build_item_bitmaps, mine_frequent_itemsets, association_rules
+from ingredient_index import normalize_ingredient, recipe_ingredients, IngredientVocabulary, IngredientIndex
+from log_watermark import LogWatermark
+from increment_journal import IncrementJournal
+import os
 warnings.filterwarnings('ignore')
 
-# MongoDB connection
-client = pymongo.MongoClient("your_key_here")
-db = client["DB_name"]
+# scikit-learn, SciPy and TextBlob are imported inside the modules that use them,
+# so running a single module only pays for the libraries it actually needs
 
-class LatePlateAnalyticsEngine:
-    def __init__(self):
+class AnalyticsSnapshot:
+    """Per-run cache that fetches each collection once and shares it across modules"""
+    def __init__(self, db, module_inputs):
         self.db = db
+        self.projections = self._merge_projections(module_inputs)
+        self._collections = {}
+        self._lock = threading.Lock()
+        self._collection_locks = {}
+    
+    @staticmethod
+    def _merge_projections(module_inputs):
+        """Union the fields every module declares for each collection"""
+        merged = {}
+        for inputs in module_inputs.values():
+            for collection, fields in inputs.items():
+                if fields is None or (collection in merged and merged[collection] is None):
+                    merged[collection] = None  # Some module needs the full document
+                else:
+                    merged.setdefault(collection, set()).update(fields)
+        
+        return {
+            collection: None if fields is None else {field: 1 for field in sorted(fields)}
+            for collection, fields in merged.items()
+        }
+    
+    def get(self, collection):
+        """Return the cached documents of a collection, fetching them on first use"""
+        with self._lock:
+            collection_lock = self._collection_locks.setdefault(collection, threading.Lock())
+        
+        # Concurrent modules asking for the same collection wait for a single fetch
+        with collection_lock:
+            if collection not in self._collections:
+                projection = self.projections.get(collection)
+                self._collections[collection] = list(self.db[collection].find({}, projection))
+        return self._collections[collection]
+    
+    def clear(self):
+        """Release all cached documents"""
+        self._collections.clear()
+
+class TimeFeatureCache:
+    """Decodes a document list's timestamps once and shares hour/weekday/month columns"""
+    NS_PER_HOUR = 3_600_000_000_000
+    NS_PER_DAY = 24 * NS_PER_HOUR
+    
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+    
+    def get(self, documents, field='timestamp'):
+        """Return cached time feature columns aligned with the documents list"""
+        key = (id(documents), field)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][1]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        # Decode outside the cache lock: only modules asking for the same columns wait here
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    return self._entries[key][1]
+            
+            features = self.decode([doc.get(field) for doc in documents])
+            with self._lock:
+                # Keep a reference to the list so its id can't be reused while cached
+                self._entries[key] = (documents, features)
+                self._key_locks.pop(key, None)
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return features
+    
+    @classmethod
+    def decode(cls, timestamps):
+        """Vectorized decode of mixed str/datetime timestamps into UTC epoch and calendar columns"""
+        values = pd.Series(timestamps, dtype=object).where(lambda v: v.astype(bool), None)
+        parsed = pd.to_datetime(values, utc=True, errors='coerce', format='ISO8601')
+        valid = parsed.notna().to_numpy()
+        
+        epoch_ns = parsed.dt.tz_convert(None).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        epoch_ns = np.where(valid, epoch_ns, 0)
+        months = epoch_ns.astype('datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+        
+        return {
+            'epoch_ns': epoch_ns,
+            'valid': valid,
+            'hour': (epoch_ns // cls.NS_PER_HOUR) % 24,
+            'weekday': (epoch_ns // cls.NS_PER_DAY + 3) % 7,  # 1970-01-01 was a Thursday
+            'month_index': months
+        }
+    
+    @staticmethod
+    def month_label(month_index):
+        """Format a months-since-epoch index as 'YYYY-MM'"""
+        return f"{1970 + month_index // 12:04d}-{month_index % 12 + 1:02d}"
+    
+    def clear(self):
+        self._entries.clear()
+        self._key_locks.clear()
+
+class HeavyHitters:
+    """Top-k counter: exact dict, or Space-Saving plus count-min sketch with fixed memory
+    
+    In approximate mode every reported count overestimates the true count by at most
+    total / capacity (Space-Saving), tightened by the sketch's eps * total bound, which
+    holds with probability 1 - delta. Distinct items are estimated with HyperLogLog
+    registers (about 1.04 / sqrt(2 ** precision) relative error). Items are hashed with
+    blake2b, so estimates and rankings don't change between runs on the same data.
+    """
+    def __init__(self, mode='exact', capacity=1000, eps=0.001, delta=0.01, seed=42, precision=12):
+        if mode not in ('exact', 'approximate'):
+            raise ValueError(f"Unknown top-k mode: {mode}")
+        
+        self.mode = mode
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        
+        if mode == 'approximate':
+            self.errors = {}
+            self._heap = []  # (count, item) entries, refreshed lazily as counts grow
+            self.width = int(math.ceil(math.e / eps))
+            self.depth = int(math.ceil(math.log(1 / delta)))
+            self.sketch = np.zeros((self.depth, self.width), dtype=np.int64)
+            self.key = seed.to_bytes(8, 'big')
+            self.precision = precision
+            self.registers = np.zeros(1 << precision, dtype=np.uint8)
+    
+    def _hashes(self, item):
+        """Three independent 64-bit hashes of an item, stable across processes"""
+        digest = hashlib.blake2b(str(item).encode('utf-8'), digest_size=24, key=self.key).digest()
+        return [int.from_bytes(digest[i:i + 8], 'big') for i in (0, 8, 16)]
+    
+    def _columns(self, h1, h2):
+        """Sketch column per row by double hashing"""
+        return [(h1 + row * h2) % self.width for row in range(self.depth)]
+    
+    def add(self, item, count=1):
+        self.total += count
+        
+        if self.mode == 'exact':
+            self.counts[item] = self.counts.get(item, 0) + count
+            return
+        
+        h1, h2, h3 = self._hashes(item)
+        for row, column in enumerate(self._columns(h1, h2)):
+            self.sketch[row, column] += count
+        
+        # HyperLogLog: the top bits pick a register, which keeps the longest run of leading zeros after them
+        rest_bits = 64 - self.precision
+        register = h3 >> rest_bits
+        rank = rest_bits - (h3 & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+        
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+            heapq.heappush(self._heap, (count, item))
+        else:
+            # Replace the current minimum, inheriting its count as the error bound
+            min_count, min_item = self._pop_min()
+            del self.counts[min_item]
+            del self.errors[min_item]
+            self.counts[item] = min_count + count
+            self.errors[item] = min_count
+            heapq.heappush(self._heap, (self.counts[item], item))
+    
+    def _pop_min(self):
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return count, item
+            if item in self.counts:
+                heapq.heappush(self._heap, (self.counts[item], item))
+    
+    def estimate(self, item):
+        """Upper-bound estimate of an item's count"""
+        if self.mode == 'exact':
+            return self.counts.get(item, 0)
+        
+        h1, h2, _ = self._hashes(item)
+        sketch_count = min(self.sketch[row, column] for row, column in enumerate(self._columns(h1, h2)))
+        return int(min(self.counts.get(item, sketch_count), sketch_count))
+    
+    def top(self, k):
+        """Return the k most frequent items as (item, count) pairs, highest first"""
+        if self.mode == 'exact':
+            return sorted(self.counts.items(), key=lambda x: x[1], reverse=True)[:k]
+        
+        candidates = [(item, self.estimate(item)) for item in self.counts]
+        return sorted(candidates, key=lambda x: x[1], reverse=True)[:k]
+    
+    def distinct(self):
+        """Number of distinct items (HyperLogLog estimate in approximate mode)"""
+        if self.mode == 'exact':
+            return len(self.counts)
+        
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        
+        # Small cardinalities: linear counting over the empty registers is more accurate
+        empty = int((self.registers == 0).sum())
+        if estimate <= 2.5 * m and empty:
+            estimate = m * math.log(m / empty)
+        return int(round(estimate))
+    
+    def error_bound(self):
+        """Maximum overestimate of any reported count"""
+        if self.mode == 'exact':
+            return 0
+        return min(self.total / self.capacity, math.e / self.width * self.total)
+    
+    def bounds(self):
+        """Counting mode and error bound, stored next to the rankings built from this counter"""
+        return {'mode': self.mode, 'error_bound': self.error_bound()}
+
+class EmotionMatcher:
+    """Finds every emotion keyword in a comment with one scan of a trie-compiled pattern"""
+    DEFAULT_LEXICON = {
+        'joy': ['happy', 'great', 'excellent', 'amazing', 'love', 'wonderful', 'fantastic', 'awesome'],
+        'anger': ['angry', 'terrible', 'awful', 'hate', 'worst', 'horrible', 'disgusting', 'furious'],
+        'sadness': ['sad', 'disappointed', 'bad', 'poor', 'unsatisfied', 'depressed', 'upset'],
+        'surprise': ['surprised', 'unexpected', 'wow', 'incredible', 'shocking', 'unbelievable'],
+        'fear': ['worried', 'concerned', 'afraid', 'nervous', 'anxious', 'scared'],
+        'trust': ['reliable', 'trustworthy', 'dependable', 'consistent', 'professional'],
+        'anticipation': ['excited', 'looking forward', 'eager', 'hopeful', 'optimistic']
+    }
+    
+    def __init__(self, lexicon=None):
+        lexicon = lexicon or self.DEFAULT_LEXICON
+        self.emotions = list(lexicon.keys())
+        
+        keyword_emotions = defaultdict(set)
+        for emotion, keywords in lexicon.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword:
+                    keyword_emotions[keyword].add(emotion)
+        
+        trie = self._build_trie(keyword_emotions)
+        
+        # A hit on a keyword also counts every shorter keyword it contains, which keeps
+        # plain substring semantics even though the scan reports one keyword per position.
+        # Contained keywords are the trie matches starting at each offset of the keyword.
+        self.hit_emotions = {}
+        for keyword in keyword_emotions:
+            hit = set()
+            for start in range(len(keyword)):
+                node = trie
+                for char in keyword[start:]:
+                    node = node.get(char)
+                    if node is None:
+                        break
+                    if '' in node:
+                        hit |= keyword_emotions[node['']]
+            self.hit_emotions[keyword] = hit
+        
+        self.pattern = re.compile('(?=(' + self._trie_pattern(trie) + '))') if keyword_emotions else None
+    
+    @classmethod
+    def from_file(cls, path):
+        """Load a {emotion: [keywords]} JSON lexicon"""
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+    
+    @staticmethod
+    def _build_trie(keywords):
+        """Character trie of the keywords; the '' entry of a node holds the keyword ending there"""
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = keyword
+        return trie
+    
+    @staticmethod
+    def _trie_pattern(trie):
+        """Compile the keyword trie into a regex so each position costs O(keyword length)"""
+        def build(node):
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            if '' in node:
+                return '(?:' + body + ')?'  # Greedy, so the longest keyword at a position wins
+            return body
+        
+        return build(trie)
+    
+    def detect(self, text):
+        """Return the set of emotions whose keywords occur in the text"""
+        if self.pattern is None or not text:
+            return set()
+        
+        found = set()
+        for match in self.pattern.finditer(text.lower()):
+            found |= self.hit_emotions[match.group(1)]
+        return found
+
+class LatePlateAnalyticsEngine:
+    # Module name -> method, in run order
+    MODULES = {
+        'descriptive': 'descriptive_analytics',
+        'sentiment': 'sentiment_analysis',
+        'clustering': 'user_clustering',
+        'collaborative_filtering': 'collaborative_filtering',
+        'time_series': 'time_series_analysis',
+        'decision_tree': 'decision_tree_recommendations',
+        'association_rules': 'association_rule_mining',
+        'market_segmentation': 'market_segmentation',
+        'mood_recommendations': 'mood_based_recommendations',
+        'predictive': 'predictive_analytics'
+    }
+    
+    # Fields each module reads per collection (None means the whole document)
+    MODULE_INPUTS = {
+        'descriptive_analytics': {
+            'users': ['preferences'],
+            'location_logs': ['address', 'source', 'accuracy', 'userAgent', 'latitude', 'longitude'],
+            'search_logs': ['user_id', 'type', 'query', 'timestamp']
+        },
+        'sentiment_analysis': {
+            'feedback': ['comment', 'rating', 'timestamp'],
+            'reviews': ['comment', 'rating', 'timestamp', 'cuisine']
+        },
+        'user_clustering': {
+            'users': ['preferences']
+        },
+        'collaborative_filtering': {
+            'search_logs': ['user_id', 'type', 'query'],
+            'feedback': ['userId', 'category', 'rating'],
+            'userActivities': ['userId', 'type', 'action', 'metadata']
+        },
+        'time_series_analysis': {
+            'search_logs': ['type', 'query', 'timestamp', 'cuisine']
+        },
+        'association_rule_mining': {
+            'recipes': ['Ingredients', 'ingredients'],
+            'search_logs': ['user_id', 'type', 'query', 'timestamp']
+        },
+        'market_segmentation': {
+            'users': ['preferences', 'createdAt'],
+            'location_logs': ['user_id', 'address', 'latitude', 'longitude'],
+            'search_logs': ['user_id', 'type', 'query', 'timestamp', 'cuisine']
+        },
+        'predictive_analytics': {
+            'users': ['preferences', 'createdAt'],
+            'search_logs': ['type', 'query', 'timestamp', 'cuisine']
+        }
+    }
+    
+    STOP_WORDS = frozenset({
+        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by',
+        'is', 'was', 'are', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did',
+        'will', 'would', 'could', 'should'
+    })
+    
+    # Implicit-feedback weight of each userActivities action
+    ACTION_WEIGHTS = {'viewed': 1.0, 'searched': 0.5, 'favorited': 3.0, 'saved': 3.0, 'visited': 2.0, 'rated': 2.0}
+    
+    # Web-Mercator zoom levels at which location tile counts are emitted for the map views
+    TILE_ZOOM_LEVELS = (4, 8, 12)
+    
+    DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    
+    # Column order of the user clustering feature matrix
+    CLUSTERING_FEATURES = [
+        'has_diabetes', 'profile_complete', 'num_favorite_cuisines', 'has_allergies',
+        'dietary_preference_score', 'location_searches', 'total_searches', 'avg_search_hour',
+        'search_variety', 'location_variety'
+    ]
+    
+    def __init__(self, fused_scan=False, scan_batch_size=5000, incremental=False, pushdown=False, max_workers=None,
+                 emotion_lexicon_path=None, top_k_mode='exact', top_k_capacity=1000,
+                 index_dir='ann_indexes', mongo_uri="your_key_here", db_name="DB_name",
+                 feature_store_dir='feature_store'):
+        self.mongo_uri = mongo_uri
+        self.db_name = db_name
+        self.client = None
+        self._db = None
+        self._lazy_lock = threading.RLock()
+        self._sentiment_scorer = None
+        self._address_normalizer = None
+        self._user_feature_store = None
+        self._rollup_locks = {}
+        self.feature_store_dir = feature_store_dir
         self.user_profiles = {}
         self.restaurant_data = {}
         self.recipe_data = {}
+        self.snapshot = None
+        self.fused_scan = fused_scan
+        self.scan_batch_size = scan_batch_size
+        self.incremental = incremental
+        self.pushdown = pushdown
+        self.time_features = TimeFeatureCache()
+        self.max_workers = max_workers
+        self.cf_model = None
+        self.index_dir = index_dir
+        self._indexes = {}
+        self._ingredient_vocabulary = None
+        self.top_k_mode = top_k_mode
+        self.top_k_capacity = top_k_capacity
+        self.emotion_lexicon_path = emotion_lexicon_path
+        self._emotion_matcher = None
+    
+    @property
+    def db(self):
+        """MongoDB database, connected on first use"""
+        with self._lazy_lock:
+            if self._db is None:
+                self.client = pymongo.MongoClient(self.mongo_uri)
+                self._db = self.client[self.db_name]
+        return self._db
+    
+    @property
+    def sentiment_scorer(self):
+        with self._lazy_lock:
+            if self._sentiment_scorer is None:
+                from sentiment_scoring import SentimentScorer
+                self._sentiment_scorer = SentimentScorer(self.db.sentiment_cache, max_workers=self.max_workers)
+        return self._sentiment_scorer
+    
+    @property
+    def emotion_matcher(self):
+        """Emotion keyword matcher, compiled on first use so other modules don't pay for it"""
+        with self._lazy_lock:
+            if self._emotion_matcher is None:
+                path = self.emotion_lexicon_path
+                self._emotion_matcher = EmotionMatcher.from_file(path) if path else EmotionMatcher()
+        return self._emotion_matcher
+    
+    @property
+    def address_normalizer(self):
+        with self._lazy_lock:
+            if self._address_normalizer is None:
+                self._address_normalizer = AddressNormalizer(self.db.address_cache)
+        return self._address_normalizer
+    
+    @property
+    def user_feature_store(self):
+        with self._lazy_lock:
+            if self._user_feature_store is None:
+                from user_feature_store import UserFeatureStore
+                self._user_feature_store = UserFeatureStore(
+                    self.db, self.feature_store_dir, self.scan_batch_size, self.address_normalizer
+                )
+        return self._user_feature_store
+    
+    def _user_features(self, users):
+        """Per-user aggregates for these users from the shared feature store, refreshed with new logs first"""
+        store = self.user_feature_store
+        store.refresh()
+        return store.frame([str(user.get('_id')) for user in users])
+    
+    def _load(self, module, collection, query=None):
+        """Load a collection for a module, reusing the run snapshot when one is active"""
+        if self.snapshot is not None:
+            documents = self.snapshot.get(collection)
+            if query:
+                documents = [doc for doc in documents if all(doc.get(k) == v for k, v in query.items())]
+            return documents
+        
+        fields = self.MODULE_INPUTS.get(module, {}).get(collection)
+        projection = {field: 1 for field in fields} if fields is not None else None
+        return list(self.db[collection].find(query or {}, projection))
+    
+    def _iter_collection(self, module, collection):
+        """Stream a collection in batches without materializing it (uses the snapshot when active)"""
+        if self.snapshot is not None:
+            return iter(self.snapshot.get(collection))
+        
+        fields = self.MODULE_INPUTS.get(module, {}).get(collection)
+        projection = {field: 1 for field in fields} if fields is not None else None
+        return self.db[collection].find({}, projection).batch_size(self.scan_batch_size)
         
     def descriptive_analytics(self):
         """Comprehensive descriptive analytics of user behavior"""
@@ -32,19 +514,47 @@ class LatePlateAnalyticsEngine:
             print("🔍 Running Descriptive Analytics...")
             
             # User behavior patterns
-            users = list(self.db.users.find())
-            location_logs = list(self.db.location_logs.find())
-            search_logs = list(self.db.search_logs.find())
+            users = self._load('descriptive_analytics', 'users')
+            if self.incremental:
+                # Only logs past the stored watermark are scanned and merged
+                search_results, location_results = self._incremental_descriptive_scan(users)
+            elif self.pushdown:
+                # Counts and histograms are computed inside MongoDB; only small results come back
+                search_results = self._pushdown_search_analytics(users)
+                location_results = self._fused_location_log_scan(
+                    self._iter_collection('descriptive_analytics', 'location_logs')
+                )
+            elif self.fused_scan:
+                # One batched pass per log collection feeds every accumulator
+                search_results = self._fused_search_log_scan(
+                    self._iter_collection('descriptive_analytics', 'search_logs'), users
+                )
+                location_results = self._fused_location_log_scan(
+                    self._iter_collection('descriptive_analytics', 'location_logs')
+                )
+            else:
+                location_logs = self._load('descriptive_analytics', 'location_logs')
+                search_logs = self._load('descriptive_analytics', 'search_logs')
+                search_results = {
+                    'search_behavior': self._analyze_search_behavior(search_logs),
+                    'temporal_patterns': self._analyze_temporal_patterns(search_logs),
+                    'user_engagement': self._analyze_user_engagement(users, search_logs)
+                }
+                location_results = {
+                    'location_patterns': self._analyze_location_patterns(location_logs),
+                    'device_usage': self._analyze_device_usage(location_logs),
+                    'geographic_distribution': self._analyze_geographic_distribution(location_logs)
+                }
             
             analytics = {
                 'user_demographics': self._analyze_user_demographics(users),
-                'location_patterns': self._analyze_location_patterns(location_logs),
-                'search_behavior': self._analyze_search_behavior(search_logs),
+                'location_patterns': location_results['location_patterns'],
+                'search_behavior': search_results['search_behavior'],
                 'cuisine_preferences': self._analyze_cuisine_preferences(users),
-                'temporal_patterns': self._analyze_temporal_patterns(search_logs),
-                'device_usage': self._analyze_device_usage(location_logs),
-                'geographic_distribution': self._analyze_geographic_distribution(location_logs),
-                'user_engagement': self._analyze_user_engagement(users, search_logs)
+                'temporal_patterns': search_results['temporal_patterns'],
+                'device_usage': location_results['device_usage'],
+                'geographic_distribution': location_results['geographic_distribution'],
+                'user_engagement': search_results['user_engagement']
             }
             
             # Store results
@@ -66,17 +576,21 @@ class LatePlateAnalyticsEngine:
         try:
             print("💭 Running Sentiment Analysis...")
             
-            feedback_data = list(self.db.feedback.find())
-            reviews = list(self.db.reviews.find())
+            feedback_data = self._load('sentiment_analysis', 'feedback')
+            reviews = self._load('sentiment_analysis', 'reviews')
+            
+            all_feedback = feedback_data + reviews
+            keyword_counts = self._count_keywords(all_feedback)
             
             sentiments = {
                 'feedback_sentiment': self._analyze_feedback_sentiment(feedback_data),
                 'review_sentiment': self._analyze_review_sentiment(reviews),
-                'satisfaction_trends': self._analyze_satisfaction_trends(feedback_data + reviews),
-                'emotion_detection': self._detect_emotions(feedback_data + reviews),
-                'keyword_analysis': self._analyze_keywords(feedback_data + reviews),
+                'satisfaction_trends': self._analyze_satisfaction_trends(all_feedback),
+                'emotion_detection': self._detect_emotions(all_feedback),
+                'keyword_analysis': dict(keyword_counts.top(20)),
+                'keyword_bounds': keyword_counts.bounds(),
                 'sentiment_by_cuisine': self._analyze_sentiment_by_cuisine(reviews),
-                'temporal_sentiment': self._analyze_temporal_sentiment(feedback_data + reviews)
+                'temporal_sentiment': self._analyze_temporal_sentiment(all_feedback)
             }
             
             # Store results
@@ -95,43 +609,35 @@ class LatePlateAnalyticsEngine:
     
     def user_clustering(self):
         """K-Means clustering for user segmentation"""
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.cluster import KMeans
+        
         try:
             print("👥 Running User Clustering...")
             
-            users = list(self.db.users.find())
-            location_logs = list(self.db.location_logs.find())
-            search_logs = list(self.db.search_logs.find())
+            users = self._load('user_clustering', 'users')
             
             # Prepare features for clustering
-            features_data = self._prepare_clustering_features(users, location_logs, search_logs)
+            feature_matrix, user_ids = self._prepare_clustering_features(users, self._user_features(users))
             
-            if len(features_data) < 3:
+            if len(user_ids) < 3:
                 print("⚠️ Not enough data for clustering")
                 return None
             
-            # Create feature matrix
-            feature_matrix = []
-            user_ids = []
-            
-            for user_id, features in features_data.items():
-                feature_matrix.append(list(features.values()))
-                user_ids.append(user_id)
-            
-            feature_matrix = np.array(feature_matrix)
-            
             # Normalize features
             scaler = StandardScaler()
             features_scaled = scaler.fit_transform(feature_matrix)
             
-            # Determine optimal number of clusters
-            optimal_k = self._find_optimal_clusters(features_scaled)
+            # Determine optimal number of clusters (and reuse the model fitted while selecting it)
+            optimal_k, kmeans = self._find_optimal_clusters(features_scaled)
             
-            # Perform K-means clustering
-            kmeans = KMeans(n_clusters=optimal_k, random_state=42, n_init=10)
-            clusters = kmeans.fit_predict(features_scaled)
+            # Assign users with the selected model; too few users to select means a plain fit
+            if kmeans is None:
+                kmeans = KMeans(n_clusters=optimal_k, random_state=42, n_init=10).fit(features_scaled)
+            clusters = kmeans.predict(features_scaled)
             
             # Analyze clusters
-            cluster_analysis = self._analyze_clusters(users, clusters, features_data, user_ids)
+            cluster_analysis = self._analyze_clusters(users, clusters, feature_matrix, user_ids)
             
             # Store results
             self.db.analytics_results.update_one(
@@ -165,6 +671,10 @@ class LatePlateAnalyticsEngine:
             # Generate recommendations using matrix factorization
             recommendations = self._generate_collaborative_recommendations(user_item_matrix)
             
+            # Persist ANN indexes so lookups don't need a batch recompute
+            if self.cf_model is not None:
+                recommendations['indexes'] = self._build_recommendation_indexes()
+            
             # Store results
             self.db.analytics_results.update_one(
                 {'type': 'collaborative_filtering'},
@@ -184,18 +694,21 @@ class LatePlateAnalyticsEngine:
         try:
             print("📈 Running Time Series Analysis...")
             
-            search_logs = list(self.db.search_logs.find())
-            location_logs = list(self.db.location_logs.find())
+            search_logs = self._load('time_series_analysis', 'search_logs')
+            
+            # Volume patterns read the small hourly rollups instead of raw logs
+            search_rollup = self._refresh_rollup('search_logs')
+            location_rollup = self._refresh_rollup('location_logs')
             
             # Analyze temporal patterns
             temporal_analysis = {
-                'hourly_patterns': self._analyze_hourly_patterns(search_logs),
-                'daily_patterns': self._analyze_daily_patterns(search_logs),
-                'weekly_patterns': self._analyze_weekly_patterns(search_logs),
-                'seasonal_trends': self._analyze_seasonal_trends(search_logs),
-                'demand_forecasting': self._forecast_demand(search_logs),
-                'peak_time_prediction': self._predict_peak_times(search_logs),
-                'location_time_correlation': self._analyze_location_time_patterns(location_logs),
+                'hourly_patterns': self._analyze_hourly_patterns(search_rollup),
+                'daily_patterns': self._analyze_daily_patterns(search_rollup),
+                'weekly_patterns': self._analyze_weekly_patterns(search_rollup),
+                'seasonal_trends': self._analyze_seasonal_trends(search_rollup),
+                'demand_forecasting': self._forecast_demand(search_rollup),
+                'peak_time_prediction': self._predict_peak_times(search_rollup),
+                'location_time_correlation': self._analyze_location_time_patterns(location_rollup),
                 'cuisine_time_preferences': self._analyze_cuisine_time_preferences(search_logs)
             }
             
@@ -213,8 +726,205 @@ class LatePlateAnalyticsEngine:
             print(f"❌ Error in time series analysis: {e}")
             return None
     
+    def _refresh_rollup(self, collection):
+        """Fold new documents into the collection's hour x type x city rollup and return the table"""
+        from hourly_rollup import HourlyRollup
+        
+        with self._lazy_lock:
+            rollup_lock = self._rollup_locks.setdefault(collection, threading.Lock())
+        
+        # Concurrent modules refresh a shared rollup one at a time, since its journal expects a single writer
+        with rollup_lock:
+            rollup = HourlyRollup(self.db, collection, self.scan_batch_size, self.address_normalizer)
+            rollup.refresh()
+            return rollup.table()
+    
+    def _analyze_hourly_patterns(self, rollup):
+        """Volume per hour of day (UTC), overall and per log type"""
+        if rollup.empty:
+            return {'by_hour': {}, 'by_type': {}, 'peak_hours': []}
+        
+        hours = rollup['hour'].dt.hour
+        by_hour = rollup.groupby(hours)['count'].sum().reindex(range(24), fill_value=0)
+        by_type = rollup.groupby([rollup['type'], hours])['count'].sum()
+        
+        return {
+            'by_hour': {str(hour): int(count) for hour, count in by_hour.items()},
+            'by_type': {
+                log_type: {str(hour): int(count) for hour, count in counts.droplevel(0).items()}
+                for log_type, counts in by_type.groupby(level=0)
+            },
+            'peak_hours': [int(hour) for hour in by_hour.nlargest(3).index]
+        }
+    
+    def _analyze_daily_patterns(self, rollup):
+        """Volume per day of week, plus the average per calendar day"""
+        day_names = self.DAY_NAMES
+        if rollup.empty:
+            return {'by_weekday': {}, 'average_daily_volume': 0, 'busiest_day': None}
+        
+        by_weekday = rollup.groupby(rollup['hour'].dt.dayofweek)['count'].sum().reindex(range(7), fill_value=0)
+        daily_totals = rollup.groupby(rollup['hour'].dt.floor('D'))['count'].sum()
+        
+        return {
+            'by_weekday': {day_names[day]: int(count) for day, count in by_weekday.items()},
+            'average_daily_volume': float(daily_totals.mean()),
+            'busiest_day': day_names[int(by_weekday.idxmax())]
+        }
+    
+    def _analyze_weekly_patterns(self, rollup):
+        """Volume per calendar week (weeks start Monday, UTC), weekend share and week-over-week change"""
+        if rollup.empty:
+            return {'weekly_volume': {}, 'average_weekly_volume': 0, 'weekend_share': 0, 'week_over_week_change': None}
+        
+        hours = rollup['hour'].dt.tz_convert(None)
+        weekly = rollup.groupby(hours.dt.to_period('W-SUN').dt.start_time)['count'].sum().sort_index()
+        weekend = rollup.loc[hours.dt.dayofweek >= 5, 'count'].sum()
+        
+        change = None
+        if len(weekly) > 1 and weekly.iloc[-2] > 0:
+            change = float((weekly.iloc[-1] - weekly.iloc[-2]) / weekly.iloc[-2] * 100)
+        
+        return {
+            'weekly_volume': {week.strftime('%Y-%m-%d'): int(count) for week, count in weekly.items()},
+            'average_weekly_volume': float(weekly.mean()),
+            'weekend_share': float(weekend / rollup['count'].sum() * 100),
+            'week_over_week_change': change
+        }
+    
+    def _analyze_seasonal_trends(self, rollup):
+        """Volume per month, average volume per month of year and the month-over-month trend"""
+        if rollup.empty:
+            return {'monthly_volume': {}, 'month_of_year_average': {}, 'peak_month': None, 'trend': 'stable'}
+        
+        months = rollup['hour'].dt.tz_convert(None).dt.to_period('M')
+        monthly = rollup.groupby(months)['count'].sum().sort_index()
+        month_of_year = monthly.groupby(monthly.index.month).mean()
+        
+        trend = 'stable'
+        if len(monthly) > 1:
+            if monthly.iloc[-1] > monthly.iloc[-2]:
+                trend = 'growing'
+            elif monthly.iloc[-1] < monthly.iloc[-2]:
+                trend = 'declining'
+        
+        return {
+            'monthly_volume': {str(month): int(count) for month, count in monthly.items()},
+            'month_of_year_average': {calendar.month_name[month]: float(count) for month, count in month_of_year.items()},
+            'peak_month': calendar.month_name[int(month_of_year.idxmax())],
+            'trend': trend
+        }
+    
+    def _hour_of_week_rates(self, rollup):
+        """Mean volume per hour-of-week slot (Monday 00:00 UTC = 0) over the rollup's zero-filled span
+        
+        Returns (168 rates with NaN for slots the span never covers, last hour in the rollup).
+        """
+        totals = rollup.groupby('hour')['count'].sum()
+        span = pd.date_range(totals.index.min(), totals.index.max(), freq='h')
+        slots = span.dayofweek * 24 + span.hour
+        
+        volume = np.bincount(slots, weights=totals.reindex(span, fill_value=0).to_numpy(), minlength=168)
+        hours_covered = np.bincount(slots, minlength=168)
+        rates = np.where(hours_covered > 0, volume / np.maximum(hours_covered, 1), np.nan)
+        return rates, span[-1]
+    
+    def _forecast_demand(self, rollup, horizon_hours=24):
+        """Expected volume for the hours after the rollup's last hour, from hour-of-week slot means"""
+        if rollup.empty:
+            return {'next_hours': {}, 'expected_volume': 0, 'history_hours': 0, 'method': 'hour_of_week_mean'}
+        
+        rates, last_hour = self._hour_of_week_rates(rollup)
+        future = pd.date_range(last_hour + pd.Timedelta(hours=1), periods=horizon_hours, freq='h')
+        # Slots the history never covered fall back to the overall hourly mean
+        expected = np.nan_to_num(rates[future.dayofweek * 24 + future.hour], nan=float(np.nanmean(rates)))
+        
+        return {
+            'next_hours': {hour.isoformat(): float(value) for hour, value in zip(future, expected)},
+            'expected_volume': float(expected.sum()),
+            'history_hours': int((last_hour - rollup['hour'].min()) / pd.Timedelta(hours=1)) + 1,
+            'method': 'hour_of_week_mean'
+        }
+    
+    def _predict_peak_times(self, rollup, top_n=5):
+        """Hour-of-week slots with the highest mean volume, and when the next one starts"""
+        if rollup.empty:
+            return {'peak_slots': [], 'next_peak': None}
+        
+        rates, last_hour = self._hour_of_week_rates(rollup)
+        ranked = [int(slot) for slot in np.argsort(-np.nan_to_num(rates, nan=-1), kind='stable')[:top_n] if rates[slot] > 0]
+        
+        week = pd.date_range(last_hour + pd.Timedelta(hours=1), periods=168, freq='h')
+        upcoming = [hour for hour in week if hour.dayofweek * 24 + hour.hour in ranked]
+        
+        return {
+            'peak_slots': [
+                {'day': self.DAY_NAMES[slot // 24], 'hour': slot % 24, 'expected_volume': float(rates[slot])}
+                for slot in ranked
+            ],
+            'next_peak': upcoming[0].isoformat() if upcoming else None
+        }
+    
+    def _analyze_location_time_patterns(self, rollup, top_n=10):
+        """Per city (busiest first): location volume, peak hour (UTC) and hourly distribution"""
+        if rollup.empty:
+            return {}
+        
+        hours = rollup['hour'].dt.hour
+        by_city_hour = rollup.groupby([rollup['city'], hours])['count'].sum()
+        city_totals = by_city_hour.groupby(level=0).sum().sort_values(ascending=False, kind='stable')
+        
+        patterns = {}
+        for city in city_totals.index[:top_n]:
+            by_hour = by_city_hour.loc[city].reindex(range(24), fill_value=0)
+            patterns[city] = {
+                'total': int(city_totals[city]),
+                'peak_hour': int(by_hour.idxmax()),
+                'hourly_distribution': {str(hour): int(count) for hour, count in by_hour.items()}
+            }
+        return patterns
+    
+    @staticmethod
+    def _search_cuisines(search_logs):
+        """Lowercased cuisine per search log ('' when none): its cuisine field, or the query of a 'cuisine' search"""
+        return np.array([
+            str(log.get('cuisine') or (log.get('query') if log.get('type') == 'cuisine' else '') or '').strip().lower()
+            for log in search_logs
+        ], dtype=object)
+    
+    def _analyze_cuisine_time_preferences(self, search_logs, top_n=10):
+        """Per searched cuisine (most searched first): search count, peak hour (UTC) and hourly distribution
+        
+        A log's cuisine is its cuisine field, or the query of a 'cuisine' type search.
+        """
+        if not search_logs:
+            return {}
+        
+        times = self.time_features.get(search_logs)
+        cuisines = self._search_cuisines(search_logs)
+        mask = times['valid'] & (cuisines != '')
+        if not mask.any():
+            return {}
+        
+        names, positions = np.unique(cuisines[mask].astype(str), return_inverse=True)
+        counts = np.zeros((len(names), 24), dtype=np.int64)
+        np.add.at(counts, (positions, times['hour'][mask]), 1)
+        totals = counts.sum(axis=1)
+        
+        return {
+            str(names[i]): {
+                'searches': int(totals[i]),
+                'peak_hour': int(counts[i].argmax()),
+                'hourly_distribution': {str(hour): int(count) for hour, count in enumerate(counts[i])}
+            }
+            for i in np.argsort(-totals, kind='stable')[:top_n]
+        }
+    
     def decision_tree_recommendations(self):
         """Decision tree for fallback recommendations"""
+        from sklearn.tree import DecisionTreeClassifier
+        from sklearn.model_selection import train_test_split
+        
         try:
             print("🌳 Running Decision Tree Analysis...")
             
@@ -279,12 +989,15 @@ class LatePlateAnalyticsEngine:
         try:
             print("🔗 Running Association Rule Mining...")
             
-            recipes = list(self.db.recipes.find())
-            user_searches = list(self.db.search_logs.find({'type': 'recipe'}))
+            recipes = self._load('association_rule_mining', 'recipes')
+            user_searches = self._load('association_rule_mining', 'search_logs', {'type': 'recipe'})
             
             # Extract ingredient associations
             associations = self._mine_ingredient_associations(recipes, user_searches)
             
+            # Refresh the ingredient -> recipe index used by recipes_with_ingredients
+            self._build_ingredient_index(recipes)
+            
             # Store results
             self.db.analytics_results.update_one(
                 {'type': 'association_rules'},
@@ -304,9 +1017,9 @@ class LatePlateAnalyticsEngine:
         try:
             print("🎯 Running Market Segmentation...")
             
-            users = list(self.db.users.find())
-            location_logs = list(self.db.location_logs.find())
-            search_logs = list(self.db.search_logs.find())
+            users = self._load('market_segmentation', 'users')
+            location_logs = self._load('market_segmentation', 'location_logs')
+            search_logs = self._load('market_segmentation', 'search_logs')
             
             segments = {
                 'demographic_segments': self._segment_by_demographics(users),
@@ -362,17 +1075,21 @@ class LatePlateAnalyticsEngine:
         try:
             print("🔮 Running Predictive Analytics...")
             
-            users = list(self.db.users.find())
-            search_logs = list(self.db.search_logs.find())
-            location_logs = list(self.db.location_logs.find())
+            users = self._load('predictive_analytics', 'users')
+            search_logs = self._load('predictive_analytics', 'search_logs')
+            user_features = self._user_features(users)
+            
+            # Volume predictions read the hourly rollups instead of raw logs
+            search_rollup = self._refresh_rollup('search_logs')
+            location_rollup = self._refresh_rollup('location_logs')
             
             predictions = {
-                'churn_prediction': self._predict_user_churn(users, search_logs),
-                'demand_prediction': self._predict_demand_spikes(search_logs),
+                'churn_prediction': self._predict_user_churn(user_features),
+                'demand_prediction': self._predict_demand_spikes(search_rollup),
                 'cuisine_trend_prediction': self._predict_cuisine_trends(search_logs),
-                'location_preference_prediction': self._predict_location_preferences(location_logs),
-                'seasonal_behavior_prediction': self._predict_seasonal_behavior(search_logs),
-                'user_lifetime_value': self._predict_user_lifetime_value(users, search_logs)
+                'location_preference_prediction': self._predict_location_preferences(location_rollup),
+                'seasonal_behavior_prediction': self._predict_seasonal_behavior(search_rollup),
+                'user_lifetime_value': self._predict_user_lifetime_value(user_features)
             }
             
             # Store results
@@ -389,6 +1106,171 @@ class LatePlateAnalyticsEngine:
             print(f"❌ Error in predictive analytics: {e}")
             return None
     
+    def _days_since_last_seen(self, user_features):
+        """Days between each user's last log and the newest log seen by any user"""
+        last_seen = user_features['last_seen']
+        return (last_seen.max() - last_seen).dt.total_seconds() / 86400
+    
+    def _predict_user_churn(self, user_features, at_risk_days=7, churned_days=30):
+        """Recency-based churn buckets from the feature store's last-seen timestamps"""
+        idle_days = self._days_since_last_seen(user_features)
+        buckets = pd.cut(idle_days, [-np.inf, at_risk_days, churned_days, np.inf], labels=['active', 'at_risk', 'churned'])
+        counts = buckets.value_counts()
+        seen = int(idle_days.notna().sum())
+        
+        return {
+            'active': int(counts.get('active', 0)),
+            'at_risk': int(counts.get('at_risk', 0)),
+            'churned': int(counts.get('churned', 0)),
+            'never_active': int(len(user_features) - seen),
+            'churn_rate': float(counts.get('churned', 0) / seen) if seen else 0.0,
+            'thresholds_days': {'at_risk': at_risk_days, 'churned': churned_days}
+        }
+    
+    def _predict_demand_spikes(self, rollup, horizon_hours=168, spread=2.0):
+        """Upcoming hours whose hour-of-week mean volume is more than `spread` standard deviations above the average slot"""
+        if rollup.empty:
+            return {'baseline_hourly_volume': 0, 'spike_threshold': None, 'predicted_spikes': [], 'method': 'hour_of_week_mean'}
+        
+        rates, last_hour = self._hour_of_week_rates(rollup)
+        baseline = float(np.nanmean(rates))
+        threshold = baseline + spread * float(np.nanstd(rates))
+        
+        future = pd.date_range(last_hour + pd.Timedelta(hours=1), periods=horizon_hours, freq='h')
+        expected = rates[future.dayofweek * 24 + future.hour]
+        
+        return {
+            'baseline_hourly_volume': baseline,
+            'spike_threshold': threshold,
+            'predicted_spikes': [
+                {'hour': hour.isoformat(), 'expected_volume': float(volume)}
+                for hour, volume in zip(future, expected) if volume > threshold
+            ],
+            'method': 'hour_of_week_mean'
+        }
+    
+    def _share_trends(self, recent, previous, top_n, min_change):
+        """Share of volume per name in the latest window against the window before it
+        
+        recent and previous are count Series indexed by name. Names whose share moved by at
+        least min_change percentage points are reported as rising or declining.
+        """
+        recent_share = recent / recent.sum() * 100
+        previous_share = previous / previous.sum() * 100 if previous.sum() else previous.astype(float)
+        
+        shares = {}
+        for name in recent_share.sort_values(ascending=False, kind='stable').index[:top_n]:
+            change = float(recent_share[name] - previous_share.get(name, 0)) if len(previous_share) else None
+            shares[name] = {
+                'recent_share': float(recent_share[name]),
+                'previous_share': float(previous_share.get(name, 0)) if len(previous_share) else None,
+                'change_points': change,
+                'trend': 'stable' if change is None or abs(change) < min_change else 'rising' if change > 0 else 'declining'
+            }
+        
+        return {
+            'shares': shares,
+            'rising': [name for name, stats in shares.items() if stats['trend'] == 'rising'],
+            'declining': [name for name, stats in shares.items() if stats['trend'] == 'declining']
+        }
+    
+    def _predict_location_preferences(self, rollup, window_days=28, top_n=10, min_change=1.0):
+        """City shares of location volume in the latest window against the window before it"""
+        located = rollup[rollup['city'] != 'Unknown']
+        if located.empty:
+            return {'window_days': window_days, 'cities': {}, 'rising': [], 'declining': []}
+        
+        window = pd.Timedelta(days=window_days)
+        end = located['hour'].max()
+        recent = located[located['hour'] > end - window].groupby('city')['count'].sum()
+        previous = located[(located['hour'] > end - 2 * window) & (located['hour'] <= end - window)].groupby('city')['count'].sum()
+        trends = self._share_trends(recent, previous, top_n, min_change)
+        
+        return {'window_days': window_days, 'cities': trends['shares'], 'rising': trends['rising'], 'declining': trends['declining']}
+    
+    def _predict_cuisine_trends(self, search_logs, window_days=28, top_n=10, min_change=1.0):
+        """Searched-cuisine shares in the latest window against the window before it"""
+        empty = {'window_days': window_days, 'cuisines': {}, 'rising': [], 'declining': []}
+        if not search_logs:
+            return empty
+        
+        times = self.time_features.get(search_logs)
+        cuisines = self._search_cuisines(search_logs)
+        mask = times['valid'] & (cuisines != '')
+        if not mask.any():
+            return empty
+        
+        epoch_ns = times['epoch_ns'][mask]
+        names = pd.Series(cuisines[mask].astype(str))
+        window = window_days * 24 * TimeFeatureCache.NS_PER_HOUR
+        end = epoch_ns.max()
+        
+        recent = names[epoch_ns > end - window].value_counts()
+        previous = names[(epoch_ns > end - 2 * window) & (epoch_ns <= end - window)].value_counts()
+        trends = self._share_trends(recent, previous, top_n, min_change)
+        
+        return {'window_days': window_days, 'cuisines': trends['shares'], 'rising': trends['rising'], 'declining': trends['declining']}
+    
+    def _predict_seasonal_behavior(self, rollup):
+        """Expected volume and search-type mix for the month after the rollup's last hour
+        
+        Uses the same calendar month of earlier years when the history has it, else the mean
+        of the completed months. The month in progress is never used as a basis.
+        """
+        if rollup.empty:
+            return {'next_month': None, 'expected_volume': 0, 'expected_type_mix': {}, 'basis': None}
+        
+        months = rollup['hour'].dt.tz_convert(None).dt.to_period('M')
+        current = months.max()
+        next_month = current + 1
+        completed = rollup[months < current]
+        completed_months = months[months < current]
+        
+        same_month = completed_months.dt.month == next_month.month
+        if same_month.any():
+            basis = 'same_month_previous_years'
+            history = completed[same_month]
+            expected_volume = history.groupby(completed_months[same_month])['count'].sum().mean()
+        elif not completed.empty:
+            basis = 'completed_month_mean'
+            history = completed
+            expected_volume = history.groupby(completed_months)['count'].sum().mean()
+        else:
+            basis = 'current_month'
+            history = rollup
+            expected_volume = rollup['count'].sum()
+        
+        type_counts = history.groupby('type')['count'].sum().sort_values(ascending=False, kind='stable')
+        
+        return {
+            'next_month': str(next_month),
+            'expected_volume': float(expected_volume),
+            'expected_type_mix': {
+                log_type: float(count / type_counts.sum() * 100) for log_type, count in type_counts.items()
+            },
+            'basis': basis
+        }
+    
+    def _predict_user_lifetime_value(self, user_features, horizon_weeks=52):
+        """Projected interactions over the horizon: weekly interaction rate discounted by recency"""
+        interactions = user_features[['search_count', 'location_count', 'activity_count']].fillna(0).sum(axis=1)
+        tenure_weeks = ((user_features['last_seen'] - user_features['first_seen']).dt.total_seconds() / (7 * 86400)).fillna(0)
+        weekly_rate = interactions / np.maximum(tenure_weeks, 1)
+        
+        idle_days = self._days_since_last_seen(user_features)
+        retention = np.select([idle_days <= 7, idle_days <= 30], [1.0, 0.5], default=0.1)
+        value = weekly_rate * horizon_weeks * retention
+        
+        return {
+            'horizon_weeks': horizon_weeks,
+            'mean_projected_interactions': float(value.mean()) if len(value) else 0.0,
+            'median_projected_interactions': float(value.median()) if len(value) else 0.0,
+            'top_users': [
+                {'user_id': user_id, 'projected_interactions': float(score)}
+                for user_id, score in value.nlargest(10).items()
+            ]
+        }
+    
     # Helper methods implementation
     def _analyze_user_demographics(self, users):
         """Analyze user demographic patterns"""
@@ -442,19 +1324,14 @@ class LatePlateAnalyticsEngine:
         if not location_logs:
             return {'total_locations': 0, 'top_cities': [], 'location_sources': {}, 'accuracy_distribution': {}}
         
-        city_counts = {}
+        city_counts = self._new_top_k()
         source_counts = {'geolocation': 0, 'manual': 0}
         accuracy_counts = {'high': 0, 'medium': 0, 'low': 0}
         
-        for log in location_logs:
-            # Extract city from address
-            address = log.get('address', '')
-            if ',' in address:
-                city = address.split(',')[-2].strip() if len(address.split(',')) > 1 else 'Unknown'
-            else:
-                city = 'Unknown'
-            
-            city_counts[city] = city_counts.get(city, 0) + 1
+        addresses = self.address_normalizer.normalize_many([log.get('address', '') for log in location_logs])
+        
+        for log, address in zip(location_logs, addresses):
+            city_counts.add(address['city'])
             
             # Source analysis
             source = log.get('source', 'unknown')
@@ -466,12 +1343,13 @@ class LatePlateAnalyticsEngine:
             if accuracy in accuracy_counts:
                 accuracy_counts[accuracy] += 1
         
-        top_cities = sorted(city_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        top_cities = city_counts.top(10)
         
         return {
             'total_locations': len(location_logs),
-            'unique_cities': len(city_counts),
+            'unique_cities': city_counts.distinct(),
             'top_cities': top_cities,
+            'top_cities_bounds': city_counts.bounds(),
             'location_sources': source_counts,
             'accuracy_distribution': accuracy_counts
         }
@@ -482,8 +1360,7 @@ class LatePlateAnalyticsEngine:
             return {'total_searches': 0, 'search_types': {}, 'popular_queries': [], 'search_frequency': {}}
         
         search_types = {}
-        query_counts = {}
-        hourly_searches = {str(i): 0 for i in range(24)}
+        query_counts = self._new_top_k()
         
         for log in search_logs:
             search_type = log.get('type', 'unknown')
@@ -491,22 +1368,20 @@ class LatePlateAnalyticsEngine:
             
             query = log.get('query', '').lower()
             if query:
-                query_counts[query] = query_counts.get(query, 0) + 1
-            
-            # Hourly distribution
-            timestamp = log.get('timestamp')
-            if timestamp:
-                if isinstance(timestamp, str):
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                hour = str(timestamp.hour)
-                hourly_searches[hour] += 1
+                query_counts.add(query)
         
-        popular_queries = sorted(query_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        # Hourly distribution from the shared decoded timestamps
+        times = self.time_features.get(search_logs)
+        hour_counts = np.bincount(times['hour'][times['valid']], minlength=24)
+        hourly_searches = {str(i): int(hour_counts[i]) for i in range(24)}
+        
+        popular_queries = query_counts.top(10)
         
         return {
             'total_searches': len(search_logs),
             'search_types': search_types,
             'popular_queries': popular_queries,
+            'popular_queries_bounds': query_counts.bounds(),
             'hourly_distribution': hourly_searches
         }
     
@@ -535,23 +1410,19 @@ class LatePlateAnalyticsEngine:
         if not search_logs:
             return {'hourly_distribution': {}, 'daily_distribution': {}, 'monthly_trends': {}}
         
-        hourly_counts = {str(i): 0 for i in range(24)}
-        daily_counts = {str(i): 0 for i in range(7)}
-        monthly_counts = {}
+        times = self.time_features.get(search_logs)
+        valid = times['valid']
         
-        for log in search_logs:
-            timestamp = log.get('timestamp')
-            if timestamp:
-                if isinstance(timestamp, str):
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                
-                hour = str(timestamp.hour)
-                day = str(timestamp.weekday())
-                month = timestamp.strftime('%Y-%m')
-                
-                hourly_counts[hour] += 1
-                daily_counts[day] += 1
-                monthly_counts[month] = monthly_counts.get(month, 0) + 1
+        hour_counts = np.bincount(times['hour'][valid], minlength=24)
+        day_counts = np.bincount(times['weekday'][valid], minlength=7)
+        months, month_counts = np.unique(times['month_index'][valid], return_counts=True)
+        
+        hourly_counts = {str(i): int(hour_counts[i]) for i in range(24)}
+        daily_counts = {str(i): int(day_counts[i]) for i in range(7)}
+        monthly_counts = {
+            TimeFeatureCache.month_label(int(month)): int(count)
+            for month, count in zip(months, month_counts)
+        }
         
         return {
             'hourly_distribution': hourly_counts,
@@ -580,38 +1451,62 @@ class LatePlateAnalyticsEngine:
     def _analyze_geographic_distribution(self, location_logs):
         """Analyze geographic distribution of users"""
         if not location_logs:
-            return {'countries': {}, 'regions': {}, 'coordinates': []}
+            return {'countries': {}, 'regions': {}, 'tiles': {}}
         
         countries = {}
         regions = {}
-        coordinates = []
         
-        for log in location_logs:
-            # Extract country and region info
-            address = log.get('address', '')
-            lat = log.get('latitude', 0)
-            lng = log.get('longitude', 0)
-            
-            if lat and lng:
-                coordinates.append({'lat': lat, 'lng': lng})
-            
-            # Simple country detection based on address
-            if 'india' in address.lower():
-                countries['India'] = countries.get('India', 0) + 1
-                # Extract state/region for India
-                parts = address.split(',')
-                if len(parts) > 1:
-                    region = parts[-2].strip()
-                    regions[region] = regions.get(region, 0) + 1
-            else:
-                countries['Other'] = countries.get('Other', 0) + 1
+        # Bin every located log into map tiles in one vectorized step
+        lat = np.array([log.get('latitude', 0) or 0 for log in location_logs], dtype=float)
+        lng = np.array([log.get('longitude', 0) or 0 for log in location_logs], dtype=float)
+        tile_counts = self._tile_counts(lat, lng)
+        
+        # Country and region come from the shared, cached address parser
+        for address in self.address_normalizer.normalize_many([log.get('address', '') for log in location_logs]):
+            countries[address['country']] = countries.get(address['country'], 0) + 1
+            if address['region']:
+                regions[address['region']] = regions.get(address['region'], 0) + 1
         
         return {
             'countries': countries,
             'regions': regions,
-            'coordinates': coordinates[:100]  # Limit for performance
+            'tiles': self._format_tiles(tile_counts)
         }
     
+    def _tile_counts(self, lat, lng):
+        """Count points per Web-Mercator z/x/y tile at every zoom level ('z/x/y' -> count)"""
+        located = np.isfinite(lat) & np.isfinite(lng) & (lat != 0) & (lng != 0)
+        lat = np.clip(lat[located], -85.05112878, 85.05112878)
+        lng = lng[located]
+        if len(lat) == 0:
+            return {}
+        
+        lat_rad = np.radians(lat)
+        x_unit = (lng + 180.0) / 360.0
+        y_unit = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0
+        
+        tile_counts = {}
+        for zoom in self.TILE_ZOOM_LEVELS:
+            n = 2 ** zoom
+            x = np.clip((x_unit * n).astype(np.int64), 0, n - 1)
+            y = np.clip((y_unit * n).astype(np.int64), 0, n - 1)
+            keys, counts = np.unique(x * n + y, return_counts=True)
+            for key, count in zip(keys, counts):
+                tile_counts[f"{zoom}/{key // n}/{key % n}"] = int(count)
+        
+        return tile_counts
+    
+    def _format_tiles(self, tile_counts):
+        """Group 'z/x/y' counts by zoom level, densest tiles first"""
+        tiles = {str(zoom): [] for zoom in self.TILE_ZOOM_LEVELS}
+        for key, count in tile_counts.items():
+            zoom, x, y = key.split('/')
+            tiles.setdefault(zoom, []).append({'x': int(x), 'y': int(y), 'count': count})
+        
+        for zoom_tiles in tiles.values():
+            zoom_tiles.sort(key=lambda tile: tile['count'], reverse=True)
+        return tiles
+    
     def _analyze_user_engagement(self, users, search_logs):
         """Analyze user engagement patterns"""
         user_activity = {}
@@ -621,6 +1516,10 @@ class LatePlateAnalyticsEngine:
             user_id = str(log.get('user_id', 'anonymous'))
             user_activity[user_id] = user_activity.get(user_id, 0) + 1
         
+        return self._summarize_user_engagement(users, user_activity)
+    
+    def _summarize_user_engagement(self, users, user_activity):
+        """Bucket users into engagement tiers from their per-user search counts"""
         # Categorize users by engagement level
         engagement_levels = {'high': 0, 'medium': 0, 'low': 0, 'inactive': 0}
         
@@ -643,27 +1542,404 @@ class LatePlateAnalyticsEngine:
             'total_active_users': len([u for u in user_activity.values() if u > 0])
         }
     
+    def _fused_search_log_scan(self, search_logs, users):
+        """Single pass over search logs producing search behavior, temporal patterns and engagement"""
+        state = self._new_search_state()
+        self._accumulate_search_logs(state, search_logs)
+        return self._finalize_search_state(state, users)
+    
+    def _fused_location_log_scan(self, location_logs):
+        """Single pass over location logs producing location patterns, device usage and geography"""
+        state = self._new_location_state()
+        self._accumulate_location_logs(state, location_logs)
+        return self._finalize_location_state(state)
+    
+    def _new_search_state(self, exact=False):
+        """Empty accumulators for search log analytics
+        
+        Query rankings follow top_k_mode unless exact=True (incremental counters must merge).
+        """
+        return {
+            'total': 0,
+            'search_types': {},
+            'query_counts': HeavyHitters() if exact else self._new_top_k(),
+            'hourly': {str(i): 0 for i in range(24)},
+            'daily': {str(i): 0 for i in range(7)},
+            'monthly': {},
+            'user_activity': {}
+        }
+    
+    def _accumulate_search_logs(self, state, search_logs):
+        """Fold search logs into the accumulators"""
+        for batch in self._batches(search_logs):
+            state['total'] += len(batch)
+            
+            for log in batch:
+                search_type = log.get('type', 'unknown')
+                state['search_types'][search_type] = state['search_types'].get(search_type, 0) + 1
+                
+                query = log.get('query', '').lower()
+                if query:
+                    state['query_counts'].add(query)
+                
+                user_id = str(log.get('user_id', 'anonymous'))
+                state['user_activity'][user_id] = state['user_activity'].get(user_id, 0) + 1
+            
+            # Decoded like the list-based helpers, so every path bins hours in UTC
+            times = TimeFeatureCache.decode([log.get('timestamp') for log in batch])
+            valid = times['valid']
+            for hour, count in zip(*np.unique(times['hour'][valid], return_counts=True)):
+                state['hourly'][str(hour)] += int(count)
+            for day, count in zip(*np.unique(times['weekday'][valid], return_counts=True)):
+                state['daily'][str(day)] += int(count)
+            for month_index, count in zip(*np.unique(times['month_index'][valid], return_counts=True)):
+                month = TimeFeatureCache.month_label(int(month_index))
+                state['monthly'][month] = state['monthly'].get(month, 0) + int(count)
+    
+    def _batches(self, documents):
+        """Group a document stream into lists of scan_batch_size"""
+        batch = []
+        for doc in documents:
+            batch.append(doc)
+            if len(batch) == self.scan_batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def _finalize_search_state(self, state, users):
+        """Turn search accumulators into the descriptive analytics result shapes"""
+        if state['total']:
+            search_behavior = {
+                'total_searches': state['total'],
+                'search_types': dict(state['search_types']),
+                'popular_queries': state['query_counts'].top(10),
+                'popular_queries_bounds': state['query_counts'].bounds(),
+                'hourly_distribution': dict(state['hourly'])
+            }
+            temporal_patterns = {
+                'hourly_distribution': dict(state['hourly']),
+                'daily_distribution': dict(state['daily']),
+                'monthly_trends': dict(state['monthly'])
+            }
+        else:
+            search_behavior = {'total_searches': 0, 'search_types': {}, 'popular_queries': [], 'search_frequency': {}}
+            temporal_patterns = {'hourly_distribution': {}, 'daily_distribution': {}, 'monthly_trends': {}}
+        
+        return {
+            'search_behavior': search_behavior,
+            'temporal_patterns': temporal_patterns,
+            'user_engagement': self._summarize_user_engagement(users, state['user_activity'])
+        }
+    
+    def _new_location_state(self, exact=False):
+        """Empty accumulators for location log analytics
+        
+        City rankings follow top_k_mode unless exact=True (incremental counters must merge).
+        """
+        return {
+            'total': 0,
+            'city_counts': HeavyHitters() if exact else self._new_top_k(),
+            'source_counts': {'geolocation': 0, 'manual': 0},
+            'accuracy_counts': {'high': 0, 'medium': 0, 'low': 0},
+            'device_counts': {'mobile': 0, 'desktop': 0, 'unknown': 0},
+            'countries': {},
+            'regions': {},
+            'tile_counts': {}
+        }
+    
+    def _accumulate_location_logs(self, state, location_logs):
+        """Fold location logs into the accumulators"""
+        for batch in self._batches(location_logs):
+            state['total'] += len(batch)
+            
+            # One normalizer lookup and one vectorized tiling per batch keep memory and round trips bounded
+            addresses = self.address_normalizer.normalize_many([log.get('address', '') for log in batch])
+            self._merge_tile_counts(
+                state,
+                [log.get('latitude', 0) or 0 for log in batch],
+                [log.get('longitude', 0) or 0 for log in batch]
+            )
+            
+            for log, address in zip(batch, addresses):
+                state['city_counts'].add(address['city'])
+                
+                source = log.get('source', 'unknown')
+                if source in state['source_counts']:
+                    state['source_counts'][source] += 1
+                
+                accuracy = log.get('accuracy', 'unknown')
+                if accuracy in state['accuracy_counts']:
+                    state['accuracy_counts'][accuracy] += 1
+                
+                user_agent = log.get('userAgent', '').lower()
+                if 'mobile' in user_agent or 'android' in user_agent or 'iphone' in user_agent:
+                    state['device_counts']['mobile'] += 1
+                elif 'desktop' in user_agent or 'windows' in user_agent or 'macintosh' in user_agent:
+                    state['device_counts']['desktop'] += 1
+                else:
+                    state['device_counts']['unknown'] += 1
+                
+                country = address['country']
+                state['countries'][country] = state['countries'].get(country, 0) + 1
+                if address['region']:
+                    state['regions'][address['region']] = state['regions'].get(address['region'], 0) + 1
+    
+    def _merge_tile_counts(self, state, lat_buffer, lng_buffer):
+        """Add a batch of coordinates to the running tile counts"""
+        if not lat_buffer:
+            return
+        
+        batch_counts = self._tile_counts(np.array(lat_buffer, dtype=float), np.array(lng_buffer, dtype=float))
+        for key, count in batch_counts.items():
+            state['tile_counts'][key] = state['tile_counts'].get(key, 0) + count
+    
+    def _finalize_location_state(self, state):
+        """Turn location accumulators into the descriptive analytics result shapes"""
+        if not state['total']:
+            return {
+                'location_patterns': {'total_locations': 0, 'top_cities': [], 'location_sources': {}, 'accuracy_distribution': {}},
+                'device_usage': {'mobile': 0, 'desktop': 0, 'unknown': 0},
+                'geographic_distribution': {'countries': {}, 'regions': {}, 'tiles': {}}
+            }
+        
+        return {
+            'location_patterns': {
+                'total_locations': state['total'],
+                'unique_cities': state['city_counts'].distinct(),
+                'top_cities': state['city_counts'].top(10),
+                'top_cities_bounds': state['city_counts'].bounds(),
+                'location_sources': dict(state['source_counts']),
+                'accuracy_distribution': dict(state['accuracy_counts'])
+            },
+            'device_usage': dict(state['device_counts']),
+            'geographic_distribution': {
+                'countries': dict(state['countries']),
+                'regions': dict(state['regions']),
+                'tiles': self._format_tiles(state['tile_counts'])
+            }
+        }
+    
+    def _pushdown_search_analytics(self, users):
+        """Compute search behavior, temporal patterns and engagement tiers with aggregation pipelines
+        
+        Results match _finalize_search_state; timestamps are bucketed in UTC, which is what the
+        Python path yields for the Date objects and 'Z'-suffixed strings the app writes.
+        """
+        # Malformed or missing timestamps become null and are skipped, like the Python path's coerced values
+        timestamp_date = {'$convert': {'input': '$timestamp', 'to': 'date', 'onError': None, 'onNull': None}}
+        user_key = {
+            '$cond': [{'$eq': [{'$type': '$user_id'}, 'missing']}, 'anonymous', {'$toString': '$user_id'}]
+        }
+        
+        facets = list(self.db.search_logs.aggregate([
+            {'$facet': {
+                'total': [{'$count': 'count'}],
+                'search_types': [
+                    {'$group': {
+                        '_id': {'$cond': [{'$eq': [{'$type': '$type'}, 'missing']}, 'unknown', '$type']},
+                        'count': {'$sum': 1}
+                    }}
+                ],
+                # Grouped on the raw query; case is folded in Python, since $toLower only folds ASCII
+                'query_counts': [
+                    {'$match': {'query': {'$nin': [None, '']}}},
+                    {'$group': {'_id': '$query', 'count': {'$sum': 1}, 'first_seen': {'$min': '$_id'}}}
+                ],
+                'time_buckets': [
+                    {'$project': {'date': timestamp_date}},
+                    {'$match': {'date': {'$ne': None}}},
+                    {'$project': {
+                        'parts': {'$dateToParts': {'date': '$date'}},
+                        'weekday': {'$subtract': [{'$isoDayOfWeek': '$date'}, 1]}
+                    }},
+                    {'$group': {
+                        '_id': {
+                            'year': '$parts.year',
+                            'month': '$parts.month',
+                            'hour': '$parts.hour',
+                            'weekday': '$weekday'
+                        },
+                        'count': {'$sum': 1}
+                    }}
+                ],
+                'user_activity': [
+                    {'$group': {'_id': user_key, 'count': {'$sum': 1}}},
+                    {'$group': {'_id': None, 'active_users': {'$sum': 1}, 'searches': {'$sum': '$count'}}}
+                ]
+            }}
+        ], allowDiskUse=True))[0]
+        
+        total = facets['total'][0]['count'] if facets['total'] else 0
+        
+        if total:
+            hourly_counts = {str(i): 0 for i in range(24)}
+            daily_counts = {str(i): 0 for i in range(7)}
+            monthly_counts = {}
+            
+            for bucket in facets['time_buckets']:
+                key = bucket['_id']
+                month = f"{key['year']:04d}-{key['month']:02d}"
+                hourly_counts[str(key['hour'])] += bucket['count']
+                daily_counts[str(key['weekday'])] += bucket['count']
+                monthly_counts[month] = monthly_counts.get(month, 0) + bucket['count']
+            
+            search_behavior = {
+                'total_searches': total,
+                'search_types': {bucket['_id']: bucket['count'] for bucket in facets['search_types']},
+                'popular_queries': self._fold_query_counts(facets['query_counts'])[:10],
+                'popular_queries_bounds': {'mode': 'exact', 'error_bound': 0},
+                'hourly_distribution': dict(hourly_counts)
+            }
+            temporal_patterns = {
+                'hourly_distribution': hourly_counts,
+                'daily_distribution': daily_counts,
+                'monthly_trends': monthly_counts
+            }
+        else:
+            search_behavior = {'total_searches': 0, 'search_types': {}, 'popular_queries': [], 'search_frequency': {}}
+            temporal_patterns = {'hourly_distribution': {}, 'daily_distribution': {}, 'monthly_trends': {}}
+        
+        return {
+            'search_behavior': search_behavior,
+            'temporal_patterns': temporal_patterns,
+            'user_engagement': self._pushdown_user_engagement(users, facets['user_activity'])
+        }
+    
+    @staticmethod
+    def _fold_query_counts(rows):
+        """Merge raw-query count rows by lowercased query, most searched first (ties: first searched)"""
+        folded = {}
+        for row in rows:
+            query = row['_id'].lower()
+            count, first_seen = folded.get(query, (0, row['first_seen']))
+            folded[query] = (count + row['count'], min(first_seen, row['first_seen']))
+        
+        ranked = sorted(folded.items(), key=lambda item: (-item[1][0], item[1][1]))
+        return [(query, count) for query, (count, _) in ranked]
+    
+    def _pushdown_user_engagement(self, users, activity_summary):
+        """Bucket registered users into engagement tiers inside MongoDB"""
+        tier_rows = list(self.db.search_logs.aggregate([
+            {'$group': {'_id': {'$toString': '$user_id'}, 'count': {'$sum': 1}}},
+            {'$addFields': {'user_oid': {'$convert': {'input': '$_id', 'to': 'objectId', 'onError': None, 'onNull': None}}}},
+            {'$lookup': {'from': 'users', 'localField': 'user_oid', 'foreignField': '_id', 'as': 'user'}},
+            {'$match': {'user': {'$ne': []}}},
+            {'$bucket': {
+                'groupBy': '$count',
+                'boundaries': [1, 10, 20],
+                'default': 'high',
+                'output': {'users': {'$sum': 1}}
+            }}
+        ], allowDiskUse=True))
+        
+        tiers = {row['_id']: row['users'] for row in tier_rows}
+        engagement_levels = {
+            'high': tiers.get('high', 0),
+            'medium': tiers.get(10, 0),
+            'low': tiers.get(1, 0),
+            'inactive': 0
+        }
+        engagement_levels['inactive'] = len(users) - engagement_levels['high'] - engagement_levels['medium'] - engagement_levels['low']
+        
+        summary = activity_summary[0] if activity_summary else {'active_users': 0, 'searches': 0}
+        
+        return {
+            'engagement_distribution': engagement_levels,
+            'average_searches_per_user': summary['searches'] / summary['active_users'] if summary['active_users'] else 0,
+            'total_active_users': summary['active_users']
+        }
+    
+    def _incremental_descriptive_scan(self, users):
+        """Fold logs past the stored watermarks into the descriptive counters and finalize from them
+        
+        Counters are kept one per document in descriptive_counters, so per-user and per-query
+        state never has to fit in one document. Both collections' increments and their new
+        watermarks are committed as one journaled batch, so a run that fails at any point is
+        retried without counting its logs twice.
+        """
+        journal = IncrementJournal(self.db, 'descriptive_counters', 'analytics_results', {'type': 'descriptive'})
+        journal.recover()
+        
+        stored = self.db.analytics_results.find_one({'type': 'descriptive'}, {'watermarks': 1}) or {}
+        watermarks = {}
+        increments = {}
+        
+        for collection, new_state, accumulate in (
+            ('search_logs', self._new_search_state, self._accumulate_search_logs),
+            ('location_logs', self._new_location_state, self._accumulate_location_logs)
+        ):
+            watermark = LogWatermark.from_document((stored.get('watermarks') or {}).get(collection))
+            delta = new_state(exact=True)
+            accumulate(delta, self._iter_new_documents('descriptive_analytics', collection, watermark))
+            increments.update(self._counter_increments(collection, delta))
+            watermarks[collection] = watermark.to_document()
+        
+        journal.commit(increments, {'watermarks': watermarks})
+        states = self._load_counters()
+        
+        return (
+            self._finalize_search_state(states['search_logs'], users),
+            self._finalize_location_state(states['location_logs'])
+        )
+    
+    def _iter_new_documents(self, module, collection, watermark):
+        """Stream the documents the watermark hasn't seen, advancing it as they are read"""
+        if self.snapshot is not None:
+            documents = (doc for doc in self.snapshot.get(collection) if watermark.matches(doc.get('_id')))
+        else:
+            fields = self.MODULE_INPUTS.get(module, {}).get(collection)
+            projection = {field: 1 for field in fields} if fields is not None else None
+            documents = self.db[collection].find(watermark.query(), projection).batch_size(self.scan_batch_size)
+        return watermark.new_documents(documents)
+    
+    def _counter_increments(self, collection, delta):
+        """descriptive_counters increments for every counter key a run changed"""
+        increments = {}
+        for name, value in delta.items():
+            if isinstance(value, HeavyHitters):
+                value = value.counts
+            counts = value if isinstance(value, dict) else {None: value}
+            for key, count in counts.items():
+                if not count:
+                    continue
+                doc_id = f"{collection}|{name}" if key is None else f"{collection}|{name}|{key}"
+                increments[doc_id] = ({'value': int(count)}, {'collection': collection, 'counter': name, 'key': key})
+        return increments
+    
+    def _load_counters(self):
+        """Rebuild the full search and location accumulators from descriptive_counters"""
+        states = {'search_logs': self._new_search_state(exact=True), 'location_logs': self._new_location_state(exact=True)}
+        
+        for doc in self.db.descriptive_counters.find({}, {'collection': 1, 'counter': 1, 'key': 1, 'value': 1}):
+            state = states[doc['collection']]
+            counter = state[doc['counter']]
+            if doc['key'] is None:
+                state[doc['counter']] = doc['value']
+            elif isinstance(counter, HeavyHitters):
+                counter.add(doc['key'], doc['value'])
+            else:
+                counter[doc['key']] = doc['value']
+        return states
+    
     def _analyze_feedback_sentiment(self, feedback_data):
         """Analyze sentiment of user feedback"""
         if not feedback_data:
             return {'positive': 0, 'negative': 0, 'neutral': 0, 'average_sentiment': 0}
         
         sentiments = {'positive': 0, 'negative': 0, 'neutral': 0}
-        sentiment_scores = []
         
-        for feedback in feedback_data:
-            comment = feedback.get('comment', '')
-            if comment:
-                blob = TextBlob(comment)
-                polarity = blob.sentiment.polarity
-                sentiment_scores.append(polarity)
-                
-                if polarity > 0.1:
-                    sentiments['positive'] += 1
-                elif polarity < -0.1:
-                    sentiments['negative'] += 1
-                else:
-                    sentiments['neutral'] += 1
+        # Batched, cached scoring: only comments never seen before reach TextBlob
+        comments = [feedback.get('comment', '') for feedback in feedback_data]
+        sentiment_scores = self.sentiment_scorer.score([comment for comment in comments if comment])
+        
+        for polarity in sentiment_scores:
+            if polarity > 0.1:
+                sentiments['positive'] += 1
+            elif polarity < -0.1:
+                sentiments['negative'] += 1
+            else:
+                sentiments['neutral'] += 1
         
         avg_sentiment = np.mean(sentiment_scores) if sentiment_scores else 0
         
@@ -683,25 +1959,19 @@ class LatePlateAnalyticsEngine:
         if not all_feedback:
             return {'trend': 'stable', 'monthly_scores': {}}
         
-        monthly_scores = {}
+        times = self.time_features.get(all_feedback)
+        ratings = np.array([feedback.get('rating', 0) or 0 for feedback in all_feedback], dtype=float)
+        mask = times['valid'] & (ratings != 0)
         
-        for feedback in all_feedback:
-            timestamp = feedback.get('timestamp')
-            rating = feedback.get('rating', 0)
-            
-            if timestamp and rating:
-                if isinstance(timestamp, str):
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                
-                month_key = timestamp.strftime('%Y-%m')
-                if month_key not in monthly_scores:
-                    monthly_scores[month_key] = []
-                monthly_scores[month_key].append(rating)
+        # Calculate average scores per month (chronological order)
+        months, month_positions = np.unique(times['month_index'][mask], return_inverse=True)
+        rating_sums = np.bincount(month_positions, weights=ratings[mask], minlength=len(months))
+        rating_counts = np.bincount(month_positions, minlength=len(months))
         
-        # Calculate average scores per month
-        avg_monthly_scores = {}
-        for month, scores in monthly_scores.items():
-            avg_monthly_scores[month] = np.mean(scores)
+        avg_monthly_scores = {
+            TimeFeatureCache.month_label(int(month)): float(rating_sums[i] / rating_counts[i])
+            for i, month in enumerate(months)
+        }
         
         # Determine trend
         trend = 'stable'
@@ -718,85 +1988,113 @@ class LatePlateAnalyticsEngine:
             'overall_satisfaction': np.mean(list(avg_monthly_scores.values())) if avg_monthly_scores else 0
         }
     
-    def _detect_emotions(self, feedback_data):
-        """Detect emotions in feedback using keyword analysis"""
-        emotions = {
-            'joy': ['happy', 'great', 'excellent', 'amazing', 'love', 'wonderful', 'fantastic', 'awesome'],
-            'anger': ['angry', 'terrible', 'awful', 'hate', 'worst', 'horrible', 'disgusting', 'furious'],
-            'sadness': ['sad', 'disappointed', 'bad', 'poor', 'unsatisfied', 'depressed', 'upset'],
-            'surprise': ['surprised', 'unexpected', 'wow', 'incredible', 'shocking', 'unbelievable'],
-            'fear': ['worried', 'concerned', 'afraid', 'nervous', 'anxious', 'scared'],
-            'trust': ['reliable', 'trustworthy', 'dependable', 'consistent', 'professional'],
-            'anticipation': ['excited', 'looking forward', 'eager', 'hopeful', 'optimistic']
+    def _analyze_sentiment_by_cuisine(self, reviews):
+        """Average comment polarity and rating per reviewed cuisine"""
+        commented = [review for review in reviews if review.get('comment')]
+        if not commented:
+            return {}
+        
+        polarities = self.sentiment_scorer.score([review['comment'] for review in commented])
+        by_cuisine = {}
+        for review, polarity in zip(commented, polarities):
+            cuisine = str(review.get('cuisine') or 'unknown').strip().lower() or 'unknown'
+            stats = by_cuisine.setdefault(cuisine, {'polarities': [], 'ratings': []})
+            stats['polarities'].append(polarity)
+            if review.get('rating'):
+                stats['ratings'].append(review['rating'])
+        
+        return {
+            cuisine: {
+                'average_sentiment': float(np.mean(stats['polarities'])),
+                'positive_share': float(np.mean(np.array(stats['polarities']) > 0.1) * 100),
+                'average_rating': float(np.mean(stats['ratings'])) if stats['ratings'] else None,
+                'review_count': len(stats['polarities'])
+            }
+            for cuisine, stats in sorted(by_cuisine.items(), key=lambda item: -len(item[1]['polarities']))
         }
+    
+    def _analyze_temporal_sentiment(self, all_feedback):
+        """Average comment polarity by hour of day and by month"""
+        commented = [feedback for feedback in all_feedback if feedback.get('comment')]
+        if not commented:
+            return {'hourly_sentiment': {}, 'monthly_sentiment': {}}
         
-        emotion_counts = {emotion: 0 for emotion in emotions.keys()}
+        times = self.time_features.get(commented)
+        valid = times['valid']
+        polarities = np.array(self.sentiment_scorer.score([feedback['comment'] for feedback in commented]))[valid]
+        
+        hours = times['hour'][valid]
+        hour_sums = np.bincount(hours, weights=polarities, minlength=24)
+        hour_counts = np.bincount(hours, minlength=24)
+        
+        months, month_positions = np.unique(times['month_index'][valid], return_inverse=True)
+        month_sums = np.bincount(month_positions, weights=polarities, minlength=len(months))
+        month_counts = np.bincount(month_positions, minlength=len(months))
+        
+        return {
+            'hourly_sentiment': {
+                str(hour): float(hour_sums[hour] / hour_counts[hour]) for hour in range(24) if hour_counts[hour]
+            },
+            'monthly_sentiment': {
+                TimeFeatureCache.month_label(int(month)): float(month_sums[i] / month_counts[i])
+                for i, month in enumerate(months)
+            }
+        }
+    
+    def _detect_emotions(self, feedback_data):
+        """Detect emotions in feedback using keyword analysis"""
+        emotion_counts = {emotion: 0 for emotion in self.emotion_matcher.emotions}
         
         for feedback in feedback_data:
-            comment = feedback.get('comment', '').lower()
-            for emotion, keywords in emotions.items():
-                if any(keyword in comment for keyword in keywords):
-                    emotion_counts[emotion] += 1
+            for emotion in self.emotion_matcher.detect(feedback.get('comment', '')):
+                emotion_counts[emotion] += 1
         
         return emotion_counts
     
-    def _analyze_keywords(self, feedback_data):
-        """Analyze most common keywords in feedback"""
-        all_words = []
+    def _count_keywords(self, feedback_data):
+        """Count keywords in feedback for the keyword ranking"""
+        word_counts = self._new_top_k()
         
         for feedback in feedback_data:
             comment = feedback.get('comment', '')
             if comment:
-                # Simple word extraction (could be enhanced with NLP)
-                words = comment.lower().split()
-                # Filter out common stop words
-                stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'was', 'are', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'}
-                filtered_words = [word for word in words if word not in stop_words and len(word) > 2]
-                all_words.extend(filtered_words)
+                # Simple word extraction (could be enhanced with NLP), skipping stop words
+                for word in comment.lower().split():
+                    if len(word) > 2 and word not in self.STOP_WORDS:
+                        word_counts.add(word)
         
-        word_counts = Counter(all_words)
-        return dict(word_counts.most_common(20))
+        return word_counts
     
-    def _prepare_clustering_features(self, users, location_logs, search_logs):
-        """Prepare features for user clustering"""
-        features_data = {}
+    def _new_top_k(self):
+        """Counter for rankings: exact for small data, bounded-memory heavy hitters otherwise"""
+        return HeavyHitters(mode=self.top_k_mode, capacity=self.top_k_capacity)
+    
+    def _prepare_clustering_features(self, users, user_features):
+        """Build the float32 user x feature matrix for clustering from profiles and feature store aggregates"""
+        user_ids = [str(user.get('_id')) for user in users]
+        n_users = len(user_ids)
         
-        # Create user activity maps
-        user_locations = {}
-        user_searches = {}
+        matrix = np.zeros((n_users, len(self.CLUSTERING_FEATURES)), dtype=np.float32)
+        column = {name: i for i, name in enumerate(self.CLUSTERING_FEATURES)}
         
-        for log in location_logs:
-            user_id = str(log.get('user_id', 'anonymous'))
-            if user_id not in user_locations:
-                user_locations[user_id] = []
-            user_locations[user_id].append(log)
-        
-        for log in search_logs:
-            user_id = str(log.get('user_id', 'anonymous'))
-            if user_id not in user_searches:
-                user_searches[user_id] = []
-            user_searches[user_id].append(log)
+        # Profile columns come straight from the user documents
+        preferences = [user.get('preferences', {}) for user in users]
+        matrix[:, column['has_diabetes']] = [1 if p.get('hasDiabetes') else 0 for p in preferences]
+        matrix[:, column['profile_complete']] = [1 if p.get('profileComplete') else 0 for p in preferences]
+        matrix[:, column['num_favorite_cuisines']] = [len(p.get('favoritesCuisines', [])) for p in preferences]
+        matrix[:, column['has_allergies']] = [1 if p.get('allergies') else 0 for p in preferences]
+        matrix[:, column['dietary_preference_score']] = [
+            self._encode_dietary_preference(p.get('dietaryPreference')) for p in preferences
+        ]
         
-        for user in users:
-            user_id = str(user.get('_id'))
-            
-            # Basic user features
-            features = {
-                'has_diabetes': 1 if user.get('preferences', {}).get('hasDiabetes') else 0,
-                'profile_complete': 1 if user.get('preferences', {}).get('profileComplete') else 0,
-                'num_favorite_cuisines': len(user.get('preferences', {}).get('favoritesCuisines', [])),
-                'has_allergies': 1 if user.get('preferences', {}).get('allergies') else 0,
-                'dietary_preference_score': self._encode_dietary_preference(user.get('preferences', {}).get('dietaryPreference')),
-                'location_searches': len(user_locations.get(user_id, [])),
-                'total_searches': len(user_searches.get(user_id, [])),
-                'avg_search_hour': self._calculate_avg_search_hour(user_searches.get(user_id, [])),
-                'search_variety': len(set([s.get('type') for s in user_searches.get(user_id, [])])),
-                'location_variety': len(set([l.get('address') for l in user_locations.get(user_id, [])]))
-            }
-            
-            features_data[user_id] = features
+        # Activity columns come from the shared user feature store
+        matrix[:, column['total_searches']] = user_features['search_count'].fillna(0).values
+        matrix[:, column['location_searches']] = user_features['location_count'].fillna(0).values
+        matrix[:, column['avg_search_hour']] = user_features['avg_search_hour'].fillna(12).values  # Noon when no timestamps
+        matrix[:, column['search_variety']] = user_features['search_type_variety'].fillna(0).values
+        matrix[:, column['location_variety']] = user_features['distinct_locations'].fillna(0).values
         
-        return features_data
+        return matrix, user_ids
     
     def _encode_dietary_preference(self, pref):
         """Encode dietary preference as numeric value"""
@@ -810,45 +2108,20 @@ class LatePlateAnalyticsEngine:
         }
         return encoding.get(pref, 0)
     
-    def _calculate_avg_search_hour(self, searches):
-        """Calculate average hour of searches"""
-        if not searches:
-            return 12  # Default to noon
-        
-        hours = []
-        for search in searches:
-            timestamp = search.get('timestamp')
-            if timestamp:
-                if isinstance(timestamp, str):
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                hours.append(timestamp.hour)
-        
-        return np.mean(hours) if hours else 12
-    
     def _find_optimal_clusters(self, features_scaled):
-        """Find optimal number of clusters using silhouette score"""
+        """Find optimal number of clusters using silhouette score; returns (k, fitted model or None)"""
+        from cluster_selection import select_cluster_count
+        
         if len(features_scaled) < 4:
-            return 2
+            return 2, None
         
         max_k = min(8, len(features_scaled) - 1)
-        best_score = -1
-        best_k = 2
-        
-        for k in range(2, max_k + 1):
-            try:
-                kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-                cluster_labels = kmeans.fit_predict(features_scaled)
-                score = silhouette_score(features_scaled, cluster_labels)
-                
-                if score > best_score:
-                    best_score = score
-                    best_k = k
-            except:
-                continue
         
-        return best_k
+        # Warm-started MiniBatchKMeans with simplified silhouette scored in parallel
+        selection = select_cluster_count(features_scaled, range(2, max_k + 1), max_workers=self.max_workers)
+        return selection['best_k'], selection['models'].get(selection['best_k'])
     
-    def _analyze_clusters(self, users, clusters, features_data, user_ids):
+    def _analyze_clusters(self, users, clusters, feature_matrix, user_ids):
         """Analyze the characteristics of each cluster"""
         cluster_analysis = {
             'num_clusters': len(set(clusters)),
@@ -862,13 +2135,15 @@ class LatePlateAnalyticsEngine:
         
         # Analyze each cluster
         for cluster_id in set(clusters):
-            cluster_users = [user_ids[i] for i, c in enumerate(clusters) if c == cluster_id]
-            cluster_features = [features_data[user_id] for user_id in cluster_users]
+            cluster_mask = clusters == cluster_id
+            cluster_users = [user_ids[i] for i in np.flatnonzero(cluster_mask)]
             
             # Calculate average features for this cluster
-            avg_features = {}
-            for feature_name in cluster_features[0].keys():
-                avg_features[feature_name] = np.mean([f[feature_name] for f in cluster_features])
+            feature_means = feature_matrix[cluster_mask].mean(axis=0, dtype=np.float64)
+            avg_features = {
+                feature_name: float(feature_means[i])
+                for i, feature_name in enumerate(self.CLUSTERING_FEATURES)
+            }
             
             # Determine cluster characteristics
             characteristics = []
@@ -892,34 +2167,312 @@ class LatePlateAnalyticsEngine:
         
         return cluster_analysis
     
-    def run_complete_analysis(self):
-        """Run all analytics modules"""
+    def _get_user_interactions(self):
+        """Collect (user, item, weight) implicit-feedback triples from searches, feedback and activities"""
+        users, items, weights = [], [], []
+        
+        for log in self._load('collaborative_filtering', 'search_logs'):
+            query = (log.get('query') or '').strip().lower()
+            if query and log.get('user_id'):
+                users.append(str(log['user_id']))
+                items.append(f"{log.get('type', 'unknown')}:{query}")
+                weights.append(1.0)
+        
+        for feedback in self._load('collaborative_filtering', 'feedback'):
+            if feedback.get('userId') and feedback.get('category'):
+                users.append(str(feedback['userId']))
+                items.append(f"category:{feedback['category']}")
+                weights.append(float(feedback.get('rating') or 3) / 5.0)
+        
+        for activity in self._load('collaborative_filtering', 'userActivities'):
+            metadata = activity.get('metadata') or {}
+            name = metadata.get('recipeName') or metadata.get('restaurantName')
+            if activity.get('userId') and name:
+                users.append(str(activity['userId']))
+                items.append(f"{activity.get('type', 'unknown')}:{name.strip().lower()}")
+                weights.append(self.ACTION_WEIGHTS.get(activity.get('action'), 1.0))
+        
+        return pd.DataFrame({'user': users, 'item': items, 'weight': weights})
+    
+    def _create_user_item_matrix(self, interactions):
+        """Build a CSR user x item matrix with dense integer ids (duplicate pairs are summed)"""
+        from scipy.sparse import csr_matrix
+        
+        user_codes, user_ids = pd.factorize(interactions['user'])
+        item_codes, item_ids = pd.factorize(interactions['item'])
+        
+        matrix = csr_matrix(
+            (interactions['weight'].to_numpy(dtype=np.float32), (user_codes, item_codes)),
+            shape=(len(user_ids), len(item_ids))
+        )
+        matrix.sum_duplicates()
+        
+        return {'matrix': matrix, 'user_ids': np.asarray(user_ids), 'item_ids': np.asarray(item_ids)}
+    
+    def _generate_collaborative_recommendations(self, user_item_matrix, n_factors=64, top_n=10, batch_size=4096):
+        """Factorize the interaction matrix with truncated SVD and pick top-N unseen items per user"""
+        from sklearn.decomposition import TruncatedSVD
+        
+        matrix = user_item_matrix['matrix']
+        user_ids = user_item_matrix['user_ids']
+        item_ids = user_item_matrix['item_ids']
+        n_users, n_items = matrix.shape
+        
+        if n_items < 3:
+            return self._generate_content_based_recommendations()
+        
+        # Dampen heavy users/items so counts act as confidence, not raw magnitude
+        confidence = matrix.copy()
+        confidence.data = np.log1p(confidence.data)
+        
+        svd = TruncatedSVD(n_components=min(n_factors, n_items - 1, max(n_users - 1, 1)), algorithm='randomized', random_state=42)
+        user_factors = svd.fit_transform(confidence).astype(np.float32)
+        item_factors = svd.components_.T.astype(np.float32)
+        top_n = min(top_n, n_items)
+        
+        operations = []
+        sample = {}
+        for start in range(0, n_users, batch_size):
+            stop = min(start + batch_size, n_users)
+            scores = user_factors[start:stop] @ item_factors.T  # multi-threaded BLAS
+            
+            # Never recommend items the user already interacted with
+            seen = matrix[start:stop]
+            scores[np.repeat(np.arange(stop - start), np.diff(seen.indptr)), seen.indices] = -np.inf
+            
+            top = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            
+            for row in range(stop - start):
+                valid = np.isfinite(top_scores[row])
+                recommendations = [
+                    {'item': str(item_ids[item]), 'score': float(score)}
+                    for item, score in zip(top[row][valid], top_scores[row][valid])
+                ]
+                user_id = str(user_ids[start + row])
+                operations.append(pymongo.UpdateOne(
+                    {'_id': user_id},
+                    {'$set': {'recommendations': recommendations, 'updated_at': datetime.now()}},
+                    upsert=True
+                ))
+                if len(sample) < 5:
+                    sample[user_id] = recommendations
+            
+            # Per-user lists go to their own collection; analytics_results keeps a summary
+            self.db.user_recommendations.bulk_write(operations, ordered=False)
+            operations = []
+        
+        self.cf_model = {
+            'matrix': matrix,
+            'user_ids': user_ids,
+            'item_ids': item_ids,
+            'user_factors': user_factors,
+            'item_factors': item_factors
+        }
+        
+        return {
+            'method': 'truncated_svd',
+            'n_users': int(n_users),
+            'n_items': int(n_items),
+            'n_interactions': int(matrix.nnz),
+            'n_factors': int(svd.n_components),
+            'explained_variance': float(svd.explained_variance_ratio_.sum()),
+            'top_n': int(top_n),
+            'recommendations_collection': 'user_recommendations',
+            'sample_recommendations': sample
+        }
+    
+    def _build_recommendation_indexes(self):
+        """Save IVF indexes over the collaborative filtering user and item factors, plus each user's seen items"""
+        from vector_index import VectorIndex, SeenItems
+        
+        item_index = VectorIndex.build(self.cf_model['item_ids'], self.cf_model['item_factors'], metric='ip')
+        user_index = VectorIndex.build(self.cf_model['user_ids'], self.cf_model['user_factors'], metric='cosine')
+        seen_items = SeenItems.build(self.cf_model['user_ids'], self.cf_model['matrix'], self.cf_model['item_ids'])
+        
+        paths = {}
+        for name, index in (('items', item_index), ('users', user_index), ('seen', seen_items)):
+            paths[name] = os.path.join(self.index_dir, name)
+            index.save(paths[name])
+            self._indexes.pop(name, None)
+        return paths
+    
+    def _get_index(self, name, index_class=None):
+        if index_class is None:
+            from vector_index import VectorIndex as index_class
+        if name not in self._indexes:
+            self._indexes[name] = index_class.load(os.path.join(self.index_dir, name))
+        return self._indexes[name]
+    
+    def recommend_items_for_user(self, user_id, top_n=10, n_probe=8):
+        """Top-N items for a user from the persisted item index, skipping items they already interacted with"""
+        from vector_index import SeenItems
+        
+        vector = self._get_index('users').vector(user_id)
+        if vector is None:
+            return []
+        seen = self._get_index('seen', SeenItems).items(user_id)
+        return self._get_index('items').search(vector, top_n=top_n, n_probe=n_probe, exclude=seen)
+    
+    def similar_users(self, user_id, top_n=10, n_probe=8):
+        """Users whose factor vectors are closest (cosine) to the given user's"""
+        index = self._get_index('users')
+        vector = index.vector(user_id)
+        if vector is None:
+            return []
+        return index.search(vector, top_n=top_n, n_probe=n_probe, exclude=[user_id])
+    
+    def _generate_content_based_recommendations(self):
+        """Fallback when there is too little interaction data: highest-rated recipes"""
+        recipes = self.db.recipes.find(
+            {'rating': {'$exists': True}}, {'RecipeName': 1, 'Cuisine': 1, 'rating': 1}
+        ).sort('rating', -1).limit(20)
+        
+        return {
+            'method': 'content_based',
+            'top_rated_recipes': [
+                {
+                    'recipe_id': str(recipe['_id']),
+                    'name': recipe.get('RecipeName', ''),
+                    'cuisine': recipe.get('Cuisine', ''),
+                    'rating': recipe.get('rating', 0)
+                }
+                for recipe in recipes
+            ]
+        }
+    
+    def _mine_ingredient_associations(self, recipes, user_searches, min_support=0.02,
+                                      min_confidence=0.3, max_itemset_size=3, top_n=100):
+        """Frequent ingredient combinations and rules via Eclat over packed ingredient bitmaps"""
+        transactions = [names for names in (recipe_ingredients(recipe) for recipe in recipes) if names]
+        
+        if not transactions:
+            return {'recipes_analyzed': 0, 'frequent_itemsets': [], 'rules': []}
+        
+        min_count = max(2, int(math.ceil(min_support * len(transactions))))
+        names, counts, bitmaps = build_item_bitmaps(transactions, min_count)
+        itemsets = mine_frequent_itemsets(bitmaps, counts, min_count, max_size=max_itemset_size)
+        rules = association_rules(itemsets, len(transactions), min_confidence)[:top_n]
+        
+        # How often each rule ingredient shows up in recipe searches
+        searched = Counter(
+            normalize_ingredient(search.get('query') or '') for search in user_searches
+        )
+        
+        frequent_itemsets = sorted(
+            ((itemset, count) for itemset, count in itemsets.items() if len(itemset) > 1),
+            key=lambda entry: entry[1], reverse=True
+        )[:top_n]
+        
+        return {
+            'recipes_analyzed': len(transactions),
+            'min_support': min_support,
+            'min_confidence': min_confidence,
+            'frequent_ingredients': len(names),
+            'frequent_itemsets': [
+                {'items': [names[i] for i in itemset], 'support': count / len(transactions)}
+                for itemset, count in frequent_itemsets
+            ],
+            'rules': [
+                {
+                    'antecedent': [names[i] for i in rule['antecedent']],
+                    'consequent': names[rule['consequent']],
+                    'support': rule['support'],
+                    'confidence': rule['confidence'],
+                    'lift': rule['lift'],
+                    'search_mentions': sum(searched[names[i]] for i in rule['antecedent'] + (rule['consequent'],))
+                }
+                for rule in rules
+            ]
+        }
+    
+    def _build_ingredient_index(self, recipes):
+        """Persist posting lists from stable ingredient ids to the recipes that use them"""
+        vocabulary = IngredientVocabulary(self.db.ingredient_vocabulary)
+        recipe_ids = [recipe['_id'] for recipe in recipes]
+        recipe_names = [sorted(recipe_ingredients(recipe)) for recipe in recipes]
+        
+        # Assign ids for new ingredients in one batch, then map every recipe
+        vocabulary.encode(sorted(set().union(*recipe_names)))
+        ingredient_ids = [vocabulary.lookup(names) for names in recipe_names]
+        
+        index = IngredientIndex.build(recipe_ids, ingredient_ids, len(vocabulary))
+        os.makedirs(self.index_dir, exist_ok=True)
+        index.save(os.path.join(self.index_dir, 'ingredients'))
+        self._indexes['ingredients'] = index
+        self._ingredient_vocabulary = vocabulary
+    
+    def recipes_with_ingredients(self, ingredients, max_missing=0):
+        """What can I cook: [(recipe id, missing ingredient count)] from the persisted ingredient index
+        
+        max_missing=None instead returns every recipe that uses all of the given ingredients.
+        """
+        if self._ingredient_vocabulary is None:
+            self._ingredient_vocabulary = IngredientVocabulary(self.db.ingredient_vocabulary)
+        names = {normalize_ingredient(ingredient) for ingredient in ingredients}
+        ingredient_ids = self._ingredient_vocabulary.lookup(names)
+        
+        index = self._get_index('ingredients', IngredientIndex)
+        if max_missing is None:
+            # An unknown ingredient means no recipe can contain all of them
+            if len(ingredient_ids) < len(names):
+                return []
+            return [(recipe_id, 0) for recipe_id in index.containing(ingredient_ids)]
+        return index.cookable(ingredient_ids, max_missing=max_missing)
+    
+    def run_complete_analysis(self, modules=None):
+        """Run the given analytics modules (all of them by default)"""
         print("🚀 Starting Complete Analytics Engine...")
         
-        results = {
-            'descriptive': self.descriptive_analytics(),
-            'sentiment': self.sentiment_analysis(),
-            'clustering': self.user_clustering(),
-            'collaborative_filtering': self.collaborative_filtering(),
-            'time_series': self.time_series_analysis(),
-            'decision_tree': self.decision_tree_recommendations(),
-            'association_rules': self.association_rule_mining(),
-            'market_segmentation': self.market_segmentation(),
-            'mood_recommendations': self.mood_based_recommendations(),
-            'predictive': self.predictive_analytics()
-        }
-        
-        # Store comprehensive results
-        self.db.analytics_results.update_one(
-            {'type': 'complete_analysis'},
-            {'$set': {'data': results, 'updated_at': datetime.now()}},
-            upsert=True
+        modules = modules or list(self.MODULES)
+        methods = [self.MODULES[name] for name in modules]
+        
+        # Fetch each collection once and share it across the selected modules
+        self.snapshot = AnalyticsSnapshot(
+            self.db, {method: self.MODULE_INPUTS[method] for method in methods if method in self.MODULE_INPUTS}
         )
         
+        # Modules only share the read-only snapshot, so they can all run concurrently. They are
+        # bound methods holding the Mongo client, so the pool is threads: modules overlap while
+        # waiting on MongoDB or inside NumPy/BLAS, but pure-Python sections take turns on the GIL
+        scheduler = ModuleScheduler(max_workers=self.max_workers)
+        for name, method in zip(modules, methods):
+            scheduler.add(name, getattr(self, method))
+        
+        try:
+            results = scheduler.run()
+        finally:
+            self.snapshot.clear()
+            self.snapshot = None
+            self.time_features.clear()
+        
+        # Store comprehensive results (each module already stored its own)
+        if len(results) == len(self.MODULES):
+            self.db.analytics_results.update_one(
+                {'type': 'complete_analysis'},
+                {'$set': {'data': results, 'updated_at': datetime.now()}},
+                upsert=True
+            )
+        
         print("🎉 Complete Analytics Engine finished!")
         return results
 
 if __name__ == "__main__":
-    engine = LatePlateAnalyticsEngine()
-    results = engine.run_complete_analysis()
+    parser = argparse.ArgumentParser(description="Run LatePlate Finder analytics modules")
+    parser.add_argument('modules', nargs='*', metavar='module',
+                        help=f"modules to run (default: all): {', '.join(LatePlateAnalyticsEngine.MODULES)}")
+    parser.add_argument('--mongo-uri', default="your_key_here")
+    parser.add_argument('--db-name', default="DB_name")
+    parser.add_argument('--max-workers', type=int, default=None)
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.modules if name not in LatePlateAnalyticsEngine.MODULES]
+    if unknown:
+        parser.error(f"unknown modules: {', '.join(unknown)}")
+    
+    engine = LatePlateAnalyticsEngine(mongo_uri=args.mongo_uri, db_name=args.db_name, max_workers=args.max_workers)
+    results = engine.run_complete_analysis(args.modules)
     print("Analytics results stored in database.")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Association Rule Mining for LatePlate Finder analytics scripts
+Eclat frequent-itemset mining over packed item bitmaps, producing support/confidence/lift rules
+"""
+
+import numpy as np
+
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint16)
+
+
+def build_item_bitmaps(transactions, min_count):
+    """Encode transactions as CSR rows, then as one packed bitmap per frequent item
+
+    Returns (item_names, item_counts, bitmaps) with bitmaps shaped (n_items, ceil(n_transactions / 8)).
+    """
+    vocabulary = {}
+    indptr = [0]
+    indices = []
+    for items in transactions:
+        row = {vocabulary.setdefault(item, len(vocabulary)) for item in items}
+        indices.extend(row)
+        indptr.append(len(indices))
+
+    indices = np.asarray(indices, dtype=np.int64)
+    rows = np.repeat(np.arange(len(transactions)), np.diff(indptr))
+    counts = np.bincount(indices, minlength=len(vocabulary))
+
+    # Min-support pruning happens before any bitmap is allocated
+    frequent = np.flatnonzero(counts >= min_count)
+    frequent = frequent[np.argsort(-counts[frequent], kind='stable')]
+    column = np.full(len(vocabulary), -1, dtype=np.int64)
+    column[frequent] = np.arange(len(frequent))
+
+    keep = column[indices] >= 0
+    bitmaps = np.zeros((len(frequent), (len(transactions) + 7) // 8), dtype=np.uint8)
+    np.bitwise_or.at(
+        bitmaps,
+        (column[indices[keep]], rows[keep] >> 3),
+        (1 << (7 - (rows[keep] & 7))).astype(np.uint8)
+    )
+
+    names = np.empty(len(vocabulary), dtype=object)
+    for item, i in vocabulary.items():
+        names[i] = item
+    return list(names[frequent]), counts[frequent], bitmaps
+
+
+def mine_frequent_itemsets(bitmaps, item_counts, min_count, max_size=3):
+    """Depth-first Eclat: extend each prefix bitmap with every later item in one vectorized AND"""
+    itemsets = {(i,): int(count) for i, count in enumerate(item_counts)}
+
+    def extend(prefix, prefix_bitmap, candidates):
+        if len(prefix) >= max_size or len(candidates) == 0:
+            return
+        joined = bitmaps[candidates] & prefix_bitmap
+        supports = POPCOUNT[joined].sum(axis=1)
+        survivors = np.flatnonzero(supports >= min_count)
+        for position in survivors:
+            item = int(candidates[position])
+            itemset = prefix + (item,)
+            itemsets[itemset] = int(supports[position])
+            extend(itemset, joined[position], candidates[position + 1:][supports[position + 1:] >= min_count])
+
+    for i in range(len(item_counts)):
+        extend((i,), bitmaps[i], np.arange(i + 1, len(item_counts)))
+
+    return itemsets
+
+
+def association_rules(itemsets, n_transactions, min_confidence):
+    """Single-consequent rules from frequent itemsets (every subset is present by anti-monotonicity)"""
+    rules = []
+    for itemset, count in itemsets.items():
+        if len(itemset) < 2:
+            continue
+        for consequent in itemset:
+            antecedent = tuple(item for item in itemset if item != consequent)
+            confidence = count / itemsets[antecedent]
+            if confidence < min_confidence:
+                continue
+            rules.append({
+                'antecedent': antecedent,
+                'consequent': consequent,
+                'support': count / n_transactions,
+                'confidence': confidence,
+                'lift': confidence / (itemsets[(consequent,)] / n_transactions)
+            })
+    rules.sort(key=lambda rule: (rule['lift'], rule['confidence']), reverse=True)
+    return rules
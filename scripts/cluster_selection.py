@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Cluster Count Selection for LatePlate Finder analytics scripts
+Picks k for K-Means with warm-started MiniBatchKMeans and sampled or simplified silhouette scores
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import silhouette_score
+
+
+def _next_centers(features, centers, rng):
+    """Extend a k-1 solution to k centers by k-means++ sampling one more seed"""
+    distances = ((features[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+    total = distances.sum()
+    if total <= 0:
+        index = rng.integers(len(features))
+    else:
+        index = rng.choice(len(features), p=distances / total)
+    return np.vstack([centers, features[index]])
+
+
+def _simplified_silhouette(distances, labels):
+    """Centroid-based silhouette: O(n * k) instead of the O(n^2) pairwise version"""
+    own = distances[np.arange(len(labels)), labels]
+    others = distances.copy()
+    others[np.arange(len(labels)), labels] = np.inf
+    nearest_other = others.min(axis=1)
+    denominator = np.maximum(own, nearest_other)
+    scores = np.where(denominator > 0, (nearest_other - own) / np.where(denominator > 0, denominator, 1), 0)
+    return float(scores.mean())
+
+
+def select_cluster_count(features, k_values, method='simplified', sample_size=10000,
+                         batch_size=2048, max_workers=None, random_state=42):
+    """Fit K-Means for every k and return the best k, per-k scores and fitted models
+
+    Each k is warm-started from the previous k's centers. Scoring uses the simplified
+    silhouette by default, or sklearn's silhouette on a row sample with method='sampled'.
+    Scores for all k are computed in parallel.
+    """
+    features = np.asarray(features, dtype=np.float32)
+    k_values = [k for k in k_values if 2 <= k < len(features)]
+    if not k_values:
+        return {'best_k': 2, 'scores': {}, 'models': {}}
+
+    rng = np.random.default_rng(random_state)
+    sample_index = (
+        rng.choice(len(features), size=sample_size, replace=False)
+        if len(features) > sample_size else np.arange(len(features))
+    )
+    sample = features[sample_index]
+
+    # Warm-started fits: the k-1 centers seed the k solution
+    models = {}
+    centers = sample[rng.integers(len(sample))][None, :]
+    for k in range(2, max(k_values) + 1):
+        centers = _next_centers(sample, centers, rng)
+        model = MiniBatchKMeans(
+            n_clusters=k, init=centers, n_init=1,
+            batch_size=batch_size, random_state=random_state
+        )
+        model.fit(features)
+        centers = model.cluster_centers_.astype(np.float32)
+        if k in k_values:
+            models[k] = model
+
+    def score(k):
+        distances = models[k].transform(sample)
+        labels = distances.argmin(axis=1)
+        if len(np.unique(labels)) < 2:
+            return k, None
+        if method == 'sampled':
+            return k, float(silhouette_score(sample, labels))
+        return k, _simplified_silhouette(distances, labels)
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as pool:
+        scores = {k: s for k, s in pool.map(score, k_values) if s is not None}
+
+    best_k = max(scores, key=scores.get) if scores else k_values[0]
+    return {'best_k': best_k, 'scores': scores, 'models': models}
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Directory Swap for LatePlate Finder analytics scripts
+Writes a multi-file artifact (index, model, feature table) into staging and swaps it in by rename
+"""
+
+import os
+import shutil
+from contextlib import contextmanager
+
+
+def restore_previous(path):
+    """Put '<path>.old' back at path when a swap crashed between its two renames"""
+    previous = f"{path}.old"
+    if not os.path.exists(path) and os.path.exists(previous):
+        os.replace(previous, path)
+
+
+@contextmanager
+def replace_directory(path):
+    """Yield an empty staging directory that replaces path once the block finishes
+
+    The current version is renamed aside before the staging directory is renamed into
+    place, and deleted only afterwards, so path is never a partly written or partly
+    deleted directory. If the block raises, path is left untouched. A crash between the
+    two renames leaves the previous version at '<path>.old', which the next swap
+    restores before it starts.
+    """
+    staging = f"{path}.tmp"
+    previous = f"{path}.old"
+    restore_previous(path)
+
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+    yield staging
+
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, previous)
+    os.replace(staging, path)
+    shutil.rmtree(previous, ignore_errors=True)
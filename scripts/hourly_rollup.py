@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Hourly Rollup Store for LatePlate Finder analytics scripts
+Keeps an incrementally updated hour x type x city count table for a raw log collection
+"""
+
+import pandas as pd
+from datetime import datetime
+from address_normalizer import AddressNormalizer
+from log_watermark import LogWatermark
+from increment_journal import IncrementJournal
+
+
+class HourlyRollup:
+    PROJECTION = {
+        'timestamp': 1, 'type': 1, 'city': 1, 'address': 1,
+        'metadata.city': 1, 'metadata.location': 1, 'metadata.address': 1
+    }
+
+    def __init__(self, db, source, batch_size=5000, address_normalizer=None):
+        """Roll db[source] up into db['<source>_hourly_rollup'] with one document per (hour, type, city)
+
+        Progress is tracked by a LogWatermark stored in db.rollup_state, so refresh() only
+        reads documents inserted since the previous refresh (plus a short trailing window).
+        Each batch's row increments and watermark are committed together through an
+        IncrementJournal, so no batch is ever counted twice.
+        """
+        self.db = db
+        self.source = source
+        self.collection = db[f"{source}_hourly_rollup"]
+        self.journal = IncrementJournal(db, self.collection.name, 'rollup_state', {'_id': source})
+        self.batch_size = batch_size
+        self.address_normalizer = address_normalizer or AddressNormalizer()
+
+    def _cities(self, docs):
+        """City per raw document: an explicit city field, else parsed from the address/location text"""
+        cities = [None] * len(docs)
+        addresses = {}
+        for i, doc in enumerate(docs):
+            metadata = doc.get('metadata') if isinstance(doc.get('metadata'), dict) else {}
+            city = doc.get('city') or metadata.get('city')
+            if city:
+                cities[i] = city
+                continue
+            address = doc.get('address') or metadata.get('address') or metadata.get('location')
+            if isinstance(address, str) and address:
+                addresses[i] = address
+
+        normalized = self.address_normalizer.normalize_many(list(addresses.values()))
+        for i, address in zip(addresses, normalized):
+            cities[i] = address['city']
+        return [city or 'Unknown' for city in cities]
+
+    def _increments(self, docs):
+        """Rollup row increments for a batch of raw documents"""
+        frame = pd.DataFrame({
+            'hour': pd.to_datetime(
+                [doc.get('timestamp') for doc in docs], utc=True, format='ISO8601', errors='coerce'
+            ).floor('h'),
+            'type': [doc.get('type') or 'unknown' for doc in docs],
+            'city': self._cities(docs)
+        }).dropna(subset=['hour'])
+
+        counts = frame.groupby(['hour', 'type', 'city']).size()
+        return {
+            f"{hour.isoformat()}|{activity_type}|{city}": (
+                {'count': int(count)},
+                {'hour': hour.to_pydatetime().replace(tzinfo=None), 'type': activity_type, 'city': city}
+            )
+            for (hour, activity_type, city), count in counts.items()
+        }
+
+    def refresh(self):
+        """Fold raw documents the watermark hasn't seen into the rollup; returns how many were read
+
+        The watermark moves with each batch, so an interrupted refresh resumes where it stopped;
+        a batch it was committing is finished first.
+        """
+        self.journal.recover()
+        watermark = LogWatermark.from_document(self.db.rollup_state.find_one({'_id': self.source}))
+        cursor = self.db[self.source].find(watermark.query(), self.PROJECTION).sort('_id', 1).batch_size(self.batch_size)
+
+        processed = 0
+        batch = []
+        for doc in watermark.new_documents(cursor):
+            batch.append(doc)
+            if len(batch) == self.batch_size:
+                processed += self._commit(batch, watermark)
+                batch = []
+        if batch:
+            processed += self._commit(batch, watermark)
+        return processed
+
+    def _commit(self, batch, watermark):
+        self.journal.commit(self._increments(batch), {**watermark.to_document(), 'updated_at': datetime.now()})
+        return len(batch)
+
+    def table(self, query=None):
+        """Rollup rows as a DataFrame with hour (UTC), type, city and count columns"""
+        rows = list(self.collection.find(query or {}, {'_id': 0, 'hour': 1, 'type': 1, 'city': 1, 'count': 1}))
+        if not rows:
+            return pd.DataFrame({
+                'hour': pd.Series(dtype='datetime64[ns, UTC]'), 'type': pd.Series(dtype=object),
+                'city': pd.Series(dtype=object), 'count': pd.Series(dtype='int64')
+            })
+        table = pd.DataFrame(rows)
+        table['hour'] = pd.to_datetime(table['hour'], utc=True)
+        return table
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Increment Journal for LatePlate Finder analytics scripts
+Applies a batch of $inc updates exactly once, together with the watermark state that produced it
+"""
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+
+class IncrementJournal:
+    def __init__(self, db, target, state_collection, state_filter, chunk_size=1000):
+        """Journal for $inc batches into db[target] whose progress lives in one state document
+
+        commit() writes the batch to db.increment_journal, records it as pending on the
+        state document, applies it, then swaps in the new state and clears the pending
+        mark in one update. Every updated document remembers the last batch it took, so
+        replaying a pending batch after a crash skips the documents it already reached.
+        Without transactions this needs a single writer per target, which is how the
+        analytics scripts run.
+        """
+        self.entries = db.increment_journal
+        self.target = db[target]
+        self.name = target
+        self.state = db[state_collection]
+        self.state_filter = state_filter
+        self.chunk_size = chunk_size
+
+    def recover(self):
+        """Finish a batch an interrupted commit recorded, and drop entries of batches it never recorded"""
+        state = self.state.find_one(self.state_filter, {'pending_batch': 1}) or {}
+        pending = state.get('pending_batch')
+        if pending:
+            self._apply(pending['id'])
+            self._finish(pending['id'], pending['state'])
+        self.entries.delete_many({'journal': self.name})
+
+    def commit(self, increments, state):
+        """Apply increments once and $set state on the state document
+
+        increments maps a target _id to (fields to $inc, fields to $setOnInsert).
+        """
+        batch_id = ObjectId()
+        items = [
+            {'_id': doc_id, 'inc': inc, 'insert': insert}
+            for doc_id, (inc, insert) in increments.items()
+        ]
+        if items:
+            self.entries.insert_many([
+                {'journal': self.name, 'batch': batch_id, 'items': items[start:start + self.chunk_size]}
+                for start in range(0, len(items), self.chunk_size)
+            ])
+        self.state.update_one(
+            self.state_filter, {'$set': {'pending_batch': {'id': batch_id, 'state': state}}}, upsert=True
+        )
+        self._apply(batch_id)
+        self._finish(batch_id, state)
+
+    def _apply(self, batch_id):
+        for entry in self.entries.find({'journal': self.name, 'batch': batch_id}):
+            operations = [
+                UpdateOne(
+                    {'_id': item['_id'], 'last_batch': {'$ne': batch_id}},
+                    {'$inc': item['inc'], '$set': {'last_batch': batch_id}, '$setOnInsert': item['insert']},
+                    upsert=True
+                )
+                for item in entry['items']
+            ]
+            try:
+                self.target.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # A document that already took this batch fails the filter, so the upsert
+                # collides with its _id; every other error is real
+                if any(error['code'] != DUPLICATE_KEY for error in e.details['writeErrors']):
+                    raise
+
+    def _finish(self, batch_id, state):
+        self.state.update_one(
+            {**self.state_filter, 'pending_batch.id': batch_id},
+            {'$set': state, '$unset': {'pending_batch': ''}}
+        )
+        self.entries.delete_many({'journal': self.name, 'batch': batch_id})
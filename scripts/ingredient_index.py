@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Ingredient Index for LatePlate Finder analytics scripts
+Normalizes free-text ingredients to stable integer ids and keeps a persisted ingredient -> recipe posting-list index
+"""
+
+import os
+import re
+import numpy as np
+from pymongo import InsertOne
+from directory_swap import replace_directory
+
+PARENTHESES = re.compile(r'\([^)]*\)')
+QUANTITY = re.compile(r'^(?:[\d¼-¾⅐-⅞]+(?:[\s/.\-]+[\d¼-¾⅐-⅞]+)*\s*)+')
+UNITS = re.compile(
+    r'^(?:cups?|tablespoons?|teaspoons?|tbsps?|tsps?|grams?|gms?|g|kgs?|kilograms?|ml|millilitres?|litres?|liters?|l|'
+    r'inch(?:es)?|pinch(?:es)?|sprigs?|cloves?|bunch(?:es)?|handful|pieces?|slices?|cans?|packets?|stalks?|'
+    r'leaves|drops?|dash(?:es)?|small|medium|large)\b\.?\s+(?=\S)'
+)
+PREPARATION = re.compile(r'\b(?:to taste|for taste|for garnish(?:ing)?|as required|as needed|optional)\b.*$')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_ingredient(ingredient):
+    """'1 cup Kabuli Chana (White Chickpeas) - boiled' -> 'kabuli chana'
+
+    Drops the quantity and the unit following it, parenthetical notes and everything
+    after the first ' - ' or ',' (preparation notes). Units are only dropped after a
+    quantity, so names such as 'gram flour' survive. Returns '' when nothing is left.
+    """
+    name = ingredient.lower().split(' - ')[0].split(',')[0]
+    name = PARENTHESES.sub(' ', name)
+    name = WHITESPACE.sub(' ', name).strip()
+    unquantified = QUANTITY.sub('', name)
+    if unquantified != name:
+        name = UNITS.sub('', unquantified)
+    name = PREPARATION.sub('', name)
+    return WHITESPACE.sub(' ', name).strip(' .-')
+
+
+def recipe_ingredients(recipe):
+    """Distinct normalized ingredient names for a recipe document"""
+    ingredients = recipe.get('Ingredients')
+    if not isinstance(ingredients, (list, tuple, str)):
+        ingredients = recipe.get('ingredients')
+    if isinstance(ingredients, str):
+        ingredients = ingredients.split(',')
+    elif not isinstance(ingredients, (list, tuple)):
+        ingredients = []
+    names = {normalize_ingredient(ingredient) for ingredient in ingredients if isinstance(ingredient, str)}
+    names.discard('')
+    return names
+
+
+class IngredientVocabulary:
+    def __init__(self, collection=None):
+        """Map ingredient names to integer ids that never change once assigned
+
+        With a Mongo collection the mapping is persisted as {_id: name, id: int}
+        and reloaded, so ids stay stable across runs.
+        """
+        self.collection = collection
+        self.ids = {}
+        if collection is not None:
+            for doc in collection.find({}, {'id': 1}):
+                self.ids[doc['_id']] = doc['id']
+        self.names = {i: name for name, i in self.ids.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def encode(self, names):
+        """Ids for names, assigning (and persisting) new ids for unseen names"""
+        new = []
+        for name in names:
+            if name not in self.ids:
+                self.ids[name] = len(self.ids)
+                self.names[self.ids[name]] = name
+                new.append(name)
+
+        if new and self.collection is not None:
+            operations = [InsertOne({'_id': name, 'id': self.ids[name]}) for name in new]
+            for start in range(0, len(operations), 1000):
+                self.collection.bulk_write(operations[start:start + 1000], ordered=False)
+
+        return [self.ids[name] for name in names]
+
+    def lookup(self, names):
+        """Ids for known names only (no assignment), used for queries"""
+        return [self.ids[name] for name in names if name in self.ids]
+
+
+class IngredientIndex:
+    FILES = ('recipe_ids', 'recipe_sizes', 'offsets', 'postings')
+
+    def __init__(self, recipe_ids, recipe_sizes, offsets, postings):
+        """Use IngredientIndex.build or IngredientIndex.load rather than calling this directly"""
+        self.recipe_ids = recipe_ids
+        self.recipe_sizes = recipe_sizes
+        self.offsets = offsets
+        self.postings = postings
+
+    @classmethod
+    def build(cls, recipe_ids, recipe_ingredient_ids, vocabulary_size):
+        """Posting list per ingredient id: sorted recipe rows, concatenated with CSR-style offsets"""
+        sizes = np.array([len(ids) for ids in recipe_ingredient_ids], dtype=np.int32)
+        ingredient_ids = np.fromiter(
+            (i for ids in recipe_ingredient_ids for i in ids), dtype=np.int64, count=int(sizes.sum())
+        )
+        rows = np.repeat(np.arange(len(recipe_ingredient_ids), dtype=np.int32), sizes)
+
+        # Stable sort by ingredient keeps each posting list sorted by recipe row
+        order = np.argsort(ingredient_ids, kind='stable')
+        counts = np.bincount(ingredient_ids, minlength=vocabulary_size)
+
+        return cls(
+            recipe_ids=np.asarray(recipe_ids).astype(str),
+            recipe_sizes=sizes,
+            offsets=np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            postings=rows[order]
+        )
+
+    def save(self, path):
+        """Write the posting lists and recipe columns as .npy files"""
+        with replace_directory(path) as staging:
+            for name in self.FILES:
+                np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, path):
+        """Open a saved index with the posting lists memory-mapped"""
+        return cls(**{name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in cls.FILES})
+
+    def posting(self, ingredient_id):
+        if ingredient_id + 1 >= len(self.offsets):
+            return np.empty(0, dtype=np.int32)
+        return np.asarray(self.postings[self.offsets[ingredient_id]:self.offsets[ingredient_id + 1]])
+
+    def containing(self, ingredient_ids):
+        """Recipe ids that use every one of the given ingredients (shortest posting list first)"""
+        postings = sorted((self.posting(i) for i in set(ingredient_ids)), key=len)
+        if not postings:
+            return []
+        rows = postings[0]
+        for posting in postings[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, posting, assume_unique=True)
+        return [str(recipe_id) for recipe_id in self.recipe_ids[rows]]
+
+    def cookable(self, ingredient_ids, max_missing=0):
+        """[(recipe id, missing count)] for recipes needing at most max_missing other ingredients
+
+        Only the posting lists of the given ingredients are read: hits per recipe are
+        counted and compared against each recipe's ingredient count.
+        """
+        postings = [self.posting(i) for i in set(ingredient_ids)]
+        if not postings:
+            return []
+        rows, hits = np.unique(np.concatenate(postings), return_counts=True)
+        missing = self.recipe_sizes[rows] - hits
+        keep = np.flatnonzero(missing <= max_missing)
+        keep = keep[np.argsort(missing[keep], kind='stable')]
+        return [(str(self.recipe_ids[rows[k]]), int(missing[k])) for k in keep]
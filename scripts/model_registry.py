@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Model Registry for LatePlate Finder ML analytics
+Saves Keras models and tokenizers with a fingerprint of their training records, so unchanged data skips training
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from datetime import datetime
+from directory_swap import replace_directory
+
+
+def record_hashes(records):
+    """64-bit content hash per training record (any tuple of id, text and target)"""
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(repr(record).encode('utf-8'), digest_size=8).digest(), 'big')
+         for record in records],
+        dtype=np.uint64
+    )
+
+
+class ModelRegistry:
+    def __init__(self, root='ml_models'):
+        """Directory of registered models, one sub-directory per model name"""
+        self.root = root
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def load(self, name):
+        """Return {'model', 'tokenizer', 'hashes', 'metadata'} for a saved model, or None"""
+        path = self._path(name)
+        if not os.path.exists(os.path.join(path, 'metadata.json')):
+            return None
+
+        from tensorflow.keras.models import load_model
+        from tensorflow.keras.preprocessing.text import tokenizer_from_json
+
+        with open(os.path.join(path, 'metadata.json')) as f:
+            metadata = json.load(f)
+        with open(os.path.join(path, 'tokenizer.json')) as f:
+            tokenizer = tokenizer_from_json(f.read())
+
+        return {
+            'model': load_model(os.path.join(path, 'model.keras')),
+            'tokenizer': tokenizer,
+            'hashes': np.load(os.path.join(path, 'hashes.npy')),
+            'metadata': metadata
+        }
+
+    @staticmethod
+    def plan(saved, hashes, config=None):
+        """Decide how to bring a saved model up to date with the current training records
+
+        Returns (action, new_rows): 'skip' when the records are unchanged, 'fine_tune'
+        when records were only added (new_rows are their positions), otherwise 'train'.
+        A different model/input config always means 'train'.
+        """
+        if saved is None or saved['metadata'].get('config') != config:
+            return 'train', np.arange(len(hashes))
+
+        known = np.isin(hashes, saved['hashes'])
+        if known.all() and len(np.unique(hashes)) == len(np.unique(saved['hashes'])):
+            return 'skip', np.empty(0, dtype=np.int64)
+        if np.isin(saved['hashes'], hashes).all():
+            return 'fine_tune', np.flatnonzero(~known)
+        return 'train', np.arange(len(hashes))
+
+    def save(self, name, model, tokenizer, hashes, metadata):
+        """Write model, tokenizer, record hashes and metadata, replacing the previous version"""
+        with replace_directory(self._path(name)) as staging:
+            model.save(os.path.join(staging, 'model.keras'))
+            with open(os.path.join(staging, 'tokenizer.json'), 'w') as f:
+                f.write(tokenizer.to_json())
+            np.save(os.path.join(staging, 'hashes.npy'), hashes)
+            with open(os.path.join(staging, 'metadata.json'), 'w') as f:
+                json.dump({**metadata, 'saved_at': datetime.now().isoformat(), 'records': int(len(hashes))}, f)
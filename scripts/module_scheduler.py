@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Module Scheduler for LatePlate Finder analytics scripts
+Runs analytics modules as a dependency graph, executing independent modules concurrently
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from process_pool import spawn_pool
+
+
+class ModuleScheduler:
+    def __init__(self, max_workers=None, executor='thread'):
+        """Create a scheduler backed by a thread or process pool"""
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor type: {executor}")
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = executor
+        self.modules = {}
+
+    def add(self, name, func, depends_on=()):
+        """Register a module and the modules whose results it needs first
+
+        With a process pool, func must be picklable (a top-level function, not a bound method
+        holding a database client).
+        """
+        self.modules[name] = {'func': func, 'depends_on': tuple(depends_on)}
+        return self
+
+    def run(self):
+        """Run every module once its dependencies are done and return results by name"""
+        for name, module in self.modules.items():
+            missing = [dep for dep in module['depends_on'] if dep not in self.modules]
+            if missing:
+                raise ValueError(f"Module {name} depends on unknown modules: {missing}")
+
+        pool_class = ThreadPoolExecutor if self.executor == 'thread' else spawn_pool
+        results = {}
+        pending = dict(self.modules)
+        running = {}
+
+        with pool_class(max_workers=self.max_workers) as pool:
+            while pending or running:
+                ready = [
+                    name for name, module in pending.items()
+                    if all(dep in results for dep in module['depends_on'])
+                ]
+
+                for name in ready:
+                    module = pending.pop(name)
+                    running[pool.submit(module['func'])] = name
+
+                if not running:
+                    raise ValueError(f"Dependency cycle between modules: {sorted(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        print(f"❌ Error in module {name}: {e}")
+                        results[name] = None
+
+        return results
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Process Pool Helpers for LatePlate Finder analytics scripts
+Spawn-context process pools and chunked fan-out for CPU-bound batch work
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def spawn_pool(max_workers=None):
+    """ProcessPoolExecutor whose workers are spawned, never forked
+
+    The analytics run from scheduler threads and may already hold TensorFlow, BLAS or
+    pymongo threads and locks; a forked child inherits them mid-state and can deadlock.
+    Spawned workers start clean and import only what the submitted function needs.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context('spawn')
+    )
+
+
+def map_chunks(func, items, chunk_size, max_workers=None):
+    """Concatenated func(chunk) results over consecutive chunk_size slices of items, in order
+
+    func must be a top-level function (or functools.partial of one) returning a list.
+    A single chunk, or a single worker, runs inline: it is cheaper than starting and
+    shipping data to worker processes.
+    """
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if len(chunks) <= 1 or max_workers == 1:
+        return [result for chunk in chunks for result in func(chunk)]
+
+    with spawn_pool(min(max_workers, len(chunks))) as pool:
+        return [result for results in pool.map(func, chunks) for result in results]
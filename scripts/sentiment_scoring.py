@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Sentiment Scoring Service for LatePlate Finder analytics scripts
+Scores comment polarity with TextBlob in parallel batches, caching scores by content hash
+"""
+
+import os
+import hashlib
+from pymongo import UpdateOne
+from textblob import TextBlob
+from process_pool import map_chunks
+
+
+def score_polarities(comments):
+    """Score a batch of comments (top-level so process pool workers can import it)"""
+    return [TextBlob(comment).sentiment.polarity for comment in comments]
+
+
+def comment_hash(comment):
+    return hashlib.sha256(comment.encode('utf-8')).hexdigest()
+
+
+class SentimentScorer:
+    def __init__(self, cache_collection=None, batch_size=500, max_workers=None):
+        """Score comments, reusing polarities cached in memory and in a Mongo collection"""
+        self.cache_collection = cache_collection
+        self.batch_size = batch_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._memory_cache = {}
+
+    def score(self, comments):
+        """Return polarity for every comment, only running TextBlob on unseen content"""
+        hashes = [comment_hash(comment) for comment in comments]
+        missing = {h: comment for h, comment in zip(hashes, comments) if h not in self._memory_cache}
+
+        if missing and self.cache_collection is not None:
+            self._load_cached(list(missing))
+            missing = {h: comment for h, comment in missing.items() if h not in self._memory_cache}
+
+        if missing:
+            new_scores = self._score_new(list(missing.keys()), list(missing.values()))
+            self._memory_cache.update(new_scores)
+            self._save_cached(new_scores)
+
+        return [self._memory_cache[h] for h in hashes]
+
+    def _load_cached(self, hashes):
+        for start in range(0, len(hashes), self.batch_size * 10):
+            chunk = hashes[start:start + self.batch_size * 10]
+            for doc in self.cache_collection.find({'_id': {'$in': chunk}}, {'polarity': 1}):
+                self._memory_cache[doc['_id']] = doc['polarity']
+
+    def _score_new(self, hashes, comments):
+        polarities = map_chunks(score_polarities, comments, self.batch_size, self.max_workers)
+        return dict(zip(hashes, polarities))
+
+    def _save_cached(self, scores):
+        if self.cache_collection is None or not scores:
+            return
+
+        operations = [
+            UpdateOne({'_id': h}, {'$setOnInsert': {'polarity': polarity}}, upsert=True)
+            for h, polarity in scores.items()
+        ]
+        for start in range(0, len(operations), self.batch_size * 10):
+            self.cache_collection.bulk_write(operations[start:start + self.batch_size * 10], ordered=False)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Streaming Sentiment Model for LatePlate Finder ML analytics
+HashingVectorizer + SGD classifier trained with partial_fit over feedback batches, checkpointed with joblib
+"""
+
+import os
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+
+SENTIMENT_LABELS = ['negative', 'neutral', 'positive']
+
+
+def rating_sentiment(rating):
+    """Same rating-derived label as the LSTM classifier (missing ratings count as neutral)"""
+    rating = 3 if rating is None else rating
+    return 0 if rating < 3 else 1 if rating == 3 else 2
+
+
+class StreamingSentimentModel:
+    def __init__(self, n_features=2 ** 20, alpha=1e-5, random_state=42):
+        """Memory use is fixed by n_features, independent of the vocabulary seen"""
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, ngram_range=(1, 2), alternate_sign=False, norm='l2'
+        )
+        self.classifier = SGDClassifier(loss='log_loss', alpha=alpha, random_state=random_state)
+        self.classes = np.arange(len(SENTIMENT_LABELS))
+        self.watermark = None  # LogWatermark.to_document() state of the feedback stream
+        self.records_trained = 0
+        self.progressive_correct = 0
+        self.progressive_total = 0
+
+    @property
+    def is_fitted(self):
+        return self.records_trained > 0
+
+    def partial_fit(self, texts, labels, watermark=None):
+        """Train on one batch, first scoring it so accuracy is always measured on unseen records"""
+        features = self.vectorizer.transform(texts)
+        labels = np.asarray(labels)
+
+        if self.is_fitted:
+            self.progressive_correct += int((self.classifier.predict(features) == labels).sum())
+            self.progressive_total += len(labels)
+
+        self.classifier.partial_fit(features, labels, classes=self.classes)
+        self.records_trained += len(labels)
+        if watermark is not None:
+            self.watermark = watermark
+
+    def predict(self, texts):
+        return self.classifier.predict(self.vectorizer.transform(texts))
+
+    @property
+    def progressive_accuracy(self):
+        return self.progressive_correct / self.progressive_total if self.progressive_total else None
+
+    def save(self, path):
+        """Checkpoint classifier weights and the stream position"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        joblib.dump(self, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        """Resume from a checkpoint, or start a new model when none exists"""
+        return joblib.load(path) if os.path.exists(path) else cls()
@@ -0,0 +1,63 @@
+"""
+Shared fixtures for the LatePlate Finder analytics script tests
+"""
+
+import importlib.util
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+
+import pymongo
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+
+def load_script(filename):
+    """Import a hyphenated script such as analytics-engine.py as a module"""
+    name = filename[:-3].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def analytics_engine():
+    return load_script('analytics-engine.py')
+
+
+@pytest.fixture(scope='session')
+def mongod(tmp_path_factory):
+    """Client for a throwaway mongod on a free local port (skips when mongod isn't installed)"""
+    binary = shutil.which('mongod')
+    if binary is None:
+        pytest.skip('mongod is not installed')
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    process = subprocess.Popen(
+        [binary, '--dbpath', str(tmp_path_factory.mktemp('mongod')), '--port', str(port), '--bind_ip', '127.0.0.1'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    client = pymongo.MongoClient('127.0.0.1', port, serverSelectionTimeoutMS=500)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                client.admin.command('ping')
+                break
+            except pymongo.errors.ServerSelectionTimeoutError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise
+        yield client
+    finally:
+        client.close()
+        process.terminate()
+        process.wait()
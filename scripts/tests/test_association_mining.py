@@ -0,0 +1,68 @@
+"""
+Eclat over packed bitmaps must find the same frequent itemsets and rules as brute-force counting
+"""
+
+import random
+from itertools import combinations
+
+import pytest
+
+from association_mining import build_item_bitmaps, mine_frequent_itemsets, association_rules
+
+
+def brute_force_itemsets(transactions, min_count, max_size):
+    items = sorted({item for transaction in transactions for item in transaction})
+    found = {}
+    for size in range(1, max_size + 1):
+        for itemset in combinations(items, size):
+            count = sum(1 for transaction in transactions if set(itemset) <= set(transaction))
+            if count >= min_count:
+                found[frozenset(itemset)] = count
+    return found
+
+
+def mine(transactions, min_count, max_size=3):
+    names, counts, bitmaps = build_item_bitmaps(transactions, min_count)
+    itemsets = mine_frequent_itemsets(bitmaps, counts, min_count, max_size)
+    return names, itemsets
+
+
+def test_bitmaps_keep_frequent_items_most_frequent_first():
+    transactions = [['rice', 'dal'], ['rice', 'ghee'], ['rice', 'dal', 'salt'], ['curd']]
+    names, counts, bitmaps = build_item_bitmaps(transactions, min_count=2)
+
+    assert names == ['rice', 'dal']
+    assert counts.tolist() == [3, 2]
+    # One bit per transaction, most significant bit first
+    assert bitmaps.shape == (2, 1)
+    assert bitmaps[:, 0].tolist() == [0b11100000, 0b10100000]
+
+
+def test_itemsets_match_brute_force_counts():
+    rng = random.Random(7)
+    pantry = ['onion', 'tomato', 'garlic', 'ginger', 'chilli', 'cumin', 'paneer', 'rice', 'dal', 'ghee']
+    # More than 8 transactions so bitmaps span several bytes, with a duplicated item inside one
+    transactions = [rng.sample(pantry, rng.randint(1, 6)) for _ in range(61)] + [['onion', 'onion', 'garlic']]
+
+    names, itemsets = mine(transactions, min_count=6)
+    mined = {frozenset(names[i] for i in itemset): count for itemset, count in itemsets.items()}
+
+    assert mined == brute_force_itemsets(transactions, min_count=6, max_size=3)
+
+
+def test_rules_report_support_confidence_and_lift():
+    transactions = [['rice', 'dal']] * 3 + [['rice']] + [['dal', 'ghee']] + [['ghee']] * 3
+    names, itemsets = mine(transactions, min_count=1, max_size=2)
+    rules = {
+        (tuple(names[i] for i in rule['antecedent']), names[rule['consequent']]): rule
+        for rule in association_rules(itemsets, len(transactions), min_confidence=0.5)
+    }
+
+    rice_to_dal = rules[(('rice',), 'dal')]
+    assert rice_to_dal['support'] == pytest.approx(3 / 8)
+    assert rice_to_dal['confidence'] == pytest.approx(3 / 4)
+    assert rice_to_dal['lift'] == pytest.approx((3 / 4) / (4 / 8))
+    # dal -> ghee has confidence 1/4 and is dropped
+    assert (('dal',), 'ghee') not in rules
+    lifts = [rule['lift'] for rule in association_rules(itemsets, len(transactions), min_confidence=0.0)]
+    assert lifts == sorted(lifts, reverse=True)
@@ -0,0 +1,56 @@
+"""
+Partitioned demand models must recover the hour-of-week rates the data was drawn from
+"""
+
+import numpy as np
+
+from demand_partitions import HOURS_PER_WEEK, hour_of_week, fit_partition, train_partitions
+
+# Monday 2024-01-01 00:00 UTC in hours since the epoch
+MONDAY = 473352
+
+
+def late_night_rates():
+    """20 per hour at 22:00-23:59, 1 per hour otherwise, every day of the week"""
+    hours = np.arange(HOURS_PER_WEEK) % 24
+    return np.where(hours >= 22, 20.0, 1.0)
+
+
+def sample_partition(rng, rates, weeks=26):
+    epoch_hours = MONDAY + np.arange(weeks * HOURS_PER_WEEK)
+    counts = rng.poisson(rates[hour_of_week(epoch_hours)])
+    # Only hours with activity are reported, as the rollup does
+    active = counts > 0
+    return epoch_hours[active], counts[active]
+
+
+def test_hour_of_week_starts_on_monday():
+    assert hour_of_week([MONDAY, MONDAY + 23, MONDAY + 24, MONDAY + HOURS_PER_WEEK - 1]).tolist() == [0, 23, 24, 167]
+
+
+def test_fit_partition_recovers_slot_rates():
+    rates = late_night_rates()
+    epoch_hours, counts = sample_partition(np.random.default_rng(0), rates)
+
+    key, forecast, stats = fit_partition('Bengaluru', epoch_hours, counts)
+
+    assert key == 'Bengaluru'
+    assert forecast.shape == (HOURS_PER_WEEK,)
+    np.testing.assert_allclose(forecast, rates, rtol=0.35, atol=1.0)
+    late = np.arange(HOURS_PER_WEEK) % 24 >= 22
+    assert forecast[late].mean() > 15 and forecast[~late].mean() < 1.5
+    # Zero-filled from the first to the last active hour
+    assert stats['hours_observed'] == int(epoch_hours.max() - epoch_hours.min() + 1)
+    # Holdout error close to the Poisson noise floor (sqrt of the mean rate)
+    assert stats['rmse'] < 1.2 * np.sqrt(rates.mean())
+
+
+def test_train_partitions_keeps_partition_order():
+    rng = np.random.default_rng(1)
+    rates = late_night_rates()
+    partitions = [(city, *sample_partition(rng, rates * scale, weeks=4)) for city, scale in [('a', 1), ('b', 3), ('c', 0.5)]]
+
+    results = train_partitions(partitions, max_workers=1, chunk_size=2)
+
+    assert [key for key, _, _ in results] == ['a', 'b', 'c']
+    assert results[1][1][22] > results[0][1][22] > results[2][1][22]
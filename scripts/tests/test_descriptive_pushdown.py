@@ -0,0 +1,63 @@
+"""
+The aggregation-pipeline backend must return exactly what the Python scan returns
+"""
+
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+
+def seed_search_logs(db):
+    users = [{'_id': ObjectId(), 'preferences': {}} for _ in range(5)]
+    db.users.insert_many(users)
+
+    start = datetime(2024, 1, 30, 21, 0)
+    # Non-ASCII case variants only merge under Unicode-aware lowercasing
+    queries = ['Biryani', 'biryani', 'Pizza', 'dosa', 'Paneer Tikka', '', 'ÉCLAIR', 'éclair', 'Çiğ Köfte', 'çiğ köfte', 'Éclair']
+    logs = []
+    for i in range(240):
+        timestamp = start + timedelta(minutes=47 * i)
+        # Every stored form: BSON dates, 'Z'-suffixed and UTC-offset ISO strings
+        stored = [
+            timestamp,
+            timestamp.isoformat() + 'Z',
+            (timestamp + timedelta(hours=5, minutes=30)).isoformat() + '+05:30'
+        ][i % 3]
+        log = {
+            '_id': ObjectId.from_datetime(timestamp),
+            'type': ['recipe', 'restaurant', 'cuisine'][i % 3],
+            'query': queries[i % len(queries)],
+            'timestamp': stored
+        }
+        if i % 7:
+            # Registered users get 1-9, 10-19 and 20+ searches; one id is unregistered
+            user_index = [0] * 25 + [1] * 12 + [2] * 3 + [3] * 1
+            log['user_id'] = str(users[user_index[i % len(user_index)]]['_id']) if i % 11 else 'guest'
+        if i % 13 == 0:
+            del log['type']
+        if i % 17 == 0:
+            log['timestamp'] = ''
+        if i % 19 == 0:
+            del log['timestamp']
+        if i % 23 == 5:
+            log['timestamp'] = 'not a timestamp'
+        logs.append(log)
+
+    db.search_logs.insert_many(logs)
+    return users
+
+
+def test_pushdown_matches_fused_scan(mongod, analytics_engine):
+    db = mongod['pushdown_test']
+    users = seed_search_logs(db)
+
+    engine = analytics_engine.LatePlateAnalyticsEngine()
+    engine._db = db
+
+    pushdown = engine._pushdown_search_analytics(users)
+    fused = engine._fused_search_log_scan(db.search_logs.find({}).sort('_id', 1), users)
+
+    assert pushdown['search_behavior'] == fused['search_behavior']
+    assert pushdown['temporal_patterns'] == fused['temporal_patterns']
+    assert pushdown['user_engagement'] == fused['user_engagement']
+    assert sum(pushdown['user_engagement']['engagement_distribution'].values()) == len(users)
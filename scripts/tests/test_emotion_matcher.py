@@ -0,0 +1,51 @@
+"""
+EmotionMatcher must find exactly the emotions a plain substring search would
+"""
+
+import json
+import random
+
+
+def substring_emotions(lexicon, text):
+    text = text.lower()
+    return {emotion for emotion, keywords in lexicon.items() if any(keyword.lower() in text for keyword in keywords)}
+
+
+def test_detects_default_emotions_case_insensitively(analytics_engine):
+    matcher = analytics_engine.EmotionMatcher()
+
+    assert matcher.detect('WOW, the biryani was AMAZING but delivery was the worst') == {'surprise', 'joy', 'anger'}
+    assert matcher.detect('Looking forward to ordering again') == {'anticipation'}
+    assert matcher.detect('') == set()
+    assert matcher.detect(None) == set()
+
+
+def test_keywords_inside_longer_keywords_still_count(analytics_engine):
+    lexicon = {'praise': ['great'], 'hunger': ['eat'], 'plans': ['looking forward'], 'direction': ['forward']}
+    matcher = analytics_engine.EmotionMatcher(lexicon)
+
+    assert matcher.detect('a great meal') == {'praise', 'hunger'}
+    assert matcher.detect('looking forward to it') == {'plans', 'direction'}
+    assert matcher.detect('eat in, go forward') == {'hunger', 'direction'}
+
+
+def test_matches_substring_search_on_random_comments(analytics_engine):
+    lexicon = analytics_engine.EmotionMatcher.DEFAULT_LEXICON
+    matcher = analytics_engine.EmotionMatcher()
+    words = [keyword for keywords in lexicon.values() for keyword in keywords] + ['the', 'food', 'was', 'un', 'ly', 'x']
+    rng = random.Random(0)
+
+    for _ in range(500):
+        text = rng.choice([' ', '']).join(rng.choice(words) for _ in range(rng.randint(0, 8)))
+        assert matcher.detect(text) == substring_emotions(lexicon, text), text
+
+
+def test_lexicon_file_and_empty_keywords(analytics_engine, tmp_path):
+    path = tmp_path / 'lexicon.json'
+    path.write_text(json.dumps({'comfort': ['Warm', 'cozy'], 'empty': ['']}), encoding='utf-8')
+    matcher = analytics_engine.EmotionMatcher.from_file(str(path))
+
+    assert matcher.emotions == ['comfort', 'empty']
+    assert matcher.detect('A warm bowl of dal') == {'comfort'}
+
+    assert analytics_engine.EmotionMatcher({'empty': ['']}).detect('anything') == set()
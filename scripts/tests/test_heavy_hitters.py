@@ -0,0 +1,94 @@
+"""
+HeavyHitters: exact counts, Space-Saving eviction, error bounds and distinct estimates
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+def test_exact_mode_counts_and_ranks(analytics_engine):
+    counter = analytics_engine.HeavyHitters()
+    for item in ['dosa', 'idli', 'dosa', 'vada', 'dosa', 'idli']:
+        counter.add(item)
+
+    assert counter.top(2) == [('dosa', 3), ('idli', 2)]
+    assert counter.distinct() == 3
+    assert counter.bounds() == {'mode': 'exact', 'error_bound': 0}
+
+
+def test_unknown_mode_is_rejected(analytics_engine):
+    with pytest.raises(ValueError):
+        analytics_engine.HeavyHitters(mode='sampled')
+
+
+def test_space_saving_evicts_the_minimum_and_inherits_its_count(analytics_engine):
+    counter = analytics_engine.HeavyHitters(mode='approximate', capacity=2)
+    counter.add('dosa', 3)
+    counter.add('idli', 2)
+    counter.add('vada')
+
+    assert set(counter.counts) == {'dosa', 'vada'}
+    assert counter.counts['vada'] == 3 and counter.errors['vada'] == 2
+    # The sketch tightens the inherited count back toward the true one
+    assert 1 <= counter.estimate('vada') <= 3
+    assert counter.top(1) == [('dosa', 3)]
+
+
+def test_heavy_items_survive_churn_within_the_error_bound(analytics_engine):
+    counter = analytics_engine.HeavyHitters(mode='approximate', capacity=20)
+    for i in range(2000):
+        counter.add(f"rare-{i}")
+        if i % 4 == 0:
+            counter.add('biryani')
+        if i % 10 == 0:
+            counter.add('pizza')
+
+    top = dict(counter.top(2))
+    assert list(top) == ['biryani', 'pizza']
+    assert 500 <= top['biryani'] <= 500 + counter.error_bound()
+    assert 200 <= top['pizza'] <= 200 + counter.error_bound()
+    assert len(counter.counts) == 20
+
+    bounds = counter.bounds()
+    assert bounds['mode'] == 'approximate'
+    assert 0 < bounds['error_bound'] <= counter.total / 20
+
+
+def test_distinct_estimate_in_approximate_mode(analytics_engine):
+    counter = analytics_engine.HeavyHitters(mode='approximate', capacity=10)
+    for i in range(800):
+        counter.add(f"query-{i}")
+        counter.add(f"query-{i % 50}")
+
+    assert counter.distinct() == pytest.approx(800, rel=0.1)
+
+
+@pytest.mark.parametrize('n', [20000, 100000])
+def test_distinct_estimate_well_above_the_sketch_width(analytics_engine, n):
+    counter = analytics_engine.HeavyHitters(mode='approximate', capacity=10)
+    for i in range(n):
+        counter.add(f"city-{i}")
+
+    assert n > 7 * counter.width
+    assert counter.distinct() == pytest.approx(n, rel=0.05)
+
+
+def test_estimates_do_not_depend_on_the_hash_seed():
+    script = (
+        "from conftest import load_script\n"
+        "counter = load_script('analytics-engine.py').HeavyHitters(mode='approximate', capacity=5, eps=0.05)\n"
+        "for i in range(3000):\n"
+        "    counter.add(f'q{i % 97}', 1 + i % 3)\n"
+        "print(counter.top(5), counter.distinct(), counter.sketch.sum(axis=1).tolist(), counter.sketch[:, :8].tolist())\n"
+    )
+    outputs = {
+        subprocess.run(
+            [sys.executable, '-c', script], cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**os.environ, 'PYTHONHASHSEED': seed}, capture_output=True, text=True, check=True
+        ).stdout
+        for seed in ('1', '2')
+    }
+    assert len(outputs) == 1
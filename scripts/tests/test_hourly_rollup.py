@@ -0,0 +1,75 @@
+"""
+Hourly rollups must count every raw document exactly once, even when a refresh is interrupted
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from hourly_rollup import HourlyRollup
+from increment_journal import IncrementJournal
+
+
+def seed_activities(db, n=50):
+    start = datetime(2024, 4, 5, 22, 10)
+    db.userActivities.insert_many([
+        {
+            'type': ['viewed', 'searched'][i % 2],
+            'metadata': {'city': 'Chennai' if i % 3 == 0 else 'Pune'},
+            'timestamp': start + timedelta(minutes=7 * i)
+        }
+        for i in range(n)
+    ])
+
+
+def expected_counts(db):
+    counts = {}
+    for doc in db.userActivities.find():
+        key = (doc['timestamp'].replace(minute=0, second=0, microsecond=0), doc['type'], doc['metadata']['city'])
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def table_counts(rollup):
+    table = rollup.table()
+    return {
+        (row.hour.tz_convert(None).to_pydatetime(), row.type, row.city): int(row.count)
+        for row in table.itertuples()
+    }
+
+
+def test_refresh_counts_new_documents_once(mongod):
+    db = mongod['rollup_refresh_test']
+    seed_activities(db)
+    rollup = HourlyRollup(db, 'userActivities', batch_size=16)
+
+    assert rollup.refresh() == 50
+    assert rollup.refresh() == 0
+    db.userActivities.insert_one({'type': 'viewed', 'metadata': {'city': 'Pune'}, 'timestamp': datetime(2024, 4, 6, 3, 5)})
+    assert rollup.refresh() == 1
+
+    assert table_counts(rollup) == expected_counts(db)
+
+
+def test_interrupted_refresh_is_retried_without_double_counting(mongod, monkeypatch):
+    db = mongod['rollup_retry_test']
+    seed_activities(db)
+    rollup = HourlyRollup(db, 'userActivities', batch_size=16)
+
+    finish = IncrementJournal._finish
+    calls = []
+    def crash_on_second_batch(self, batch_id, state):
+        calls.append(batch_id)
+        if len(calls) == 2:
+            raise RuntimeError('crashed before saving the watermark')
+        return finish(self, batch_id, state)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(IncrementJournal, '_finish', crash_on_second_batch)
+        with pytest.raises(RuntimeError):
+            rollup.refresh()
+
+    HourlyRollup(db, 'userActivities', batch_size=16).refresh()
+
+    assert table_counts(rollup) == expected_counts(db)
+    assert 'pending_batch' not in db.rollup_state.find_one({'_id': 'userActivities'})
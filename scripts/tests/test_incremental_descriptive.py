@@ -0,0 +1,102 @@
+"""
+Incremental descriptive counters must count every log exactly once, even across failed runs
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from increment_journal import IncrementJournal
+
+
+def seed_logs(db, searches=200, locations=20):
+    start = datetime(2024, 2, 1, 20, 0)
+    db.users.insert_one({'_id': ObjectId(), 'preferences': {}})
+    db.search_logs.insert_many([
+        {'type': 'recipe', 'query': f"dish {i % 7}", 'timestamp': start + timedelta(minutes=i)}
+        for i in range(searches)
+    ])
+    db.location_logs.insert_many([
+        {'address': 'Indiranagar, Bengaluru, Karnataka, India', 'source': 'manual', 'latitude': 12.97, 'longitude': 77.64}
+        for _ in range(locations)
+    ])
+
+
+def incremental_engine(analytics_engine, db):
+    engine = analytics_engine.LatePlateAnalyticsEngine(incremental=True)
+    engine._db = db
+    return engine
+
+
+def test_failed_run_is_retried_without_double_counting(mongod, analytics_engine, monkeypatch):
+    db = mongod['incremental_retry_test']
+    seed_logs(db)
+    engine = incremental_engine(analytics_engine, db)
+
+    accumulate = engine._accumulate_location_logs
+    def fail_location_scan(state, logs):
+        raise RuntimeError('location scan failed')
+    monkeypatch.setattr(engine, '_accumulate_location_logs', fail_location_scan)
+    assert engine.descriptive_analytics() is None
+
+    monkeypatch.setattr(engine, '_accumulate_location_logs', accumulate)
+    analytics = engine.descriptive_analytics()
+    assert analytics['search_behavior']['total_searches'] == 200
+    assert analytics['location_patterns']['total_locations'] == 20
+
+    db.search_logs.insert_one({'type': 'cuisine', 'query': 'dosa', 'timestamp': datetime(2024, 2, 2)})
+    analytics = engine.descriptive_analytics()
+    assert analytics['search_behavior']['total_searches'] == 201
+    assert analytics['search_behavior']['search_types'] == {'recipe': 200, 'cuisine': 1}
+
+
+def test_commit_interrupted_after_the_counters_is_not_reapplied(mongod, analytics_engine, monkeypatch):
+    db = mongod['incremental_finish_test']
+    seed_logs(db)
+    engine = incremental_engine(analytics_engine, db)
+
+    def crash(self, batch_id, state):
+        raise RuntimeError('crashed before saving the watermarks')
+    with monkeypatch.context() as patch:
+        patch.setattr(IncrementJournal, '_finish', crash)
+        assert engine.descriptive_analytics() is None
+
+    analytics = engine.descriptive_analytics()
+    assert analytics['search_behavior']['total_searches'] == 200
+    assert analytics['location_patterns']['total_locations'] == 20
+
+
+class FailingCollection:
+    """Collection whose second bulk_write raises, as a crash halfway through a batch would"""
+    def __init__(self, collection):
+        self.collection = collection
+        self.calls = 0
+
+    def bulk_write(self, operations, ordered=True):
+        self.calls += 1
+        if self.calls == 2:
+            raise RuntimeError('crashed mid-batch')
+        return self.collection.bulk_write(operations, ordered=ordered)
+
+
+def test_journal_replays_a_partially_applied_batch_once(mongod):
+    db = mongod['increment_journal_test']
+    increments = {f"key{i}": ({'value': i + 1}, {'label': f"k{i}"}) for i in range(5)}
+
+    journal = IncrementJournal(db, 'counters', 'state', {'_id': 'counters'}, chunk_size=2)
+    journal.target = FailingCollection(db.counters)
+    with pytest.raises(RuntimeError):
+        journal.commit(increments, {'position': 5})
+    assert db.counters.count_documents({}) == 2
+    assert db.state.find_one({'_id': 'counters'}).get('position') is None
+
+    journal = IncrementJournal(db, 'counters', 'state', {'_id': 'counters'}, chunk_size=2)
+    journal.recover()
+    journal.recover()
+
+    assert {doc['_id']: doc['value'] for doc in db.counters.find()} == {f"key{i}": i + 1 for i in range(5)}
+    assert {doc['label'] for doc in db.counters.find()} == {f"k{i}" for i in range(5)}
+    state = db.state.find_one({'_id': 'counters'})
+    assert state['position'] == 5 and 'pending_batch' not in state
+    assert db.increment_journal.count_documents({}) == 0
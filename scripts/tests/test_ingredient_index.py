@@ -0,0 +1,58 @@
+"""
+Ingredient normalization, and lookups through the posting-list index
+"""
+
+import pytest
+
+from ingredient_index import normalize_ingredient, recipe_ingredients, IngredientVocabulary, IngredientIndex
+
+
+@pytest.mark.parametrize('ingredient, name', [
+    ('1 cup Kabuli Chana (White Chickpeas) - boiled', 'kabuli chana'),
+    ('1/2 teaspoon Turmeric powder (Haldi)', 'turmeric powder'),
+    ('1 1/2 cups Basmati Rice, soaked', 'basmati rice'),
+    ('2-3 Green Chillies, slit', 'green chillies'),
+    ('½ cup Curd', 'curd'),
+    ('2 tsp. Red chilli powder', 'red chilli powder'),
+    ('3 cloves Garlic', 'garlic'),
+    ('1 Large Onion, finely chopped', 'onion'),
+    ('Salt to taste', 'salt'),
+    ('Coriander leaves for garnish', 'coriander leaves'),
+    ('Water as required', 'water'),
+    ('  Onion  ', 'onion'),
+    ('(optional)', ''),
+])
+def test_normalize_ingredient(ingredient, name):
+    assert normalize_ingredient(ingredient) == name
+
+
+@pytest.mark.parametrize('ingredient, name', [
+    ('Gram flour (besan)', 'gram flour'),
+    ('100 g Gram Dal', 'gram dal'),
+    ('4 Cloves', 'cloves'),
+])
+def test_unit_words_are_kept_without_a_quantity(ingredient, name):
+    assert normalize_ingredient(ingredient) == name
+
+
+def test_recipe_ingredients_reads_either_field_and_dedupes():
+    assert recipe_ingredients({'Ingredients': ['1 cup Rice', '2 cups rice, washed', None, 'Salt to taste']}) == {'rice', 'salt'}
+    assert recipe_ingredients({'ingredients': 'Ghee, 1 tsp Cumin'}) == {'ghee', 'cumin'}
+    assert recipe_ingredients({'Ingredients': None}) == set()
+
+
+def test_index_finds_recipes_containing_and_cookable():
+    recipes = {
+        'dal-tadka': {'dal', 'ghee', 'cumin'},
+        'jeera-rice': {'rice', 'ghee', 'cumin'},
+        'plain-rice': {'rice'},
+    }
+    vocabulary = IngredientVocabulary()
+    index = IngredientIndex.build(
+        list(recipes), [vocabulary.encode(sorted(names)) for names in recipes.values()], len(vocabulary)
+    )
+
+    assert index.containing(vocabulary.lookup(['ghee', 'cumin'])) == ['dal-tadka', 'jeera-rice']
+    assert index.containing(vocabulary.lookup(['rice', 'dal'])) == []
+    assert index.cookable(vocabulary.lookup(['rice', 'ghee']), max_missing=1) == [('plain-rice', 0), ('jeera-rice', 1)]
+    assert index.cookable(vocabulary.lookup(['saffron'])) == []
@@ -0,0 +1,72 @@
+"""
+LogWatermark must read every document once, including ones that commit behind the watermark
+"""
+
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from log_watermark import LogWatermark
+
+START = datetime(2024, 3, 1, 22, 0)
+
+
+def object_id(seconds, suffix):
+    """ObjectId generated `seconds` after START; suffix keeps ids from the same second distinct"""
+    return ObjectId(ObjectId.from_datetime(START + timedelta(seconds=seconds)).binary[:4] + suffix.to_bytes(8, 'big'))
+
+
+def read(watermark, collection):
+    """Run a scan the way the stores do: filter with query(), then drop already-read ids"""
+    return [doc['_id'] for doc in watermark.new_documents(doc for doc in collection if watermark.matches(doc['_id']))]
+
+
+def test_first_scan_reads_everything_and_advances():
+    collection = [{'_id': object_id(i, i)} for i in range(5)]
+    watermark = LogWatermark()
+
+    assert watermark.query() == {}
+    assert read(watermark, collection) == [doc['_id'] for doc in collection]
+    assert watermark.last_id == collection[-1]['_id']
+
+
+def test_rescan_skips_documents_already_read():
+    collection = [{'_id': object_id(i, i)} for i in range(5)]
+    watermark = LogWatermark()
+    read(watermark, collection)
+
+    assert read(watermark, collection) == []
+
+
+def test_late_commit_inside_the_window_is_read_once():
+    collection = [{'_id': object_id(0, 1)}, {'_id': object_id(30, 2)}]
+    watermark = LogWatermark(window_seconds=60)
+    read(watermark, collection)
+
+    # Generated before the last read id but committed after the scan
+    late = {'_id': object_id(10, 3)}
+    collection.append(late)
+
+    assert watermark.query() == {'_id': {'$gte': ObjectId.from_datetime(START + timedelta(seconds=-30))}}
+    assert read(watermark, collection) == [late['_id']]
+    assert read(watermark, collection) == []
+
+
+def test_document_round_trip_keeps_only_the_window():
+    watermark = LogWatermark(window_seconds=60)
+    read(watermark, [{'_id': object_id(0, 1)}, {'_id': object_id(100, 2)}, {'_id': object_id(130, 3)}])
+
+    document = watermark.to_document()
+    restored = LogWatermark.from_document(document, window_seconds=60)
+
+    assert restored.last_id == object_id(130, 3)
+    assert restored.recent == {object_id(100, 2), object_id(130, 3)}
+    assert LogWatermark.from_document(None).query() == {}
+
+
+def test_non_object_ids_fall_back_to_greater_than():
+    watermark = LogWatermark()
+    assert [doc['_id'] for doc in watermark.new_documents({'_id': i} for i in (1, 2, 3))] == [1, 2, 3]
+
+    assert watermark.query() == {'_id': {'$gt': 3}}
+    assert watermark.matches(4) and not watermark.matches(3)
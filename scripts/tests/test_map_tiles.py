@@ -0,0 +1,31 @@
+"""
+Location tiles: Web-Mercator z/x/y binning at every zoom level, skipping unlocated points
+"""
+
+import numpy as np
+
+
+def tile_counts(analytics_engine, points):
+    engine = analytics_engine.LatePlateAnalyticsEngine()
+    lat, lng = (np.array(values, dtype=float) for values in zip(*points))
+    return engine._tile_counts(lat, lng)
+
+
+def test_points_are_binned_at_every_zoom_level(analytics_engine):
+    bengaluru, chennai = (12.9716, 77.5946), (13.0827, 80.2707)
+    counts = tile_counts(analytics_engine, [bengaluru, bengaluru, chennai])
+
+    # Both cities share one zoom-4 tile and split apart by zoom 8
+    assert counts['4/11/7'] == 3
+    assert counts['8/183/118'] == 2 and counts['8/185/118'] == 1
+    assert sum(count for key, count in counts.items() if key.startswith('12/')) == 3
+
+
+def test_unlocated_and_non_finite_points_are_skipped(analytics_engine):
+    counts = tile_counts(analytics_engine, [
+        (12.9716, 77.5946), (0, 0), (np.nan, 77.59), (12.97, np.nan), (np.inf, 10.0), (12.97, -np.inf)
+    ])
+
+    assert {key.split('/')[0]: count for key, count in counts.items()} == {'4': 1, '8': 1, '12': 1}
+    assert not any(key.endswith('/0/0') for key in counts)
+    assert tile_counts(analytics_engine, [(np.nan, np.nan)]) == {}
@@ -0,0 +1,77 @@
+"""
+CPU smoke run of the Keras text models: train, reuse, fine-tune, retrain and predict
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+
+from conftest import load_script
+
+WORDS = ['paneer', 'masala', 'spicy', 'sweet', 'rice', 'dal', 'chicken', 'curry',
+         'fresh', 'bland', 'great', 'awful', 'okay', 'tasty']
+
+
+def make_recipes(rng, n, start=0):
+    return pd.DataFrame({
+        '_id': [f'r{i}' for i in range(start, start + n)],
+        'name': [' '.join(rng.choice(WORDS, 3)) for _ in range(n)],
+        'Ingredients': [[f'1 cup {w}' for w in rng.choice(WORDS, int(rng.integers(1, 30)))] for _ in range(n)],
+        'cuisine': 'indian',
+        'tags': [['quick']] * n,
+        'rating': rng.uniform(1, 5, n).round(1)
+    })
+
+
+def make_feedback(rng, n, start=0):
+    return pd.DataFrame({
+        '_id': [f'f{i}' for i in range(start, start + n)],
+        # Includes empty messages, which still have to reach the conv layers at min_length
+        'message': [' '.join(rng.choice(WORDS, int(rng.integers(0, 60)))) for _ in range(n)],
+        'rating': rng.integers(1, 6, n)
+    })
+
+
+def test_predict_keeps_input_order():
+    text_pipeline = load_script('text_pipeline.py')
+    sequences = [np.arange(1, length + 1, dtype=np.int32) for length in (5, 1, 9, 3, 7)]
+    inputs = tf.keras.Input(shape=(None,), dtype='int32')
+    lengths = tf.keras.layers.Lambda(
+        lambda x: tf.reduce_sum(tf.cast(x > 0, 'float32'), axis=1, keepdims=True)
+    )(inputs)
+    model = tf.keras.Model(inputs, lengths)
+
+    predictions = text_pipeline.predict(model, sequences, batch_size=2)
+    assert predictions[:, 0].tolist() == [5, 1, 9, 3, 7]
+
+
+def test_text_models_train_reuse_fine_tune_and_retrain(tmp_path):
+    advanced_ml = load_script('advanced-ml-analytics.py')
+    rng = np.random.default_rng(0)
+    ml = advanced_ml.LatePlateMLAnalytics(model_dir=str(tmp_path / 'models'))
+    saved = {}
+    ml.save_ml_results = lambda analysis_type, results: saved.__setitem__(analysis_type, results)
+
+    def run():
+        ml.recipe_recommendation_deep_learning()
+        ml.sentiment_analysis_deep_learning()
+        return (saved['deep_learning_recommendations']['training_action'],
+                saved['sentiment_analysis']['training_action'])
+
+    ml.recipes_df = make_recipes(rng, 40)
+    ml.feedback_df = make_feedback(rng, 40)
+    assert run() == ('train', 'train')
+    assert run() == ('skip', 'skip')
+
+    ml.recipes_df = pd.concat([ml.recipes_df, make_recipes(rng, 8, 40)], ignore_index=True)
+    ml.feedback_df = pd.concat([ml.feedback_df, make_feedback(rng, 8, 40)], ignore_index=True)
+    assert run() == ('fine_tune', 'fine_tune')
+
+    ml.recipes_df.loc[0, 'rating'] = 6 - ml.recipes_df.loc[0, 'rating']
+    ml.feedback_df.loc[0, 'rating'] = 1 if ml.feedback_df.loc[0, 'rating'] == 3 else 6 - ml.feedback_df.loc[0, 'rating']
+    assert run() == ('train', 'train')
+
+    assert sum(saved['sentiment_analysis']['sentiment_distribution'].values()) == len(ml.feedback_df)
+    assert saved['deep_learning_recommendations']['top_recommendations']
@@ -0,0 +1,62 @@
+"""
+The user feature store must fold logs in once, count distinct locations, and survive an interrupted save
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from user_feature_store import UserFeatureStore
+
+
+# (user, area) per log: u0 visits 4 places, u1 2 and u2 1, with repeats
+VISITS = [('u0', 0), ('u0', 1), ('u1', 0), ('u0', 2), ('u2', 3), ('u0', 3), ('u1', 1), ('u0', 0)] * 8
+
+
+def seed_location_logs(db):
+    start = datetime(2024, 5, 1, 21, 0)
+    db.location_logs.insert_many([
+        {
+            'user_id': user_id,
+            'type': 'manual',
+            'address': f"Area {area}, Pune, Maharashtra, India",
+            'timestamp': start + timedelta(minutes=13 * i)
+        }
+        for i, (user_id, area) in enumerate(VISITS)
+    ])
+
+
+def test_distinct_locations_across_batches_and_refreshes(mongod, tmp_path):
+    db = mongod['feature_store_pairs_test']
+    seed_location_logs(db)
+    store = UserFeatureStore(db, str(tmp_path / 'store'), batch_size=7)
+
+    store.refresh()
+    db.location_logs.insert_one({'user_id': 'u2', 'address': 'Area 9, Pune, Maharashtra, India', 'timestamp': datetime(2024, 5, 2)})
+    store.refresh()
+
+    frame = store.frame(['u0', 'u1', 'u2', 'nobody'])
+    assert frame['distinct_locations'].tolist()[:3] == [4, 2, 2]
+    assert frame['location_count'].tolist()[:3] == [
+        db.location_logs.count_documents({'user_id': user_id}) for user_id in ('u0', 'u1', 'u2')
+    ]
+    assert pd.isna(frame.loc['nobody', 'location_count'])
+
+    reopened = UserFeatureStore(db, str(tmp_path / 'store'), batch_size=7).frame(['u0', 'u1', 'u2'])
+    assert reopened['distinct_locations'].tolist() == [4, 2, 2]
+
+
+def test_reopens_the_previous_version_after_a_crashed_swap(mongod, tmp_path):
+    db = mongod['feature_store_swap_test']
+    seed_location_logs(db)
+    path = str(tmp_path / 'store')
+    UserFeatureStore(db, path).refresh()
+
+    # A crash between replace_directory's two renames leaves only '<path>.old'
+    os.replace(path, f"{path}.old")
+
+    store = UserFeatureStore(db, path)
+    assert os.path.isdir(path) and not os.path.exists(f"{path}.old")
+    assert store.refresh() == {'search_logs': 0, 'location_logs': 0, 'userActivities': 0}
+    assert store.frame(['u0'])['location_count'].tolist() == [db.location_logs.count_documents({'user_id': 'u0'})]
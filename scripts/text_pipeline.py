@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Text Input Pipeline for LatePlate Finder ML analytics
+Tokenization and length-bucketed tf.data batches, so Keras text models only pad to each batch's longest text
+"""
+
+import numpy as np
+import tensorflow as tf
+
+
+def tokenize(tokenizer, texts, maxlen, min_length=1):
+    """Token id arrays, truncated to the last maxlen tokens like pad_sequences
+
+    Sequences shorter than min_length are zero-padded so convolution/pooling layers always get valid input.
+    Tokenization runs inline: it is a small share of training time, and worker processes
+    would each have to import TensorFlow to unpickle the tokenizer.
+    """
+    result = []
+    for seq in tokenizer.texts_to_sequences(texts):
+        seq = np.asarray(seq[-maxlen:], dtype=np.int32)
+        if len(seq) < min_length:
+            seq = np.pad(seq, (0, min_length - len(seq)))
+        result.append(seq)
+    return result
+
+
+def bucket_boundaries(maxlen, min_length=1):
+    """Powers of two between min_length and maxlen"""
+    boundaries = []
+    boundary = 8
+    while boundary < maxlen:
+        if boundary > min_length:
+            boundaries.append(boundary)
+        boundary *= 2
+    return boundaries
+
+
+def _dataset(sequences, targets, rows):
+    output_signature = (
+        tf.TensorSpec(shape=(None,), dtype=tf.int32),
+        tf.TensorSpec(shape=(), dtype=tf.as_dtype(targets.dtype))
+    )
+    return tf.data.Dataset.from_generator(
+        lambda: ((sequences[i], targets[i]) for i in rows), output_signature=output_signature
+    )
+
+
+def training_dataset(sequences, targets, rows, batch_size, maxlen, min_length=1, shuffle=True, seed=42):
+    """Shuffled, length-bucketed, dynamically padded and prefetched batches of (sequence, target)"""
+    dataset = _dataset(sequences, np.asarray(targets), rows)
+    if shuffle:
+        dataset = dataset.shuffle(min(len(rows), 10000), seed=seed, reshuffle_each_iteration=True)
+
+    boundaries = bucket_boundaries(maxlen, min_length)
+    dataset = dataset.bucket_by_sequence_length(
+        element_length_func=lambda sequence, target: tf.shape(sequence)[0],
+        bucket_boundaries=boundaries,
+        bucket_batch_sizes=[batch_size] * (len(boundaries) + 1)
+    )
+    return dataset.prefetch(tf.data.AUTOTUNE)
+
+
+def predict(model, sequences, batch_size=256):
+    """Predictions in input order, batching length-sorted sequences to keep padding minimal"""
+    order = np.argsort([len(seq) for seq in sequences], kind='stable')
+    dataset = tf.data.Dataset.from_generator(
+        lambda: (sequences[i] for i in order),
+        output_signature=tf.TensorSpec(shape=(None,), dtype=tf.int32)
+    ).padded_batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+    sorted_predictions = model.predict(dataset, verbose=0)
+    predictions = np.empty_like(sorted_predictions)
+    predictions[order] = sorted_predictions
+    return predictions
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+User Feature Store for LatePlate Finder analytics scripts
+Per-user activity aggregates in a columnar table keyed by a dense user index, persisted to disk and updated incrementally
+"""
+
+import os
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from bson import json_util
+from address_normalizer import AddressNormalizer
+from log_watermark import LogWatermark
+from directory_swap import replace_directory, restore_previous
+
+
+class UserFeatureStore:
+    # Source collection -> (user id field, column prefix)
+    SOURCES = {
+        'search_logs': ('user_id', 'search'),
+        'location_logs': ('user_id', 'location'),
+        'userActivities': ('userId', 'activity')
+    }
+    MAX_TYPES = 32  # per-source type vocabulary; later types share the last slot
+
+    def __init__(self, db, path='feature_store', batch_size=5000, address_normalizer=None):
+        """Open (or start) the store at path; call refresh() to fold in new log documents
+
+        Every column is an additive statistic (counts, hour sums, min/max timestamps,
+        per-type counts, distinct user/address pairs), so new logs are folded in
+        without rereading old ones. Rows are dense and never reassigned.
+        """
+        self.db = db
+        self.path = path
+        self.batch_size = batch_size
+        self.address_normalizer = address_normalizer or AddressNormalizer()
+        self._lock = threading.Lock()
+        self._load()
+
+    # Storage
+
+    def _empty_columns(self, capacity):
+        columns = {'first_seen': np.full(capacity, np.nan), 'last_seen': np.full(capacity, np.nan)}
+        for _, prefix in self.SOURCES.values():
+            columns[f'{prefix}_count'] = np.zeros(capacity, dtype=np.int64)
+            columns[f'{prefix}_hour_n'] = np.zeros(capacity, dtype=np.int64)
+            columns[f'{prefix}_hour_sum'] = np.zeros(capacity)
+            columns[f'{prefix}_hour_sq_sum'] = np.zeros(capacity)
+            columns[f'{prefix}_type_counts'] = np.zeros((capacity, self.MAX_TYPES), dtype=np.int32)
+        return columns
+
+    def _load(self):
+        # A save that crashed mid-swap leaves the previous version aside; reload it rather than start over
+        restore_previous(self.path)
+        meta_path = os.path.join(self.path, 'meta.json')
+        if not os.path.exists(meta_path):
+            self.user_ids = []
+            self.columns = self._empty_columns(0)
+            self.location_pairs = np.zeros((0, 2), dtype=np.uint64)
+            self.types = {prefix: [] for _, prefix in self.SOURCES.values()}
+            self.watermarks = {}
+        else:
+            with open(meta_path) as f:
+                meta = json_util.loads(f.read())
+            self.user_ids = list(np.load(os.path.join(self.path, 'user_ids.npy')))
+            self.columns = {
+                name: np.load(os.path.join(self.path, f"{name}.npy")) for name in self._empty_columns(0)
+            }
+            self.location_pairs = np.load(os.path.join(self.path, 'location_pairs.npy'))
+            self.types = meta['types']
+            self.watermarks = meta['watermarks']
+
+        self._pending_pairs = []
+        self.size = len(self.user_ids)
+        self._rows = {user_id: row for row, user_id in enumerate(self.user_ids)}
+
+    def save(self):
+        """Write the used rows of every column as .npy files, with types and watermarks in meta.json"""
+        self._fold_location_pairs()
+        with replace_directory(self.path) as staging:
+            np.save(os.path.join(staging, 'user_ids.npy'), np.asarray(self.user_ids, dtype=str))
+            for name, values in self.columns.items():
+                np.save(os.path.join(staging, f"{name}.npy"), values[:self.size])
+            np.save(os.path.join(staging, 'location_pairs.npy'), self.location_pairs)
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                f.write(json_util.dumps({'types': self.types, 'watermarks': self.watermarks}))
+
+    # Incremental updates
+
+    def _ensure_rows(self, user_ids):
+        """Dense row per user id, appending unseen users (capacity grows geometrically)"""
+        for user_id in user_ids:
+            if user_id not in self._rows:
+                self._rows[user_id] = len(self.user_ids)
+                self.user_ids.append(user_id)
+
+        self.size = len(self.user_ids)
+        capacity = len(self.columns['first_seen'])
+        if self.size > capacity:
+            grown = self._empty_columns(max(self.size, capacity * 2, 1024))
+            for name, values in self.columns.items():
+                grown[name][:capacity] = values
+            self.columns = grown
+
+        return np.fromiter((self._rows[user_id] for user_id in user_ids), dtype=np.int64, count=len(user_ids))
+
+    def _type_codes(self, prefix, values):
+        vocabulary = self.types[prefix]
+        codes = np.empty(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            value = str(value or 'unknown')
+            if value not in vocabulary and len(vocabulary) < self.MAX_TYPES:
+                vocabulary.append(value)
+            codes[i] = vocabulary.index(value) if value in vocabulary else self.MAX_TYPES - 1
+        return codes
+
+    def _apply(self, source, docs):
+        user_field, prefix = self.SOURCES[source]
+        rows = self._ensure_rows([str(doc.get(user_field, 'anonymous')) for doc in docs])
+        columns = self.columns
+
+        np.add.at(columns[f'{prefix}_count'], rows, 1)
+        np.add.at(columns[f'{prefix}_type_counts'], (rows, self._type_codes(prefix, [doc.get('type') for doc in docs])), 1)
+
+        times = pd.to_datetime([doc.get('timestamp') for doc in docs], utc=True, format='ISO8601', errors='coerce')
+        valid = ~np.asarray(times.isna())
+        timed_rows = rows[valid]
+        hours = np.asarray(times.hour, dtype=np.float64)[valid]
+        seconds = np.asarray((times[valid] - pd.Timestamp(0, tz='UTC')).total_seconds())
+
+        np.add.at(columns[f'{prefix}_hour_n'], timed_rows, 1)
+        np.add.at(columns[f'{prefix}_hour_sum'], timed_rows, hours)
+        np.add.at(columns[f'{prefix}_hour_sq_sum'], timed_rows, hours ** 2)
+        np.fmin.at(columns['first_seen'], timed_rows, seconds)
+        np.fmax.at(columns['last_seen'], timed_rows, seconds)
+
+        if source == 'location_logs':
+            keys = self.address_normalizer.normalize_many([doc.get('address', '') for doc in docs])
+            key_hashes = np.array(
+                [int.from_bytes(hashlib.blake2b(address['key'].encode('utf-8'), digest_size=8).digest(), 'big')
+                 for address in keys],
+                dtype=np.uint64
+            )
+            # Deduped per batch here; merging with the stored pairs waits for one pass in _fold_location_pairs
+            self._pending_pairs.append(np.unique(np.column_stack([rows.astype(np.uint64), key_hashes]), axis=0))
+
+    def _fold_location_pairs(self):
+        """Merge the batches' user/address pairs into the distinct stored pairs with one np.unique"""
+        if self._pending_pairs:
+            self.location_pairs = np.unique(np.concatenate([self.location_pairs] + self._pending_pairs), axis=0)
+            self._pending_pairs = []
+
+    def refresh(self):
+        """Fold log documents each source's watermark hasn't seen into the table and save it
+
+        Returns {source: documents folded in}. Safe to call from concurrent modules.
+        """
+        with self._lock:
+            processed = {}
+            for source in self.SOURCES:
+                watermark = LogWatermark.from_document(self.watermarks.get(source))
+                cursor = self.db[source].find(
+                    watermark.query(), {self.SOURCES[source][0]: 1, 'type': 1, 'timestamp': 1, 'address': 1}
+                ).sort('_id', 1).batch_size(self.batch_size)
+
+                processed[source] = 0
+                batch = []
+                for doc in watermark.new_documents(cursor):
+                    batch.append(doc)
+                    if len(batch) == self.batch_size:
+                        self._apply(source, batch)
+                        processed[source] += len(batch)
+                        batch = []
+                if batch:
+                    self._apply(source, batch)
+                    processed[source] += len(batch)
+                self.watermarks[source] = watermark.to_document()
+
+            if any(processed.values()):
+                self.save()
+            return processed
+
+    # Reads
+
+    def frame(self, user_ids=None):
+        """Derived per-user features as a DataFrame indexed by user id
+
+        With user_ids the frame is reindexed to them; users without logs get NaN.
+        """
+        with self._lock:
+            self._fold_location_pairs()
+            size = self.size
+            columns = {name: values[:size] for name, values in self.columns.items()}
+            location_rows = self.location_pairs[:, 0].astype(np.int64)
+            types = {prefix: list(vocabulary) for prefix, vocabulary in self.types.items()}
+            index = pd.Index(self.user_ids[:size], name='user_id')
+
+        features = {}
+        for _, prefix in self.SOURCES.values():
+            n = columns[f'{prefix}_hour_n']
+            mean = np.where(n > 0, columns[f'{prefix}_hour_sum'] / np.maximum(n, 1), np.nan)
+            variance = np.where(
+                n > 1,
+                (columns[f'{prefix}_hour_sq_sum'] - n * np.nan_to_num(mean) ** 2) / np.maximum(n - 1, 1),
+                0.0
+            )
+            type_counts = columns[f'{prefix}_type_counts']
+
+            features[f'{prefix}_count'] = columns[f'{prefix}_count']
+            features[f'avg_{prefix}_hour'] = mean
+            features[f'{prefix}_hour_std'] = np.sqrt(np.maximum(variance, 0))
+            features[f'{prefix}_type_variety'] = (type_counts > 0).sum(axis=1)
+            vocabulary = np.array(types[prefix] + ['unknown'] * (self.MAX_TYPES - len(types[prefix])), dtype=object)
+            features[f'top_{prefix}_type'] = np.where(
+                type_counts.sum(axis=1) > 0, vocabulary[type_counts.argmax(axis=1)], None
+            )
+
+        features['distinct_locations'] = np.bincount(location_rows, minlength=size)
+        features['first_seen'] = pd.to_datetime(columns['first_seen'], unit='s', utc=True)
+        features['last_seen'] = pd.to_datetime(columns['last_seen'], unit='s', utc=True)
+
+        frame = pd.DataFrame(features, index=index)
+        return frame if user_ids is None else frame.reindex(pd.Index([str(u) for u in user_ids], name='user_id'))
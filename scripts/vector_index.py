@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Vector Index for LatePlate Finder recommendation modules
+IVF-style approximate nearest-neighbor index in NumPy, persisted as memory-mapped .npy files
+"""
+
+import os
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from directory_swap import replace_directory
+
+
+class VectorIndex:
+    FILES = ('centroids', 'vectors', 'norms', 'offsets', 'ids', 'sorted_ids', 'sorted_rows')
+
+    def __init__(self, centroids, vectors, norms, offsets, ids, sorted_ids, sorted_rows, metric='ip'):
+        """Use VectorIndex.build or VectorIndex.load rather than calling this directly"""
+        self.centroids = centroids
+        self.vectors = vectors
+        self.norms = norms
+        self.offsets = offsets
+        self.ids = ids
+        self.sorted_ids = sorted_ids
+        self.sorted_rows = sorted_rows
+        self.metric = metric
+
+    @classmethod
+    def build(cls, ids, vectors, metric='ip', n_lists=None, random_state=42):
+        """Partition vectors into n_lists k-means cells, stored contiguously per cell
+
+        metric='ip' ranks by inner product (matrix factorization scores); metric='cosine'
+        divides by vector norms (similar users / similar items). Raw vectors are stored
+        either way, so vector() returns what was indexed.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        ids = np.asarray(ids).astype(str)
+        norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+
+        n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = min(n_lists, len(vectors))
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, n_init=3, batch_size=4096, random_state=random_state)
+        assignments = kmeans.fit_predict(cls._normalize(vectors) if metric == 'cosine' else vectors)
+
+        order = np.argsort(assignments, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+        ids = ids[order]
+        id_order = np.argsort(ids)
+
+        return cls(
+            centroids=kmeans.cluster_centers_.astype(np.float32),
+            vectors=vectors[order],
+            norms=norms[order],
+            offsets=offsets.astype(np.int64),
+            ids=ids,
+            sorted_ids=ids[id_order],
+            sorted_rows=id_order.astype(np.int64),
+            metric=metric
+        )
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1)
+
+    def save(self, path):
+        """Write one .npy file per array plus the metric name"""
+        with replace_directory(path) as staging:
+            for name in self.FILES:
+                np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+            with open(os.path.join(staging, 'metric'), 'w') as f:
+                f.write(self.metric)
+
+    @classmethod
+    def load(cls, path):
+        """Open a saved index with the large arrays memory-mapped"""
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in cls.FILES}
+        with open(os.path.join(path, 'metric')) as f:
+            metric = f.read().strip()
+        return cls(metric=metric, **arrays)
+
+    def vector(self, item_id):
+        """Stored vector for an id, or None if the id is not indexed"""
+        position = np.searchsorted(self.sorted_ids, str(item_id))
+        if position >= len(self.sorted_ids) or self.sorted_ids[position] != str(item_id):
+            return None
+        return np.asarray(self.vectors[self.sorted_rows[position]])
+
+    def search(self, query, top_n=10, n_probe=8, exclude=()):
+        """Return [(id, score)] for the top_n vectors in the n_probe closest cells"""
+        query = np.asarray(query, dtype=np.float32)
+        if self.metric == 'cosine':
+            query = self._normalize(query)
+
+        n_probe = min(n_probe, len(self.centroids))
+        cells = np.argpartition(-(self.centroids @ query), n_probe - 1)[:n_probe]
+        rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in cells])
+        if len(rows) == 0:
+            return []
+
+        scores = np.asarray(self.vectors[rows]) @ query
+        if self.metric == 'cosine':
+            scores = scores / np.where(self.norms[rows] > 0, self.norms[rows], 1)
+        excluded = set(str(e) for e in exclude)
+        limit = min(top_n + len(excluded), len(rows))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        for position in best:
+            item_id = str(self.ids[rows[position]])
+            if item_id not in excluded:
+                results.append((item_id, float(scores[position])))
+            if len(results) == top_n:
+                break
+        return results
+
+
+class SeenItems:
+    FILES = ('user_ids', 'offsets', 'item_positions', 'item_ids')
+
+    def __init__(self, user_ids, offsets, item_positions, item_ids):
+        """Use SeenItems.build or SeenItems.load rather than calling this directly"""
+        self.user_ids = user_ids
+        self.offsets = offsets
+        self.item_positions = item_positions
+        self.item_ids = item_ids
+
+    @classmethod
+    def build(cls, user_ids, matrix, item_ids):
+        """Items each user interacted with, from the CSR user x item matrix (rows sorted by user id)"""
+        user_ids = np.asarray(user_ids).astype(str)
+        order = np.argsort(user_ids)
+        rows = matrix[order]
+        return cls(
+            user_ids=user_ids[order],
+            offsets=rows.indptr.astype(np.int64),
+            item_positions=rows.indices.astype(np.int32),
+            item_ids=np.asarray(item_ids).astype(str)
+        )
+
+    def save(self, path):
+        """Write the per-user item lists as .npy files"""
+        with replace_directory(path) as staging:
+            for name in self.FILES:
+                np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, path):
+        return cls(**{name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in cls.FILES})
+
+    def items(self, user_id):
+        """Item ids the user already interacted with ([] for unknown users)"""
+        position = np.searchsorted(self.user_ids, str(user_id))
+        if position >= len(self.user_ids) or self.user_ids[position] != str(user_id):
+            return []
+        positions = self.item_positions[self.offsets[position]:self.offsets[position + 1]]
+        return [str(item_id) for item_id in self.item_ids[positions]]